@@ -0,0 +1,182 @@
+"""Самонастраивающееся ограничение числа одновременных запросов (AIMD).
+
+Пока запросы проходят без перегрузки, а задержка не больше tolerance
+базовой, предел растёт аддитивно: на единицу за каждые limit успешных
+запросов. Признак перегрузки — таймаут, ответ 429 или 5xx, или
+задержка выше tolerance базовой — уменьшает предел в decrease раз,
+но не чаще раза за время одного запроса, чтобы пачка одновременных
+ошибок от одного всплеска не обрушила предел до минимума. Ошибки
+другого рода (например, 401) предел не меняют.
+"""
+
+import asyncio
+import threading
+import time
+from contextlib import asynccontextmanager, contextmanager
+from http import HTTPStatus
+
+import requests  # type: ignore
+
+# Скорость, с которой сглаженная задержка следует за замерами.
+SMOOTHING = 0.1
+# Скорость, с которой базовая задержка поднимается к текущей.
+BASELINE_DRIFT = 0.01
+# Задержки меньше этой не считаются признаком перегрузки, секунды.
+MIN_SLOW_LATENCY = 0.1
+# Период проверки свободного места в async_slot(), секунды.
+ASYNC_POLL_INTERVAL = 0.01
+
+
+def error_status(error):
+    """Код ответа HTTP из ошибки или её причин, если он есть."""
+    while error is not None:
+        for name in ('status', 'error_code'):
+            status = getattr(error, name, None)
+            if isinstance(status, int):
+                return status
+        status = getattr(getattr(error, 'result', None), 'status_code',
+                         None)
+        if isinstance(status, int):
+            return status
+        error = error.__cause__
+    return None
+
+
+def is_overload(error) -> bool:
+    """Говорит ли ошибка о перегрузке сервера."""
+    cause = error
+    while cause is not None:
+        if isinstance(cause, (TimeoutError, requests.Timeout)):
+            return True
+        cause = cause.__cause__
+    status = error_status(error)
+    return status is not None and (
+        status == HTTPStatus.TOO_MANY_REQUESTS
+        or status >= HTTPStatus.INTERNAL_SERVER_ERROR
+    )
+
+
+class Slot:
+    """Один выполняющийся запрос."""
+
+    __slots__ = ('started', 'overloaded')
+
+    def __init__(self) -> None:
+        """Запрос, начатый сейчас."""
+        self.started = time.monotonic()
+        self.overloaded = False
+
+
+class AdaptiveLimit:
+    """Предел одновременных запросов, подстраиваемый по AIMD."""
+
+    def __init__(self, initial=4, min_limit=1, max_limit=64,
+                 decrease=0.5, tolerance=2.0) -> None:
+        """Предел от min_limit до max_limit, начиная с initial."""
+        self.limit = float(initial)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.decrease = decrease
+        self.tolerance = tolerance
+        self.condition = threading.Condition()
+        self.in_flight = 0
+        self.latency = None
+        self.baseline = None
+        self.last_decrease = 0.0
+        self.calls = 0
+        self.overloads = 0
+
+    def acquire(self) -> Slot:
+        """Ожидание свободного места под запрос."""
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait()
+            self.in_flight += 1
+        return Slot()
+
+    def try_acquire(self):
+        """Место под запрос без ожидания или None, если мест нет."""
+        with self.condition:
+            if self.in_flight >= int(self.limit):
+                return None
+            self.in_flight += 1
+        return Slot()
+
+    def _observe(self, latency) -> bool:
+        """Учёт задержки; True, если она говорит о перегрузке."""
+        if self.latency is None:
+            self.latency = self.baseline = latency
+            return False
+        self.latency += (latency - self.latency) * SMOOTHING
+        if latency < self.baseline:
+            self.baseline = latency
+        else:
+            self.baseline += (latency - self.baseline) * BASELINE_DRIFT
+        return latency > max(self.tolerance * self.baseline,
+                             MIN_SLOW_LATENCY)
+
+    def release(self, slot) -> None:
+        """Завершение запроса и подстройка предела."""
+        now = time.monotonic()
+        latency = now - slot.started
+        with self.condition:
+            self.in_flight -= 1
+            self.calls += 1
+            slow = self._observe(latency)
+            if slot.overloaded or slow:
+                self.overloads += 1
+                if now - self.last_decrease > self.latency:
+                    self.limit = max(self.min_limit,
+                                     self.limit * self.decrease)
+                    self.last_decrease = now
+            else:
+                self.limit = min(self.max_limit,
+                                 self.limit + 1 / self.limit)
+            self.condition.notify_all()
+
+    @contextmanager
+    def slot(self):
+        """Выполнение запроса в пределах ограничения.
+
+        Исключение внутри блока проверяется is_overload; флаг
+        overloaded можно выставить и вручную.
+        """
+        slot = self.acquire()
+        try:
+            yield slot
+        except Exception as error:
+            slot.overloaded = slot.overloaded or is_overload(error)
+            raise
+        finally:
+            self.release(slot)
+
+    @asynccontextmanager
+    async def async_slot(self, interval=ASYNC_POLL_INTERVAL):
+        """То же, что slot(), для сопрограмм.
+
+        Место ждётся без блокировки цикла asyncio: проверкой
+        каждые interval секунд.
+        """
+        slot = self.try_acquire()
+        while slot is None:
+            await asyncio.sleep(interval)
+            slot = self.try_acquire()
+        try:
+            yield slot
+        except Exception as error:
+            slot.overloaded = slot.overloaded or is_overload(error)
+            raise
+        finally:
+            self.release(slot)
+
+    def metrics(self) -> dict:
+        """Текущий предел и задержки."""
+        with self.condition:
+            return {
+                'limit': round(self.limit, 2),
+                'in_flight': self.in_flight,
+                'latency_ms': round((self.latency or 0) * 1000, 1),
+                'baseline_ms': round((self.baseline or 0) * 1000, 1),
+                'calls': self.calls,
+                'overloads': self.overloads,
+            }
@@ -0,0 +1,268 @@
+"""Аналитика сроков проверки по записанной истории статусов.
+
+История пишется ботом в файл HISTORY_FILE (по одной домашней работе
+в формате JSON на строку). Файл разбирается одним вызовом json.loads,
+даты переводятся в колонку NumPy целым массивом; записи
+без id, статуса или даты пропускаются и считаются. Все вычисления
+выполняются векторно над колоночными массивами.
+
+Запуск:
+    python analytics.py history.jsonl [--json] [--save-npz history.npz]
+"""
+
+import argparse
+import json
+import logging
+import sys
+
+import numpy as np
+
+from homework import HOMEWORK_VERDICTS
+
+logger = logging.getLogger(__name__)
+
+# Коды статусов: индекс статуса в HOMEWORK_VERDICTS.
+STATUSES = tuple(HOMEWORK_VERDICTS)
+STATUS_CODES = {status: code for code, status in enumerate(STATUSES)}
+UNKNOWN_STATUS = -1
+# Статусы, означающие завершение проверки.
+FINAL_STATUSES = ('approved', 'rejected')
+PERCENTILES = (50, 90, 95, 99)
+
+
+def parse_lines(text) -> tuple:
+    """Записи из текста JSON Lines и число повреждённых строк.
+
+    Весь текст разбирается одним вызовом json.loads; только если
+    в нём есть повреждённые строки, строки разбираются по одной.
+    """
+    lines = [line for line in text.splitlines() if line.strip()]
+    try:
+        return json.loads('[' + ','.join(lines) + ']'), 0
+    except ValueError:
+        pass
+    records = []
+    for line in lines:
+        try:
+            records.append(json.loads(line))
+        except ValueError:
+            continue
+    return records, len(lines) - len(records)
+
+
+def is_valid(record) -> bool:
+    """Есть ли у записи id, статус и дата."""
+    return (isinstance(record, dict)
+            and isinstance(record.get('id'), int)
+            and isinstance(record.get('status'), str)
+            and isinstance(record.get('date_updated'), str))
+
+
+def parse_dates(values):
+    """Даты ISO 8601 в datetime64[s]; NaT для неразборчивых.
+
+    Строки обрезаются до секунд (19 символов) — это отбрасывает
+    суффикс 'Z' без поэлементного rstrip.
+    """
+    values = np.array(values, dtype='U19')
+    try:
+        return values.astype('datetime64[s]')
+    except ValueError:
+        dates = np.empty(len(values), dtype='datetime64[s]')
+        for index, value in enumerate(values):
+            try:
+                dates[index] = np.datetime64(value, 's')
+            except ValueError:
+                dates[index] = np.datetime64('NaT')
+        return dates
+
+
+def load_history(path) -> dict:
+    """Загрузка истории статусов в колоночные массивы.
+
+    Повреждённые записи пропускаются, их число пишется в журнал.
+    """
+    if str(path).endswith('.npz'):
+        with np.load(path) as data:
+            return {name: data[name] for name in data.files}
+    with open(path, encoding='utf-8') as file:
+        records, skipped = parse_lines(file.read())
+    valid = [record for record in records if is_valid(record)]
+    skipped += len(records) - len(valid)
+    statuses = np.array([STATUS_CODES.get(record['status'], UNKNOWN_STATUS)
+                         for record in valid], dtype=np.int8)
+    dates = parse_dates([record['date_updated'] for record in valid])
+    good = ~np.isnat(dates)
+    skipped += int((~good).sum())
+    if skipped:
+        logger.warning(f'Пропущено повреждённых записей: {skipped}')
+    return {
+        'id': np.array([record['id'] for record in valid],
+                       dtype=np.int64)[good],
+        'status': statuses[good],
+        'date': dates[good],
+        'lesson': np.array([record.get('lesson_name', '')
+                            for record in valid], dtype=str)[good],
+    }
+
+
+def save_history(columns, path) -> None:
+    """Сохранение колонок в .npz для быстрой повторной загрузки."""
+    np.savez_compressed(path, **columns)
+
+
+def prepare(columns) -> dict:
+    """Сортировка по работе и времени и удаление повторов статуса."""
+    order = np.lexsort((columns['date'], columns['id']))
+    ids = columns['id'][order]
+    statuses = columns['status'][order]
+    keep = np.ones(len(ids), dtype=bool)
+    keep[1:] = ~((ids[1:] == ids[:-1]) & (statuses[1:] == statuses[:-1]))
+    return {name: values[order][keep] for name, values in columns.items()}
+
+
+def _percentiles(values) -> dict:
+    """Перцентили длительностей в секундах."""
+    if not len(values):
+        return {}
+    result = np.percentile(values, PERCENTILES)
+    return {f'p{p}': float(value) for p, value in zip(PERCENTILES, result)}
+
+
+def transition_stats(columns) -> dict:
+    """Перцентили времени между соседними статусами одной работы."""
+    ids = columns['id']
+    statuses = columns['status'].astype(np.int16)
+    seconds = columns['date'].astype(np.int64)
+    same = ids[1:] == ids[:-1]
+    from_status = statuses[:-1][same]
+    to_status = statuses[1:][same]
+    durations = (seconds[1:] - seconds[:-1])[same]
+    pairs = from_status * len(STATUSES) + to_status
+    known = (from_status >= 0) & (to_status >= 0)
+    result: dict = {}
+    for pair in np.unique(pairs[known]):
+        mask = known & (pairs == pair)
+        name = (f'{STATUSES[pair // len(STATUSES)]}'
+                f'->{STATUSES[pair % len(STATUSES)]}')
+        result[name] = {'count': int(mask.sum()),
+                        **_percentiles(durations[mask])}
+    return result
+
+
+def turnaround_stats(columns) -> dict:
+    """Перцентили времени от первой записи работы до вердикта."""
+    ids = columns['id']
+    seconds = columns['date'].astype(np.int64)
+    final_codes = [STATUS_CODES[status] for status in FINAL_STATUSES]
+    final = np.isin(columns['status'], final_codes)
+    # Массивы отсортированы, поэтому return_index даёт первую запись.
+    first_ids, first_index = np.unique(ids, return_index=True)
+    final_ids, final_index = np.unique(ids[final], return_index=True)
+    start = seconds[first_index[np.searchsorted(first_ids, final_ids)]]
+    end = seconds[final][final_index]
+    return {'count': int(len(final_ids)), **_percentiles(end - start)}
+
+
+def throughput_stats(columns) -> dict:
+    """Количество вердиктов ревьюеров в сутки."""
+    final_codes = [STATUS_CODES[status] for status in FINAL_STATUSES]
+    final = np.isin(columns['status'], final_codes)
+    days = columns['date'][final].astype('datetime64[D]')
+    if not len(days):
+        return {'days': 0}
+    _, per_day = np.unique(days, return_counts=True)
+    return {
+        'days': int(len(per_day)),
+        'mean': float(per_day.mean()),
+        'max': int(per_day.max()),
+        **_percentiles(per_day),
+    }
+
+
+def rejection_stats(columns) -> dict:
+    """Доля работ с замечаниями: общая и по урокам.
+
+    Работа считается один раз, сколько бы раз её ни возвращали;
+    урок работы берётся из её последнего вердикта.
+    """
+    statuses = columns['status']
+    rejected = statuses == STATUS_CODES['rejected']
+    final = (statuses == STATUS_CODES['approved']) | rejected
+    ids = columns['id'][final]
+    # После prepare массивы отсортированы по работе и времени:
+    # последняя запись работы — первая в перевёрнутом массиве.
+    homework_ids, last = np.unique(ids[::-1], return_index=True)
+    lesson_of = columns['lesson'][final][::-1][last]
+    with_remarks = np.isin(homework_ids, columns['id'][rejected])
+    lessons, inverse = np.unique(lesson_of, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    rejected_by_lesson = np.bincount(inverse, weights=with_remarks,
+                                     minlength=len(lessons))
+    total_by_lesson = np.bincount(inverse, minlength=len(lessons))
+    total = int(len(homework_ids))
+    return {
+        'verdicts': int(final.sum()),
+        'homeworks': total,
+        'rate': float(with_remarks.sum() / total) if total else 0.0,
+        'by_lesson': {
+            str(lesson): float(rejected_count / count)
+            for lesson, rejected_count, count in zip(
+                lessons, rejected_by_lesson, total_by_lesson)
+        },
+    }
+
+
+def build_report(columns) -> dict:
+    """Полный отчёт по истории статусов."""
+    columns = prepare(columns)
+    return {
+        'records': int(len(columns['id'])),
+        'homeworks': int(len(np.unique(columns['id']))),
+        'transitions': transition_stats(columns),
+        'turnaround': turnaround_stats(columns),
+        'throughput': throughput_stats(columns),
+        'rejections': rejection_stats(columns),
+    }
+
+
+def format_report(report) -> str:
+    """Текстовое представление отчёта."""
+    lines = [f'Записей: {report["records"]}, '
+             f'работ: {report["homeworks"]}']
+    lines.append('Время между статусами, с:')
+    for name, stats in report['transitions'].items():
+        lines.append(f'  {name}: {stats}')
+    lines.append(f'От первой записи до вердикта, с: {report["turnaround"]}')
+    lines.append(f'Вердиктов в сутки: {report["throughput"]}')
+    rejections = report['rejections']
+    lines.append(f'Доля работ с замечаниями: {rejections["rate"]:.2%} '
+                 f'из {rejections["homeworks"]} '
+                 f'(вердиктов: {rejections["verdicts"]})')
+    for lesson, rate in rejections['by_lesson'].items():
+        lines.append(f'  {lesson}: {rate:.2%}')
+    return '\n'.join(lines)
+
+
+def main(argv=None) -> None:
+    """Точка входа командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('history', help='Файл истории (.jsonl или .npz).')
+    parser.add_argument('--json', action='store_true',
+                        help='Вывести отчёт в формате JSON.')
+    parser.add_argument('--save-npz', metavar='PATH',
+                        help='Сохранить колонки в .npz.')
+    args = parser.parse_args(argv)
+    columns = load_history(args.history)
+    if args.save_npz:
+        save_history(columns, args.save_npz)
+    report = build_report(columns)
+    if args.json:
+        json.dump(report, sys.stdout, ensure_ascii=False, indent=2)
+        sys.stdout.write('\n')
+    else:
+        print(format_report(report))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,293 @@
+"""Асинхронная доставка в Telegram через пул постоянных соединений.
+
+TeleBot делает по одному блокирующему HTTP-запросу на сообщение.
+Здесь запросы к Bot API идут из одного цикла asyncio в отдельном
+потоке: соединения HTTP/1.1 (keep-alive) переиспользуются, отправки
+в разные чаты выполняются одновременно, число одновременных запросов
+ограничено размером пула. Ограничения частоты Telegram соблюдаются
+теми же RateLimiter, что и в delivery.ChatDelivery, а интерфейс
+deliver() и submit() совпадает с ChatDelivery. Отправка из полосы
+ниже ждёт, пока не займут общий лимит все готовые отправки полос выше.
+Справедливая очередь по ключам здесь не нужна: отправки не ждут
+друг друга, а идут одновременно в пределах лимитов.
+"""
+
+import asyncio
+import json
+import logging
+import ssl
+import threading
+from concurrent.futures import wait
+from urllib.parse import urlsplit
+
+from delivery import (CHAT_RATE, GLOBAL_RATE, LANE_SHARES, LANES, VERDICT,
+                      RateLimiter)
+
+logger = logging.getLogger(__name__)
+
+API_URL = 'https://api.telegram.org/bot{0}/{1}'
+POOL_SIZE = 16
+TIMEOUT = 30
+
+
+class TelegramAPIError(Exception):
+    """Bot API ответил ошибкой."""
+
+    def __init__(self, error_code, description, result_json=None) -> None:
+        """Ошибка с кодом error_code, как у ApiTelegramException."""
+        super().__init__(f'Error code: {error_code}. '
+                         f'Description: {description}')
+        self.error_code = error_code
+        self.description = description
+        self.result_json = result_json or {}
+
+
+class ConnectionPool:
+    """Постоянные соединения HTTP/1.1 с одним сервером."""
+
+    def __init__(self, url, size=POOL_SIZE, timeout=TIMEOUT) -> None:
+        """Пул к серверу из адреса url; создаётся внутри цикла asyncio."""
+        parts = urlsplit(url)
+        self.host = parts.hostname
+        self.secure = parts.scheme == 'https'
+        self.port = parts.port or (443 if self.secure else 80)
+        self.timeout = timeout
+        self.idle: list = []
+        self.semaphore = asyncio.Semaphore(size)
+        self.opened = 0
+
+    async def _connect(self):
+        """Новое соединение."""
+        self.opened += 1
+        return await asyncio.open_connection(
+            self.host, self.port,
+            ssl=ssl.create_default_context() if self.secure else None)
+
+    async def _exchange(self, reader, writer, path, body):
+        """Запрос POST и чтение ответа; (код, тело, keep-alive)."""
+        writer.write(
+            f'POST {path} HTTP/1.1\r\nHost: {self.host}\r\n'
+            f'Content-Type: application/json\r\n'
+            f'Content-Length: {len(body)}\r\n\r\n'.encode('latin-1') + body)
+        await writer.drain()
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionError('Соединение закрыто сервером')
+        version, status = status_line.split()[:2]
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if headers.get('transfer-encoding', '').lower() == 'chunked':
+            data = b''
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                if not size:
+                    await reader.readline()
+                    break
+                data += await reader.readexactly(size)
+                await reader.readline()
+        elif 'content-length' in headers:
+            data = await reader.readexactly(int(headers['content-length']))
+        else:
+            return int(status), await reader.read(), False
+        keep_alive = (headers.get('connection', '').lower() != 'close'
+                      and version == b'HTTP/1.1')
+        return int(status), data, keep_alive
+
+    async def post(self, path, body):
+        """POST с переиспользованием соединения; (код, тело)."""
+        async with self.semaphore:
+            for attempt in range(2):
+                reused = bool(self.idle)
+                reader, writer = (self.idle.pop() if reused
+                                  else await self._connect())
+                try:
+                    status, data, keep_alive = await asyncio.wait_for(
+                        self._exchange(reader, writer, path, body),
+                        self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError,
+                        ValueError):
+                    writer.close()
+                    # Сервер мог закрыть простаивавшее соединение.
+                    if reused and attempt == 0:
+                        continue
+                    raise
+                except BaseException:
+                    writer.close()
+                    raise
+                if keep_alive:
+                    self.idle.append((reader, writer))
+                else:
+                    writer.close()
+                return status, data
+        raise ConnectionError('Не удалось выполнить запрос')
+
+    def close(self) -> None:
+        """Закрытие простаивающих соединений."""
+        while self.idle:
+            self.idle.pop()[1].close()
+
+
+class AsyncBotClient:
+    """Вызовы методов Bot API через пул соединений."""
+
+    def __init__(self, token, api_url=None, pool_size=POOL_SIZE) -> None:
+        """Клиент бота token; api_url в формате apihelper.API_URL."""
+        self.token = token
+        self.api_url = api_url or API_URL
+        self.pool = ConnectionPool(self.api_url.format(token, ''),
+                                   pool_size)
+        # До какого момента (time.monotonic) бот на паузе после 429.
+        self.backoff_until = 0.0
+
+    async def call(self, method, params):
+        """Результат метода или TelegramAPIError."""
+        path = urlsplit(self.api_url.format(self.token, method)).path
+        body = json.dumps(params, ensure_ascii=False).encode('utf-8')
+        status, data = await self.pool.post(path, body)
+        try:
+            answer = json.loads(data)
+        except ValueError:
+            raise TelegramAPIError(status, data[:200].decode(
+                'utf-8', 'replace'))
+        if not answer.get('ok'):
+            raise TelegramAPIError(answer.get('error_code', status),
+                                   answer.get('description', ''), answer)
+        return answer['result']
+
+    async def send_message(self, chat_id, text):
+        """Отправка сообщения в чат."""
+        return await self.call('sendMessage',
+                               {'chat_id': chat_id, 'text': text})
+
+    def close(self) -> None:
+        """Закрытие соединений."""
+        self.pool.close()
+
+
+class AsyncDelivery:
+    """Доставка во все чаты сразу из цикла asyncio в отдельном потоке.
+
+    send_async(client, chat_id, text) — сопрограмма отправки одного
+    сообщения; deliver() ведёт себя как ChatDelivery.deliver().
+    """
+
+    def __init__(self, token, send_async, api_url=None,
+                 pool_size=POOL_SIZE, global_rate=GLOBAL_RATE,
+                 chat_rate=CHAT_RATE) -> None:
+        """Запуск цикла asyncio и создание клиента бота token."""
+        self.send_async = send_async
+        self.chat_rate = chat_rate
+        self.global_limiter = RateLimiter(global_rate)
+        self.lane_limiters = {lane: RateLimiter(global_rate * share)
+                              for lane, share in LANE_SHARES.items()}
+        self.chat_limiters: dict = {}
+        # Отправки полос, готовые занять общий лимит.
+        self.waiting = {lane: 0 for lane in LANES}
+        # Поставленные через submit() и ещё не завершённые отправки.
+        self.pending: set = set()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever,
+                                       daemon=True, name='async-delivery')
+        self.thread.start()
+        self.client = self._run(self._create_client(token, api_url,
+                                                    pool_size))
+
+    async def _create_client(self, token, api_url, pool_size):
+        """Клиент создаётся в цикле, которому принадлежит пул."""
+        self.turn = asyncio.Condition()
+        return AsyncBotClient(token, api_url, pool_size)
+
+    def _run(self, coroutine):
+        """Выполнение сопрограммы в цикле доставки с ожиданием."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop).result()
+
+    async def _wait(self, limiter) -> None:
+        """Ожидание разрешения ограничителя частоты."""
+        delay = limiter.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+    async def _take_turn(self, priority) -> None:
+        """Ожидание общего лимита после отправок полос выше."""
+        self.waiting[priority] += 1
+        try:
+            async with self.turn:
+                await self.turn.wait_for(lambda: not any(
+                    self.waiting[lane] for lane in LANES if lane < priority))
+            if priority in self.lane_limiters:
+                await self._wait(self.lane_limiters[priority])
+            await self._wait(self.global_limiter)
+        finally:
+            self.waiting[priority] -= 1
+            async with self.turn:
+                self.turn.notify_all()
+
+    async def _send(self, send, chat_id, text, priority) -> None:
+        """Отправка в один чат с соблюдением ограничений."""
+        limiter = self.chat_limiters.get(chat_id)
+        if limiter is None:
+            limiter = self.chat_limiters[chat_id] = RateLimiter(
+                self.chat_rate)
+        await self._wait(limiter)
+        await self._take_turn(priority)
+        if send is None:
+            await self.send_async(self.client, chat_id, text)
+        else:
+            await self.loop.run_in_executor(None, send, chat_id, text)
+
+    async def _deliver(self, chat_ids, text, send, priority) -> dict:
+        """Одновременная отправка во все чаты."""
+        chat_ids = list(chat_ids)
+        results = await asyncio.gather(
+            *(self._send(send, chat_id, text, priority)
+              for chat_id in chat_ids),
+            return_exceptions=True)
+        return {chat_id: result
+                for chat_id, result in zip(chat_ids, results)
+                if isinstance(result, BaseException)}
+
+    def submit(self, chat_ids, text, send=None, priority=VERDICT,
+               key=None):
+        """Постановка отправки во все чаты; Future с ошибками по чатам.
+
+        send — синхронная функция отправки для этого сообщения
+        (например, режим редактирования); выполняется в пуле потоков.
+        priority — полоса, key — ключ очереди, как у ChatDelivery.
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self._deliver(chat_ids, text, send, priority), self.loop)
+        self.pending.add(future)
+        future.add_done_callback(self.pending.discard)
+        return future
+
+    def deliver(self, chat_ids, text, send=None, priority=VERDICT,
+                key=None) -> dict:
+        """Отправка во все чаты, как submit(); возвращает ошибки по чатам."""
+        return self.submit(chat_ids, text, send, priority, key).result()
+
+    def set_weight(self, key, weight) -> None:
+        """Вес ключа, как у ChatDelivery, здесь не действует.
+
+        Отправки не ждут в общей очереди, поэтому вес, отличный
+        от единицы, только отмечается в журнале.
+        """
+        if weight != 1:
+            logger.warning(f'Вес {weight} ключа {key} не действует '
+                           'в асинхронной доставке')
+
+    async def _close(self) -> None:
+        """Закрытие соединений в цикле доставки."""
+        self.client.close()
+
+    def shutdown(self) -> None:
+        """Досылка поставленных отправок, закрытие соединений и цикла."""
+        wait(list(self.pending))
+        self._run(self._close())
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
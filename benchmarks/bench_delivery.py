@@ -0,0 +1,82 @@
+"""Сравнение синхронной и асинхронной рассылки в Telegram.
+
+Сообщения уходят в локальный заменитель Bot API (stand_in.py), лимиты
+частоты Telegram отключены, чтобы измерялась только сама доставка:
+    sync   — send_to_chat по одному сообщению (TeleBot);
+    threads — ChatDelivery с пулом потоков;
+    async  — AsyncDelivery с пулом постоянных соединений.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_delivery.py [--messages 2000]
+"""
+
+import argparse
+import os
+import sys
+import time
+from functools import partial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+import telebot  # type: ignore # noqa: E402
+
+import homework  # noqa: E402
+from async_delivery import AsyncDelivery  # noqa: E402
+from cassette import patched_attributes  # noqa: E402
+from delivery import ChatDelivery  # noqa: E402
+from stand_in import TelegramStandIn  # noqa: E402
+
+UNLIMITED = 10 ** 9
+TOKEN = '1:bench'
+
+
+def bench_sync(chat_ids) -> None:
+    """Последовательная отправка через TeleBot."""
+    bot = telebot.TeleBot(TOKEN)
+    for chat_id in chat_ids:
+        homework.send_to_chat(bot, chat_id, 'Вердикт')
+
+
+def bench_threads(chat_ids) -> None:
+    """ChatDelivery: по потоку на отправку из пула."""
+    bot = telebot.TeleBot(TOKEN)
+    delivery = ChatDelivery(partial(homework.send_to_chat, bot),
+                            global_rate=UNLIMITED, chat_rate=UNLIMITED)
+    failures = delivery.deliver(chat_ids, 'Вердикт')
+    delivery.shutdown()
+    assert not failures, failures
+
+
+def bench_async(chat_ids, api_url) -> None:
+    """AsyncDelivery: одновременные запросы по общим соединениям."""
+    delivery = AsyncDelivery(TOKEN, homework.send_to_chat_async,
+                             api_url=api_url, global_rate=UNLIMITED,
+                             chat_rate=UNLIMITED)
+    failures = delivery.deliver(chat_ids, 'Вердикт')
+    delivery.shutdown()
+    assert not failures, failures
+
+
+def main() -> None:
+    """Запуск сравнения."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=2000)
+    args = parser.parse_args()
+    chat_ids = [str(number) for number in range(1, args.messages + 1)]
+    homework.logger.setLevel('WARNING')
+    with TelegramStandIn() as telegram, patched_attributes(
+            telebot.apihelper, API_URL=telegram.api_url):
+        for name, run in (('sync', bench_sync), ('threads', bench_threads),
+                          ('async', partial(bench_async,
+                                            api_url=telegram.api_url))):
+            before = telegram.messages
+            started = time.perf_counter()
+            run(chat_ids)
+            elapsed = time.perf_counter() - started
+            assert telegram.messages - before == len(chat_ids)
+            print(f'{name:>8}: {len(chat_ids) / elapsed:8.0f} сообщений/с')
+
+
+if __name__ == '__main__':
+    main()
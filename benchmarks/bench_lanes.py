@@ -0,0 +1,57 @@
+"""Задержка вердикта за потоком сообщений об ошибках.
+
+Лимиты частоты Telegram включены, отправка ничего не делает.
+Сначала в доставку ставится поток сообщений об ошибках во многие
+чаты, затем вердикт; измеряется время до отправки вердикта, когда
+все сообщения в одной полосе (как было раньше) и когда ошибки идут
+в полосе ALERT.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_lanes.py [--alerts 120]
+"""
+
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from delivery import ALERT, VERDICT, ChatDelivery  # noqa: E402
+
+
+def verdict_delay(alerts, alert_priority) -> float:
+    """Секунды от постановки вердикта до его отправки."""
+    sent = {}
+
+    def send(chat_id, text):
+        sent[chat_id] = time.perf_counter()
+
+    delivery = ChatDelivery(send)
+    flood = threading.Thread(target=delivery.deliver, args=(
+        [f'alert-{number}' for number in range(alerts)], 'Сбой'),
+        kwargs={'priority': alert_priority})
+    flood.start()
+    time.sleep(0.05)
+    started = time.perf_counter()
+    delivery.deliver(['verdict'], 'Вердикт', priority=VERDICT)
+    delay = sent['verdict'] - started
+    flood.join()
+    delivery.shutdown()
+    return delay
+
+
+def main() -> None:
+    """Запуск сравнения."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--alerts', type=int, default=120)
+    alerts = parser.parse_args().alerts
+    for name, priority in (('одна полоса', VERDICT), ('полосы', ALERT)):
+        print(f'{name:>12}: вердикт через '
+              f'{verdict_delay(alerts, priority):6.3f} с')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Стоимость обработки неизменного ответа API с кэшем опроса и без.
+
+Тело повторяется с новым current_date. Без кэша каждое тело
+декодируется Response.json() и проверяется check_response; с кэшем
+сравнивается сырое тело, а проверяется готовый ответ без работ.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_polling.py [--polls 100000]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+os.environ.setdefault('PRACTICUM_TOKEN', 'bench')
+os.environ.setdefault('TELEGRAM_TOKEN', 'bench')
+os.environ.setdefault('TELEGRAM_CHAT_ID', '1')
+
+import requests  # type: ignore # noqa: E402
+
+import homework  # noqa: E402
+from poll_cache import PollCache  # noqa: E402
+
+HEADERS = {'Authorization': 'OAuth bench'}
+
+
+def bodies(polls):
+    """Ответы requests без работ с растущим current_date."""
+    responses = []
+    for poll in range(polls):
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(
+            {'homeworks': [], 'current_date': 1_700_000_000 + poll}).encode()
+        responses.append(response)
+    return responses
+
+
+def plain(responses) -> float:
+    """Декодирование и проверка каждого тела."""
+    started = time.perf_counter()
+    for response in responses:
+        homework.check_response(response.json())
+    return time.perf_counter() - started
+
+
+def cached(responses) -> float:
+    """Обработка через PollCache."""
+    cache = PollCache()
+    started = time.perf_counter()
+    for poll, response in enumerate(responses):
+        homework.check_response(
+            cache.decode(HEADERS, {'from_date': poll}, response))
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    """Замер и вывод таблицы."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--polls', type=int, default=100_000)
+    polls = parser.parse_args().polls
+    for name, func in (('без кэша', plain), ('с кэшем', cached)):
+        elapsed = func(bodies(polls))
+        print(f'{name:>10}: {elapsed / polls * 1e6:6.2f} мкс на опрос')
+
+
+if __name__ == '__main__':
+    main()
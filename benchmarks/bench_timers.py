@@ -0,0 +1,104 @@
+"""Сравнение колеса таймеров с кучей heapq.
+
+Для n таймеров со сроками до часа измеряются три фазы: постановка
+всех таймеров, перепланирование каждого (отмена и новая постановка,
+как после опроса тенанта) и продвижение времени до срабатывания всех.
+В куче отмена ленивая: запись помечается и пропускается при извлечении.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_timers.py [--sizes 10000 100000 1000000]
+"""
+
+import argparse
+import heapq
+import itertools
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+from timing_wheel import TimingWheel  # noqa: E402
+
+SIZES = (10_000, 100_000, 1_000_000)
+HORIZON = 3600
+
+
+class HeapScheduler:
+    """Таймеры в куче с тем же интерфейсом, что у TimingWheel."""
+
+    def __init__(self, tick=1.0) -> None:
+        """Пустая куча; время в тактах tick."""
+        self.tick = tick
+        self.current = 0
+        self.heap: list = []
+        self.counter = itertools.count()
+
+    def schedule(self, delay, item) -> list:
+        """Постановка таймера; запись кучи служит дескриптором."""
+        entry = [self.current + max(1, int(delay / self.tick)),
+                 next(self.counter), item, True]
+        heapq.heappush(self.heap, entry)
+        return entry
+
+    def cancel(self, entry) -> bool:
+        """Ленивая отмена."""
+        active = entry[3]
+        entry[3] = False
+        return active
+
+    def advance(self, now) -> list:
+        """Сработавшие нагрузки к моменту now."""
+        self.current = int(now // self.tick)
+        due = []
+        while self.heap and self.heap[0][0] <= self.current:
+            entry = heapq.heappop(self.heap)
+            if entry[3]:
+                due.append(entry[2])
+        return due
+
+
+def run(scheduler, delays, new_delays) -> dict:
+    """Время трёх фаз, мс."""
+    started = time.perf_counter()
+    timers = [scheduler.schedule(delay, number)
+              for number, delay in enumerate(delays)]
+    inserted = time.perf_counter()
+    for number, timer in enumerate(timers):
+        scheduler.cancel(timer)
+        timers[number] = scheduler.schedule(new_delays[number], number)
+    rescheduled = time.perf_counter()
+    fired = 0
+    for second in range(1, HORIZON + 2):
+        fired += len(scheduler.advance(second))
+    finished = time.perf_counter()
+    assert fired == len(delays)
+    return {
+        'insert': (inserted - started) * 1000,
+        'reschedule': (rescheduled - inserted) * 1000,
+        'expire': (finished - rescheduled) * 1000,
+    }
+
+
+def main() -> None:
+    """Запуск сравнения."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    args = parser.parse_args()
+    rng = random.Random(0)
+    print(f'{"таймеров":>9} {"структура":>10} {"постановка, мс":>15} '
+          f'{"перепланирование, мс":>21} {"срабатывание, мс":>17}')
+    for size in args.sizes:
+        delays = [rng.randint(1, HORIZON) for _ in range(size)]
+        new_delays = [rng.randint(1, HORIZON) for _ in range(size)]
+        for name, scheduler in (('heapq', HeapScheduler()),
+                                ('колесо', TimingWheel())):
+            result = run(scheduler, delays, new_delays)
+            print(f'{size:>9} {name:>10} {result["insert"]:>15.1f} '
+                  f'{result["reschedule"]:>21.1f} {result["expire"]:>17.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Сравнение check_response + parse_status с validate_response.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_validator.py [--sizes 1000 100000]
+"""
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(
+    __file__))))
+
+import homework  # noqa: E402
+
+SIZES = (100, 10_000, 100_000)
+STATUSES = tuple(homework.HOMEWORK_VERDICTS)
+
+
+def make_response(size) -> dict:
+    """Ответ API с size домашними работами."""
+    return {
+        'homeworks': [
+            {
+                'id': number,
+                'homework_name': f'hw{number}.zip',
+                'status': STATUSES[number % len(STATUSES)],
+                'reviewer_comment': '',
+                'date_updated': '2024-06-01T10:00:00Z',
+                'lesson_name': 'Проект спринта',
+            }
+            for number in range(size)
+        ],
+        'current_date': 1717236000,
+    }
+
+
+def two_step(response) -> list:
+    """Текущий путь: проверка ответа и разбор каждой работы."""
+    homework.check_response(response)
+    return [homework.parse_status(item) for item in response['homeworks']]
+
+
+def single_pass(response) -> list:
+    """Проверка за один проход без построения текстов."""
+    return homework.validate_response(response)
+
+
+def single_pass_messages(response) -> list:
+    """Проверка за один проход и построение текстов."""
+    return [record.message
+            for record in homework.validate_response(response)]
+
+
+def bench(func, response, repeat=5) -> float:
+    """Лучшее время одного вызова, мс."""
+    number = max(1, 100_000 // max(1, len(response['homeworks'])))
+    timer = timeit.Timer(lambda: func(response))
+    return min(timer.repeat(repeat=repeat, number=number)) / number * 1000
+
+
+def main() -> None:
+    """Запуск сравнения."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES)
+    args = parser.parse_args()
+    print(f'{"работ":>8} {"2 шага, мс":>12} {"1 проход, мс":>14} '
+          f'{"+ тексты, мс":>14}')
+    for size in args.sizes:
+        response = make_response(size)
+        assert single_pass_messages(response) == two_step(response)
+        print(f'{size:>8} {bench(two_step, response):>12.3f} '
+              f'{bench(single_pass, response):>14.3f} '
+              f'{bench(single_pass_messages, response):>14.3f}')
+
+
+if __name__ == '__main__':
+    main()
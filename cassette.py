@@ -0,0 +1,271 @@
+"""Запись и воспроизведение запросов к API Практикума («кассета»).
+
+Запись: переменная окружения CASSETTE_RECORD=traffic.jsonl.gz, и бот
+сохраняет каждый запрос get_api_answer с ответом, его заголовками
+(ETag, Last-Modified, Content-Encoding и т. п.) и временем.
+Токены и заголовки запроса в кассету не попадают, как и cookie
+из ответа. Записанный ответ 304 воспроизводится как есть, поэтому
+кассета проверяет и условные запросы (poll_cache.py).
+
+Воспроизведение через полный цикл main():
+    python cassette.py traffic.jsonl.gz --speed 60
+
+--speed 1 воспроизводит записанные паузы как есть, 60 ускоряет
+в 60 раз, 0 подаёт ответы без пауз. Сообщения по умолчанию
+не уходят в Telegram, а считаются локально (--live-telegram отключает
+это). По окончании кассеты печатается сводка.
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+import requests  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+
+# Заголовки ответа, которые не записываются.
+SECRET_HEADERS = frozenset({'set-cookie'})
+
+
+class RunFinished(BaseException):
+    """Прогон main() окончен.
+
+    Наследуется от BaseException, чтобы пройти сквозь
+    `except Exception` в цикле main(); main() при этом не учитывает
+    прерванный цикл и останавливает фоновые потоки.
+    """
+
+
+class CassetteEnd(RunFinished):
+    """Кассета закончилась."""
+
+
+def open_cassette(path, mode):
+    """Открытие файла кассеты; .gz сжимается."""
+    if str(path).endswith('.gz'):
+        return gzip.open(path, mode + 't', encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class Recorder:
+    """Запись запросов, проходящих через requests.get."""
+
+    def __init__(self, path, get=None) -> None:
+        """Запись в файл path; get — исходная функция запроса."""
+        self.path = path
+        self.get_original = get or requests.get
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+        self.file = open_cassette(path, 'a')
+
+    def _write(self, entry) -> None:
+        """Дозапись одной записи."""
+        with self.lock:
+            self.file.write(json.dumps(entry, ensure_ascii=False) + '\n')
+            self.file.flush()
+
+    def get(self, url=None, params=None, **kwargs):
+        """Запрос с записью ответа."""
+        entry: dict = {
+            'at': round(time.monotonic() - self.started, 3),
+            'params': params,
+        }
+        started = time.monotonic()
+        try:
+            response = self.get_original(url=url, params=params, **kwargs)
+        except Exception as error:
+            entry['elapsed'] = round(time.monotonic() - started, 3)
+            entry['error'] = repr(error)
+            self._write(entry)
+            raise
+        entry['elapsed'] = round(time.monotonic() - started, 3)
+        entry['status'] = response.status_code
+        entry['headers'] = {
+            name: value
+            for name, value in (getattr(response, 'headers', None)
+                                or {}).items()
+            if name.lower() not in SECRET_HEADERS}
+        entry['body'] = response.text
+        self._write(entry)
+        return response
+
+    def close(self) -> None:
+        """Закрытие файла кассеты."""
+        with self.lock:
+            self.file.close()
+
+
+class ReplayResponse:
+    """Ответ из кассеты с интерфейсом requests.Response."""
+
+    def __init__(self, status_code, text, headers=None) -> None:
+        """Ответ с кодом status_code, телом text и заголовками."""
+        self.status_code = status_code
+        self.text = text
+        self.content = text.encode('utf-8')
+        self.headers = requests.structures.CaseInsensitiveDict(
+            headers or {})
+        self.reason = ''
+
+    def json(self):
+        """Разбор тела ответа."""
+        return json.loads(self.text)
+
+
+class Player:
+    """Подача записанных ответов вместо запросов к API."""
+
+    def __init__(self, path, speed=1.0) -> None:
+        """Воспроизведение файла path с ускорением speed."""
+        with open_cassette(path, 'r') as file:
+            self.entries = [json.loads(line) for line in file
+                            if line.strip()]
+        self.speed = speed
+        self.position = 0
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+
+    def _wait(self, seconds) -> None:
+        """Пауза с учётом ускорения."""
+        if self.speed and seconds > 0:
+            time.sleep(seconds / self.speed)
+
+    def get(self, url=None, params=None, **kwargs):
+        """Следующий записанный ответ."""
+        with self.lock:
+            if self.position >= len(self.entries):
+                raise CassetteEnd(f'Воспроизведено {self.position} ответов')
+            entry = self.entries[self.position]
+            self.position += 1
+        self._wait(entry['at'] - (time.monotonic() - self.started)
+                   * (self.speed or 1))
+        self._wait(entry.get('elapsed', 0))
+        if 'error' in entry:
+            raise requests.ConnectionError(entry['error'])
+        return ReplayResponse(entry['status'], entry['body'],
+                              entry.get('headers'))
+
+
+@contextmanager
+def patched_get(get):
+    """Временная подмена requests.get."""
+    original = requests.get
+    requests.get = get
+    try:
+        yield
+    finally:
+        requests.get = original
+
+
+def start_recording(path) -> Recorder:
+    """Включение записи на всё время работы процесса."""
+    recorder = Recorder(path)
+    requests.get = recorder.get
+    logger.debug(f'Запросы к API записываются в {path}')
+    return recorder
+
+
+class OfflineBot:
+    """Бот, который считает сообщения вместо отправки."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        """Аргументы TeleBot игнорируются."""
+        self.sent = 0
+        self.lock = threading.Lock()
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        """Учёт сообщения."""
+        with self.lock:
+            self.sent += 1
+
+    def edit_message_text(self, text=None, chat_id=None, **kwargs):
+        """Учёт изменения сообщения."""
+        with self.lock:
+            self.sent += 1
+
+
+@contextmanager
+def patched_attributes(target, **values):
+    """Временная замена атрибутов объекта или модуля."""
+    saved = {name: getattr(target, name) for name in values}
+    for name, value in values.items():
+        setattr(target, name, value)
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            setattr(target, name, value)
+
+
+def offline_settings(homework, bot_factory=None) -> dict:
+    """Настройки homework для прогона main() без пауз и без Telegram.
+
+    Паузы между опросами задаёт источник ответов, поэтому
+    RETRY_PERIOD обнуляется; отсутствующие токены заменяются
+    заглушками, чтобы check_tokens не остановил прогон.
+    """
+    values = {
+        'RETRY_PERIOD': 0,
+        'PRACTICUM_TOKEN': homework.PRACTICUM_TOKEN or 'offline',
+        'TELEGRAM_TOKEN': homework.TELEGRAM_TOKEN or 'offline',
+        'TELEGRAM_CHAT_ID': homework.TELEGRAM_CHAT_ID or 'offline',
+    }
+    if bot_factory is not None:
+        values['TeleBot'] = bot_factory
+    return values
+
+
+def run_main(homework) -> None:
+    """main() до окончания прогона (RunFinished)."""
+    try:
+        homework.main()
+    except RunFinished:
+        pass
+
+
+def replay(path, speed=1.0, live_telegram=False) -> dict:
+    """Прогон кассеты через main(); возвращает сводку."""
+    import homework
+
+    player = Player(path, speed)
+    bots: list = []
+
+    def make_bot(*args, **kwargs):
+        bot = OfflineBot()
+        bots.append(bot)
+        return bot
+
+    settings = offline_settings(
+        homework, None if live_telegram else make_bot)
+    started = time.monotonic()
+    with patched_attributes(homework, **settings), \
+            patched_get(player.get):
+        run_main(homework)
+    return {
+        'responses': player.position,
+        'seconds': round(time.monotonic() - started, 3),
+        'messages': sum(bot.sent for bot in bots),
+    }
+
+
+def main() -> None:
+    """Точка входа командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('cassette', help='Файл кассеты.')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='Ускорение; 0 — без пауз.')
+    parser.add_argument('--live-telegram', action='store_true',
+                        help='Отправлять сообщения в настоящий Telegram.')
+    args = parser.parse_args()
+    print(json.dumps(replay(args.cassette, args.speed, args.live_telegram),
+                     ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
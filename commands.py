@@ -0,0 +1,81 @@
+"""Команды /status и /history, отвечающие из кэша статусов.
+
+Команды читают только status_cache.StatusCache, поэтому их поток
+не увеличивает число запросов к API Практикума. Обновления Telegram
+принимаются long polling в отдельном потоке.
+"""
+
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+COMMANDS = ('status', 'history')
+NO_SUBSCRIPTION = 'Этот чат не подписан на уведомления о работах.'
+
+
+def format_stale(age) -> str:
+    """Ответ при отсутствии свежих данных."""
+    if age is None:
+        return 'Данных о работах пока нет, дождитесь следующего опроса.'
+    return (f'Данные устарели: последний успешный опрос был '
+            f'{int(age // 60)} мин назад. Попробуйте позже.')
+
+
+def format_homework(homework, verdicts) -> str:
+    """Строка о статусе одной работы."""
+    status = homework.get('status')
+    verdict = verdicts.get(status, f'Статус: {status}')
+    return f'"{homework.get("homework_name")}": {verdict}'
+
+
+def format_status(state, verdicts) -> str:
+    """Текущие статусы всех известных работ."""
+    if not state.homeworks:
+        return 'С момента запуска бота статусы работ не менялись.'
+    return '\n'.join(format_homework(homework, verdicts)
+                     for homework in state.homeworks.values())
+
+
+def format_history(state, verdicts) -> str:
+    """Последние смены статусов."""
+    if not state.history:
+        return 'Истории смены статусов пока нет.'
+    return '\n'.join(
+        f'{homework.get("date_updated", "")} '
+        f'{format_homework(homework, verdicts)}'
+        for homework in state.history
+    )
+
+
+def answer(cache, chat_tenants, chat_id, command, verdicts) -> str:
+    """Текст ответа на команду command из чата chat_id."""
+    tenant = chat_tenants.get(str(chat_id))
+    if tenant is None:
+        return NO_SUBSCRIPTION
+    state = cache.get(tenant)
+    if state is None:
+        return format_stale(cache.age(tenant))
+    if command == 'history':
+        return format_history(state, verdicts)
+    return format_status(state, verdicts)
+
+
+def start_command_polling(bot, cache, chat_tenants,
+                          verdicts) -> threading.Thread:
+    """Регистрация команд и запуск приёма обновлений в потоке."""
+    @bot.message_handler(commands=list(COMMANDS))
+    def handle_command(message) -> None:
+        command = message.text.split()[0].lstrip('/').split('@')[0]
+        try:
+            bot.reply_to(message, answer(
+                cache, chat_tenants, message.chat.id, command, verdicts))
+        except Exception as error:
+            logger.error(f'Не удалось ответить на /{command}: {error}')
+
+    thread = threading.Thread(
+        target=bot.infinity_polling, kwargs={'skip_pending': True},
+        daemon=True, name='commands'
+    )
+    thread.start()
+    return thread
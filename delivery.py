@@ -0,0 +1,338 @@
+"""Параллельная доставка сообщений в несколько чатов Telegram.
+
+Telegram ограничивает бота примерно 30 сообщениями в секунду в целом
+и одним сообщением в секунду в один чат. Доставка в каждый чат идёт
+в отдельной задаче, ошибка одного чата не влияет на остальные.
+
+Отправки ждут в полосах приоритета: вердикты раньше сообщений
+об ошибках, а те раньше сводок. Полосы ниже вердиктов получают
+не больше своей доли (LANE_SHARES) общего лимита частоты. Внутри
+полосы ключи — тенанты, а без них чаты — обслуживаются по кругу
+с учётом веса (deficit round robin), так что шумный тенант
+не задерживает остальных, а поток доставки не простаивает в ожидании
+лимита одного чата.
+
+deliver() ждёт отправки во все чаты, submit() только ставит её
+в очередь и возвращает Future с ошибками по чатам.
+"""
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import NamedTuple
+
+# Ограничения Telegram, сообщений в секунду.
+GLOBAL_RATE = 30
+CHAT_RATE = 1
+MAX_WORKERS = 8
+
+# Полосы приоритета: меньшее значение отправляется раньше.
+VERDICT = 0
+ALERT = 1
+DIGEST = 2
+LANES = (VERDICT, ALERT, DIGEST)
+LANE_NAMES = {VERDICT: 'verdict', ALERT: 'alert', DIGEST: 'digest'}
+# Доля общего лимита частоты, доступная полосе.
+LANE_SHARES = {ALERT: 0.5, DIGEST: 0.2}
+
+
+class RateLimiter:
+    """Ограничитель частоты по алгоритму «ведро с токенами»."""
+
+    def __init__(self, rate, capacity=None) -> None:
+        """Ограничитель на rate событий в секунду."""
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Занять токен; возвращает время ожидания в секундах."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(
+                self.capacity,
+                self.tokens + (now - self.updated) * self.rate
+            )
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self) -> None:
+        """Дождаться разрешения на одно событие."""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    def wait_time(self) -> float:
+        """Сколько ждать свободного токена, не занимая его."""
+        with self.lock:
+            tokens = min(self.capacity, self.tokens
+                         + (time.monotonic() - self.updated) * self.rate)
+            return 0.0 if tokens >= 1 else (1 - tokens) / self.rate
+
+
+def check_weight(key, weight) -> None:
+    """ValueError, если вес ключа key не больше нуля."""
+    if weight <= 0:
+        raise ValueError(f'Вес {key!r} в очереди отправки должен быть '
+                         f'больше нуля: {weight}')
+
+
+class Batch:
+    """Ошибки отправок одного сообщения во все его чаты."""
+
+    def __init__(self, count) -> None:
+        """Ожидание count отправок; future готов после последней."""
+        self.future: Future = Future()
+        self.failures: dict = {}
+        self.remaining = count
+        self.lock = threading.Lock()
+        if not count:
+            self.future.set_result(self.failures)
+
+    def done(self, chat_id, error=None) -> None:
+        """Отправка в чат chat_id завершена, error — её ошибка."""
+        with self.lock:
+            if error is not None:
+                self.failures[chat_id] = error
+            self.remaining -= 1
+            if self.remaining:
+                return
+        self.future.set_result(self.failures)
+
+
+class Outgoing(NamedTuple):
+    """Отправка в один чат, её сообщение и ключ очереди."""
+
+    chat_id: str
+    text: str
+    send: object
+    batch: Batch
+    key: object
+
+
+class FairLane:
+    """Очереди ключей одной полосы с обходом по кругу с дефицитом.
+
+    За каждый проход ключ получает weight отправок; дробный вес
+    копится между проходами. Из очереди ключа берётся первая
+    отправка, чату которой не нужно ждать своего лимита.
+    """
+
+    def __init__(self) -> None:
+        """Пустая полоса."""
+        self.queues: dict = {}
+        self.deficit: dict = {}
+        self.order: deque = deque()
+        self.size = 0
+
+    def __len__(self) -> int:
+        """Число ожидающих отправок."""
+        return self.size
+
+    def push(self, item) -> None:
+        """Постановка отправки в очередь её ключа."""
+        queue = self.queues.get(item.key)
+        if queue is None:
+            queue = self.queues[item.key] = deque()
+            self.deficit[item.key] = 0.0
+            self.order.append(item.key)
+        queue.append(item)
+        self.size += 1
+
+    def _ready(self, key, wait_time) -> tuple:
+        """Номер первой готовой отправки ключа или (None, сколько ждать)."""
+        min_wait = None
+        for index, item in enumerate(self.queues[key]):
+            wait = wait_time(item.chat_id)
+            if wait <= 0:
+                return index, 0
+            min_wait = wait if min_wait is None else min(min_wait, wait)
+        return None, min_wait
+
+    def pop(self, wait_time, weight) -> tuple:
+        """Следующая отправка: (отправка, 0) или (None, сколько ждать).
+
+        wait_time(chat_id) — сколько чату ждать своего лимита,
+        weight(key) — вес ключа; None вместо ожидания — полоса пуста.
+        """
+        while self.order:
+            min_wait = None
+            for _ in range(len(self.order)):
+                key = self.order[0]
+                index, wait = self._ready(key, wait_time)
+                if index is None:
+                    min_wait = wait if min_wait is None else min(min_wait,
+                                                                 wait)
+                    self.order.rotate(-1)
+                    continue
+                min_wait = 0
+                if self.deficit[key] < 1:
+                    self.deficit[key] += weight(key)
+                    if self.deficit[key] < 1:
+                        self.order.rotate(-1)
+                        continue
+                return self._take(key, index), 0
+            if min_wait != 0:
+                return None, min_wait
+        return None, None
+
+    def _take(self, key, index):
+        """Извлечение отправки ключа, стоящего в начале круга."""
+        self.deficit[key] -= 1
+        self.size -= 1
+        queue = self.queues[key]
+        item = queue[index]
+        del queue[index]
+        if not queue:
+            del self.queues[key], self.deficit[key]
+            self.order.popleft()
+        elif self.deficit[key] < 1:
+            self.order.rotate(-1)
+        return item
+
+
+class ChatDelivery:
+    """Отправка одного сообщения во все чаты подписки сразу."""
+
+    def __init__(self, send, max_workers=MAX_WORKERS,
+                 global_rate=GLOBAL_RATE, chat_rate=CHAT_RATE,
+                 weights=None) -> None:
+        """send(chat_id, text) отправляет сообщение в один чат.
+
+        weights — веса ключей очереди (по умолчанию 1); вес
+        не больше нуля — ValueError.
+        """
+        self.send = send
+        self.max_workers = max_workers
+        self.chat_rate = chat_rate
+        self.weights = dict(weights or {})
+        for key, weight in self.weights.items():
+            check_weight(key, weight)
+        self.global_limiter = RateLimiter(global_rate)
+        self.lane_limiters = {lane: RateLimiter(global_rate * share)
+                              for lane, share in LANE_SHARES.items()}
+        self.chat_limiters: dict = {}
+        self.lanes = {lane: FairLane() for lane in LANES}
+        self.condition = threading.Condition()
+        self.workers: list = []
+        self.stopped = False
+
+    def _chat_limiter(self, chat_id) -> RateLimiter:
+        """Ограничитель частоты для чата; вызывается под condition."""
+        limiter = self.chat_limiters.get(chat_id)
+        if limiter is None:
+            limiter = self.chat_limiters[chat_id] = RateLimiter(
+                self.chat_rate)
+        return limiter
+
+    def _chat_wait(self, chat_id) -> float:
+        """Сколько чату ждать своего лимита."""
+        return self._chat_limiter(chat_id).wait_time()
+
+    def _weight(self, key) -> float:
+        """Вес ключа очереди."""
+        return self.weights.get(key, 1)
+
+    def set_weight(self, key, weight) -> None:
+        """Вес ключа в полосах; больший вес — большая доля отправок.
+
+        Вес не больше нуля — ValueError: такой ключ не получил бы
+        ни одной отправки.
+        """
+        check_weight(key, weight)
+        with self.condition:
+            self.weights[key] = weight
+
+    def _next(self) -> tuple:
+        """Первая готовая отправка по приоритету полос.
+
+        Возвращает (отправка, 0) или (None, сколько ждать); None
+        вместо ожидания — ждать нечего.
+        """
+        waits = []
+        for lane in LANES:
+            if not self.lanes[lane]:
+                continue
+            limiter = self.lane_limiters.get(lane)
+            wait = 0.0 if limiter is None else limiter.wait_time()
+            if wait > 0:
+                waits.append(wait)
+                continue
+            item, wait = self.lanes[lane].pop(self._chat_wait, self._weight)
+            if item is None:
+                waits.append(wait)
+                continue
+            if limiter is not None:
+                limiter.reserve()
+            self._chat_limiter(item.chat_id).reserve()
+            return item, 0
+        return None, min(waits) if waits else None
+
+    def _work(self) -> None:
+        """Цикл потока доставки."""
+        while True:
+            with self.condition:
+                item, wait = self._next()
+                while item is None:
+                    if self.stopped and wait is None:
+                        return
+                    self.condition.wait(wait)
+                    item, wait = self._next()
+            self.global_limiter.acquire()
+            try:
+                item.send(item.chat_id, item.text)
+            except BaseException as error:
+                item.batch.done(item.chat_id, error)
+            else:
+                item.batch.done(item.chat_id)
+
+    def submit(self, chat_ids, text, send=None, priority=VERDICT,
+               key=None) -> Future:
+        """Постановка отправки во все чаты; Future с ошибками по чатам.
+
+        send заменяет функцию отправки для этого сообщения,
+        priority — полоса (VERDICT, ALERT или DIGEST), key — ключ
+        очереди, например тенант; без него у каждого чата свой ключ.
+        """
+        send = send or self.send
+        chat_ids = list(chat_ids)
+        batch = Batch(len(chat_ids))
+        with self.condition:
+            if not self.workers:
+                self.workers = [
+                    threading.Thread(target=self._work, daemon=True,
+                                     name=f'delivery_{number}')
+                    for number in range(self.max_workers)
+                ]
+                for worker in self.workers:
+                    worker.start()
+            for chat_id in chat_ids:
+                self.lanes[priority].push(Outgoing(
+                    chat_id, text, send, batch,
+                    chat_id if key is None else key))
+            self.condition.notify(len(chat_ids))
+        return batch.future
+
+    def deliver(self, chat_ids, text, send=None, priority=VERDICT,
+                key=None) -> dict:
+        """Отправка во все чаты, как submit(); возвращает ошибки по чатам."""
+        return self.submit(chat_ids, text, send, priority, key).result()
+
+    def metrics(self) -> dict:
+        """Ожидающие отправки по полосам."""
+        with self.condition:
+            return {LANE_NAMES[lane]: len(self.lanes[lane]) for lane in LANES}
+
+    def shutdown(self) -> None:
+        """Досылка очередей и остановка потоков доставки."""
+        with self.condition:
+            self.stopped = True
+            self.condition.notify_all()
+        for worker in self.workers:
+            worker.join()
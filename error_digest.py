@@ -0,0 +1,145 @@
+"""Сводка повторяющихся ошибок вместо сообщения о каждой.
+
+Ошибки группируются по отпечатку: класс исключения (или исходного
+исключения, если ошибка обёрнута) и код ответа API. О первой ошибке
+с новым отпечатком сообщается сразу, повторы копятся и раз в period
+секунд уходят одной сводкой. Отпечаток, не встречавшийся весь период,
+забывается, и следующая такая ошибка снова сообщается сразу. Так
+за период уходит не больше одного сообщения на отпечаток и одной сводки.
+
+Повторы из сводки считаются сообщёнными только после commit(), когда
+сводка дошла: если её не удалось отправить, они войдут в следующую.
+Сводку могут подтверждать из потока доставки, поэтому методы
+ErrorDigest защищены блокировкой.
+"""
+
+import threading
+import time
+
+# Период сводки по умолчанию, секунд.
+PERIOD = 60 * 60
+
+
+def fingerprint(error) -> tuple:
+    """Отпечаток ошибки: имя класса и код ответа API."""
+    origin = error.__cause__ or error
+    return type(origin).__name__, getattr(error, 'status', None)
+
+
+class ErrorRecord:
+    """Счётчики одного отпечатка."""
+
+    def __init__(self, message, now) -> None:
+        """Первое появление ошибки с текстом message."""
+        self.message = message
+        self.count = 1
+        self.reported = 1
+        self.first_seen = now
+        self.last_seen = now
+
+
+class ErrorDigest:
+    """Учёт ошибок по отпечаткам и составление сводок."""
+
+    def __init__(self, period=PERIOD) -> None:
+        """Сводка не чаще раза в period секунд."""
+        self.period = period
+        self.records: dict = {}
+        self.last_digest = time.time()
+        # Счётчики отпечатков в последней сводке, ждущей commit().
+        self.pending: dict = {}
+        self.lock = threading.Lock()
+
+    def record(self, error, message, now=None) -> bool:
+        """Учёт ошибки; True, если о ней нужно сообщить сразу."""
+        now = time.time() if now is None else now
+        key = fingerprint(error)
+        with self.lock:
+            record = self.records.get(key)
+            if record is None:
+                self.records[key] = ErrorRecord(message, now)
+                return True
+            record.count += 1
+            record.last_seen = now
+            record.message = message
+            return False
+
+    def snapshot(self) -> dict:
+        """Состояние для передачи новому процессу."""
+        with self.lock:
+            return {
+                'last_digest': self.last_digest,
+                'records': [
+                    [name, status, record.message, record.count,
+                     record.reported, record.first_seen, record.last_seen]
+                    for (name, status), record in self.records.items()],
+            }
+
+    def restore(self, state) -> None:
+        """Состояние из snapshot() прежнего процесса."""
+        records = {}
+        for (name, status, message, count, reported, first_seen,
+             last_seen) in state['records']:
+            record = ErrorRecord(message, first_seen)
+            record.count = count
+            record.reported = reported
+            record.last_seen = last_seen
+            records[name, status] = record
+        with self.lock:
+            self.last_digest = state['last_digest']
+            self.records = records
+            self.pending = {}
+
+    def _forget(self) -> None:
+        """Забыть сообщённые отпечатки, не встречавшиеся весь период."""
+        self.records = {
+            key: record for key, record in self.records.items()
+            if self.last_digest - record.last_seen < self.period
+            or record.count > record.reported
+        }
+
+    def flush(self, now=None) -> str:
+        """Текст сводки, если период истёк и есть новые повторы.
+
+        После отправки сводки нужно вызвать commit().
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            if now - self.last_digest < self.period:
+                return ''
+            self.last_digest = now
+            self.pending = {}
+            lines = []
+            for (name, status), record in self.records.items():
+                repeats = record.count - record.reported
+                if not repeats:
+                    continue
+                self.pending[name, status] = record.count
+                code = f', код {status}' if status is not None else ''
+                lines.append(
+                    f'{name}{code}: повторов {repeats}, '
+                    f'всего {record.count} '
+                    f'(первая {format_time(record.first_seen)}, '
+                    f'последняя {format_time(record.last_seen)})\n'
+                    f'{record.message}'
+                )
+            self._forget()
+        if not lines:
+            return ''
+        return (f'Повторяющиеся ошибки за {int(self.period // 60)} мин:\n'
+                + '\n'.join(lines))
+
+    def commit(self) -> None:
+        """Сводка из последнего flush() отправлена."""
+        with self.lock:
+            for key, count in self.pending.items():
+                record = self.records.get(key)
+                if record is not None:
+                    record.reported = max(record.reported, count)
+            self.pending = {}
+            self._forget()
+
+
+def format_time(timestamp) -> str:
+    """Время в журнальном формате."""
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))
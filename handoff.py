@@ -0,0 +1,191 @@
+"""Передача состояния новому процессу при перезапуске без простоя.
+
+Включается переменной HANDOFF_FILE (путь к снимку состояния).
+Работающий процесс держит рядом с ним метку <HANDOFF_FILE>.active
+со своим pid.
+
+Остановка старого процесса по SIGTERM:
+    1. готовность (/readyz) снимается, новые циклы опроса
+       не начинаются, текущий доводится до конца;
+    2. очереди отправки досылаются;
+    3. курсоры опроса и состояние подавления повторов записываются
+       в снимок с pid процесса (атомарно, через временный файл),
+       метка удаляется. Если метку уже занял другой процесс
+       (он не дождался снимка и стартовал с нуля), ни снимок,
+       ни метка не трогаются: состояние устарело.
+
+Запуск нового процесса: пока есть метка, а снимка от её владельца
+нет, процесс ждёт не дольше wait секунд (старый ещё досылает)
+и на это время снимает готовность, затем забирает снимок (файл
+удаляется) и продолжает опрос с сохранённых курсоров: запросы
+с прежним from_date не теряют смен статусов и не повторяют уже
+отправленные. Снимок не от владельца метки устарел и отбрасывается.
+Без снимка процесс стартует с нуля; метка, оставшаяся после аварийной
+остановки, задерживает запуск на wait секунд.
+"""
+
+import json
+import logging
+import os
+import signal
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+# Сколько секунд новый процесс ждёт снимок от старого.
+WAIT = 60
+# Период проверки появления снимка.
+POLL_INTERVAL = 0.5
+
+
+class HandoffRequested(BaseException):
+    """Сигнал остановки пришёл во время ожидания между опросами.
+
+    Наследует BaseException, как KeyboardInterrupt, чтобы его
+    не перехватывали обработчики ошибок цикла.
+    """
+
+
+class Handoff:
+    """Снимок состояния и остановка по сигналу между циклами опроса."""
+
+    def __init__(self, path=None, wait=WAIT) -> None:
+        """Передача через файл path; без path только остановка."""
+        self.path = path
+        self.marker = f'{path}.active' if path else None
+        self.wait = wait
+        self.stopping = threading.Event()
+        self.idle = False
+        self.health = None
+
+    def install(self, health=None) -> None:
+        """Обработка SIGTERM; health — состояние проверок готовности.
+
+        Без path обработчик не ставится.
+        """
+        self.health = health
+        if not self.path:
+            return
+        try:
+            signal.signal(signal.SIGTERM, self._handle)
+        except ValueError:
+            # Сигналы принимает только главный поток.
+            logger.debug('SIGTERM недоступен: цикл опроса не в главном '
+                         'потоке')
+
+    def _handle(self, signum, frame) -> None:
+        """Запрос остановки; во время ожидания прерывает его."""
+        logger.info('Получен сигнал остановки, завершаю цикл опроса')
+        self.request_stop()
+        if self.idle:
+            raise HandoffRequested()
+
+    def request_stop(self) -> None:
+        """Остановка после текущего цикла."""
+        self.stopping.set()
+        if self.health is not None:
+            self.health.ready = False
+
+    @contextmanager
+    def sleeping(self):
+        """Ожидание между циклами, которое прерывает остановка."""
+        if self.stopping.is_set():
+            raise HandoffRequested()
+        self.idle = True
+        try:
+            yield
+        finally:
+            self.idle = False
+
+    def _owner(self):
+        """Номер процесса владельца метки строкой; None — метки нет."""
+        try:
+            with open(self.marker, encoding='utf-8') as file:
+                return file.read().strip()
+        except FileNotFoundError:
+            return None
+
+    def _read(self):
+        """Снимок из файла; None, если файла нет."""
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as error:
+            logger.error(f'Не удалось прочитать снимок {self.path}: {error}')
+            return {}
+
+    def _handed_over(self, snapshot) -> bool:
+        """Можно ли стартовать: метки нет или снимок от её владельца."""
+        owner = self._owner()
+        return owner is None or (snapshot is not None
+                                 and snapshot.get('pid') == owner)
+
+    def acquire(self, now=time.monotonic, sleep=time.sleep):
+        """Состояние из снимка старого процесса или None.
+
+        Снимок удаляется, а метка работающего процесса ставится заново.
+        Пока снимок ждут, состояние health не готово.
+        """
+        if not self.path:
+            return None
+        if self.health is not None:
+            self.health.ready = False
+        deadline = now() + self.wait
+        snapshot = self._read()
+        while not self._handed_over(snapshot) and now() < deadline:
+            sleep(POLL_INTERVAL)
+            snapshot = self._read()
+        if not self._handed_over(snapshot):
+            if snapshot is not None:
+                logger.warning(f'Снимок {self.path} не от владельца метки '
+                               'и устарел: он отброшен')
+            logger.warning(f'Не дождался снимка {self.path}: '
+                           'запуск без сохранённого состояния')
+            snapshot = None
+        self._discard()
+        state = None
+        if snapshot is not None and snapshot.get(
+                'version') == SNAPSHOT_VERSION:
+            state = snapshot.get('state')
+            logger.info(f'Состояние принято из снимка от '
+                        f'{time.ctime(snapshot.get("saved_at", 0))}')
+        elif snapshot is not None:
+            logger.error(f'Неизвестная версия снимка {self.path}')
+        with open(self.marker, 'w', encoding='utf-8') as file:
+            file.write(str(os.getpid()))
+        if self.health is not None:
+            self.health.ready = not self.stopping.is_set()
+        return state
+
+    def _discard(self) -> None:
+        """Удаление прочитанного или устаревшего снимка."""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def release(self, state) -> None:
+        """Запись снимка state и снятие своей метки."""
+        if not self.path:
+            return
+        owner = self._owner()
+        if owner is not None and owner != str(os.getpid()):
+            logger.warning(f'Метку {self.marker} занял процесс {owner}: '
+                           'состояние устарело и не сохраняется')
+            return
+        snapshot = {'version': SNAPSHOT_VERSION, 'saved_at': time.time(),
+                    'pid': str(os.getpid()), 'state': state}
+        temporary = f'{self.path}.tmp'
+        with open(temporary, 'w', encoding='utf-8') as file:
+            json.dump(snapshot, file, ensure_ascii=False)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.path)
+        if owner is not None:
+            os.remove(self.marker)
+        logger.info(f'Состояние сохранено в {self.path}')
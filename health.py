@@ -0,0 +1,91 @@
+"""HTTP-проверки живости и готовности для оркестратора.
+
+Включается переменной HEALTH_PORT. Адреса:
+    /healthz — живость: 200, пока процесс отвечает;
+    /readyz  — готовность: 200, пока состояние отмечено готовым,
+               иначе 503. Сервер запускается после check_tokens
+               и создания бота, до этого порт закрыт.
+Оба ответа содержат в JSON возраст последнего успешного опроса API
+по каждому тенанту и метрики из sources. Цикл опроса только
+записывает время в словарь, всё остальное считается в потоке
+сервера при запросе.
+"""
+
+import json
+import logging
+import threading
+import time
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+
+class HealthState:
+    """Готовность и время последних успешных опросов."""
+
+    def __init__(self) -> None:
+        """Состояние до инициализации бота."""
+        self.started = time.monotonic()
+        self.ready = False
+        self.last_success: dict = {}
+        # Источники метрик: имя -> функция, возвращающая словарь.
+        self.sources: dict = {}
+        # Сервер проверок, если он запущен.
+        self.server = None
+
+    def polled(self, tenant) -> None:
+        """Учёт успешного опроса API тенантом tenant."""
+        self.last_success[tenant] = time.monotonic()
+
+    def report(self) -> dict:
+        """Сводка для ответа сервера."""
+        now = time.monotonic()
+        return {
+            'ready': self.ready,
+            'uptime': round(now - self.started, 1),
+            'tenants': {
+                tenant: {'last_success_age': round(now - polled, 1)}
+                for tenant, polled in list(self.last_success.items())
+            },
+            **{name: source() for name, source in self.sources.items()},
+        }
+
+
+class HealthHandler(BaseHTTPRequestHandler):
+    """Ответы /healthz и /readyz."""
+
+    state: HealthState
+
+    def do_GET(self) -> None:
+        """Ответ на проверку."""
+        path = self.path.split('?', 1)[0]
+        report = self.state.report()
+        if path == '/healthz':
+            status = HTTPStatus.OK
+        elif path == '/readyz':
+            status = (HTTPStatus.OK if report['ready']
+                      else HTTPStatus.SERVICE_UNAVAILABLE)
+        else:
+            status = HTTPStatus.NOT_FOUND
+            report = {'detail': 'Not found'}
+        body = json.dumps(report, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        """Журнал запросов отключён."""
+
+
+def serve(state, port, host='0.0.0.0') -> ThreadingHTTPServer:
+    """Запуск сервера проверок в фоновом потоке."""
+    handler = type('Handler', (HealthHandler,), {'state': state})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True,
+                     name='health').start()
+    logger.debug(f'Проверки живости доступны на порту {port}')
+    return server
@@ -1,16 +1,41 @@
 """Бот для Telegram, проверяющий статус домашних заданий."""
 
+import asyncio
+import json
 import logging
 import os
 import requests  # type: ignore
+import signal
 import sys
 import time
+from functools import partial
 from http import HTTPStatus  # https://docs.python.org/3/library/http.html
+from typing import NamedTuple, Optional
 
 from dotenv import load_dotenv
 from telebot import TeleBot  # type: ignore
 from telebot.apihelper import ApiException  # type: ignore
 
+import cassette
+import commands
+import health
+import sinks
+import tenants
+import tracing
+from adaptive_limit import AdaptiveLimit
+from async_delivery import AsyncDelivery
+from delivery import ALERT, DIGEST, GLOBAL_RATE, ChatDelivery
+from error_digest import ErrorDigest
+from handoff import Handoff, HandoffRequested
+from latency_slo import OVERALL, SLOTracker
+from message_store import MessageStore
+from pipeline import Pipeline
+from poll_cache import PollCache
+from status_cache import StatusCache
+from timing_wheel import TimingWheel
+from token_pool import BotPool, get_retry_after
+from verdict_templates import VerdictTemplates
+
 # Настройки времени опросов.
 DURATION_IN_HOURS = 0
 DURATION_IN_MINUTES = 10
@@ -22,16 +47,103 @@ load_dotenv()
 PRACTICUM_TOKEN = os.getenv('PRACTICUM_TOKEN')
 TELEGRAM_TOKEN = os.getenv('TELEGRAM_TOKEN')
 TELEGRAM_CHAT_ID = os.getenv('TELEGRAM_CHAT_ID')
+# Токены дополнительных ботов через запятую для пула отправки.
+TELEGRAM_EXTRA_TOKENS = [
+    token.strip()
+    for token in os.getenv('TELEGRAM_EXTRA_TOKENS', '').split(',')
+    if token.strip()
+]
+# Файл для записи истории статусов (JSONL), используется analytics.py.
+HISTORY_FILE = os.getenv('HISTORY_FILE')
+# Файл настроек дополнительных приёмников уведомлений, см. sinks.py.
+SINKS_CONFIG = os.getenv('SINKS_CONFIG')
+# Дополнительные чаты через запятую, получающие вердикты вместе
+# с TELEGRAM_CHAT_ID.
+SUBSCRIBED_CHAT_IDS = tenants.parse_chat_ids(
+    os.getenv('SUBSCRIBED_CHAT_IDS'))
+# Режим одного сообщения на работу, обновляемого при смене статуса.
+EDIT_IN_PLACE = os.getenv('EDIT_IN_PLACE', '').lower() in ('1', 'true')
+# Файл для хранения идентификаторов сообщений в режиме EDIT_IN_PLACE.
+EDIT_STATE_FILE = os.getenv('EDIT_STATE_FILE')
+# Ошибки Bot API, после которых сообщение не изменить, а можно только
+# отправить заново.
+EDIT_GONE_ERRORS = ('message to edit not found', "message can't be edited")
+# Файл для записи запросов к API, см. cassette.py.
+CASSETTE_RECORD = os.getenv('CASSETTE_RECORD')
+# Файл настроек тенантов, см. tenants.py.
+TENANTS_CONFIG = os.getenv('TENANTS_CONFIG')
+# Имя тенанта в режиме одного токена PRACTICUM_TOKEN.
+DEFAULT_TENANT = 'default'
+# Команды /status и /history, см. commands.py.
+BOT_COMMANDS = os.getenv('BOT_COMMANDS', '').lower() in ('1', 'true')
+
+# Конвейер с ограниченными очередями между опросом, разбором
+# и доставкой: политика переполнения block, coalesce или spill,
+# см. pipeline.py. Без неё вердикты отправляются прямо из цикла опроса.
+# Сообщения конвейера уходят через ту же рассылку с её ограничениями;
+# с приёмниками SINKS_CONFIG конвейер не используется.
+PIPELINE_POLICY = os.getenv('PIPELINE_POLICY')
+PIPELINE_QUEUE_SIZE = int(os.getenv('PIPELINE_QUEUE_SIZE', '100'))
+# Каталог файлов переполнения для политики spill.
+PIPELINE_SPILL_DIR = os.getenv('PIPELINE_SPILL_DIR')
+# Порт HTTP-проверок живости и готовности, см. health.py.
+HEALTH_PORT = os.getenv('HEALTH_PORT')
+# Период сводки повторяющихся ошибок, см. error_digest.py.
+ERROR_DIGEST_PERIOD = 60 * 60
+
+# Выгрузка трасс: файл или адрес коллектора OTLP/HTTP, см. tracing.py.
+TRACES_EXPORT = os.getenv('TRACES_EXPORT')
+# Доля работ, для которых записывается трасса.
+TRACES_SAMPLE_RATE = float(os.getenv('TRACES_SAMPLE_RATE', '1'))
+# Рассылка по нескольким чатам через асинхронный клиент Bot API
+# с пулом соединений, см. async_delivery.py.
+ASYNC_DELIVERY = os.getenv('ASYNC_DELIVERY', '').lower() in ('1', 'true')
+# Сколько раз асинхронный клиент пробует отправить сообщение,
+# если Telegram отвечает 429.
+ASYNC_SEND_ATTEMPTS = 3
+# Цель по задержке уведомления (от смены статуса до отправки)
+# для p95, секунды; без неё задержка только измеряется.
+LATENCY_SLO = (float(os.getenv('LATENCY_SLO'))
+               if os.getenv('LATENCY_SLO') else None)
+# Снимок состояния для перезапуска без простоя, см. handoff.py.
+HANDOFF_FILE = os.getenv('HANDOFF_FILE')
+# Сколько секунд при остановке досылаются очереди отправки.
+HANDOFF_DRAIN_TIMEOUT = 20
+# Точность сроков опроса тенантов и их разброс, секунды.
+POLL_TICK = 1
+POLL_JITTER = RETRY_PERIOD // 20
+
+# Самонастраивающиеся пределы одновременных запросов к API
+# Практикума (тенанты, нагрузочный прогон) и к Telegram (потоки
+# доставки и асинхронный клиент), см. adaptive_limit.py.
+API_LIMIT = AdaptiveLimit(initial=4, max_limit=32)
+SEND_LIMIT = AdaptiveLimit(initial=8, max_limit=32)
+# Условные запросы и пропуск неизменных ответов API, см. poll_cache.py.
+POLL_CACHE = PollCache()
+
+# Сколько секунд кэш статусов для команд считается свежим.
+STATUS_CACHE_TTL = 3 * RETRY_PERIOD
 
 # Настройки API.
 ENDPOINT = 'https://practicum.yandex.ru/api/user_api/homework_statuses/'
 HEADERS = {'Authorization': f'OAuth {PRACTICUM_TOKEN}'}
+# Таймауты соединения и чтения ответа API, секунды: зависший
+# запрос не должен останавливать опрос.
+API_TIMEOUT = (5, 30)
 HOMEWORK_VERDICTS = {
     'approved': 'Работа проверена: ревьюеру всё понравилось. Ура!',
     'reviewing': 'Работа взята на проверку ревьюером.',
     'rejected': 'Работа проверена: у ревьюера есть замечания.'
 }
 
+# Канонические объекты статусов: одинаковые статусы в записях
+# ссылаются на одну строку.
+STATUS_KEYS = {status: status for status in HOMEWORK_VERDICTS}
+# Шаблоны уведомлений по языкам, см. verdict_templates.py.
+TEMPLATES = VerdictTemplates(HOMEWORK_VERDICTS)
+# Части шаблонов языка по умолчанию по статусам.
+DEFAULT_PARTS = TEMPLATES.parts[TEMPLATES.default_locale]
+
 # Настройки логов.
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.DEBUG)
@@ -51,6 +163,15 @@ class NoSendMessageError(Exception):
     """Ошибка, о которой не удаётся отправить сообщение."""
 
 
+class APIStatusError(CanSendMessageError):
+    """API ответил кодом, отличным от 200."""
+
+    def __init__(self, message, status) -> None:
+        """Ошибка с кодом ответа status."""
+        super().__init__(message)
+        self.status = status
+
+
 def check_tokens() -> None:
     """Проверка наличия необходимых переменных окружения."""
     tokens: dict = {
@@ -72,8 +193,40 @@ def check_tokens() -> None:
 
 def send_message(bot, message) -> None:
     """Отправка сообщения."""
+    send_to_chat(bot, TELEGRAM_CHAT_ID, message)
+
+
+def log_failures(future) -> None:
+    """Журнал ошибок отправки, завершившейся в фоне."""
+    if future.cancelled():
+        return
+    for chat_id, error in future.result().items():
+        logger.error(f'Не удалось отправить сообщение в чат {chat_id}: '
+                     f'{error}')
+
+
+def send_operator(bot, delivery, message, priority=ALERT):
+    """Сообщение в TELEGRAM_CHAT_ID через полосу priority доставки.
+
+    С delivery сообщение ставится в очередь без ожидания: возвращается
+    Future с ошибками по чатам, ошибки попадают в журнал. Без delivery
+    отправляется напрямую, возвращается None.
+    """
+    if delivery is None:
+        send_message(bot, message)
+        return None
+    future = delivery.submit(
+        [TELEGRAM_CHAT_ID], message,
+        lambda chat_id, text: send_message(bot, text), priority=priority)
+    future.add_done_callback(log_failures)
+    return future
+
+
+def send_to_chat(bot, chat_id, message):
+    """Отправка сообщения в указанный чат."""
     try:
-        bot.send_message(chat_id=TELEGRAM_CHAT_ID, text=message)
+        with SEND_LIMIT.slot():
+            sent = bot.send_message(chat_id=chat_id, text=message)
     except ApiException as error:
         # Тесты не проходят, если перехватывать в другом месте.
         logger.exception(
@@ -85,18 +238,99 @@ def send_message(bot, message) -> None:
             f'Не удалось отправить сообщение. Ошибка: {error}') from error
     else:
         logger.debug(f'Бот отправил сообщение "{message}"')
+        return sent
+
+
+async def send_to_chat_async(client, chat_id, message):
+    """Отправка сообщения в чат асинхронным клиентом Bot API.
+
+    После ответа 429 на паузу retry_after встают все отправки
+    клиента, а сообщение отправляется снова.
+    """
+    for attempt in range(1, ASYNC_SEND_ATTEMPTS + 1):
+        delay = client.backoff_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        try:
+            async with SEND_LIMIT.async_slot():
+                sent = await client.send_message(chat_id, message)
+        except Exception as error:
+            retry_after = get_retry_after(error)
+            if retry_after is not None and attempt < ASYNC_SEND_ATTEMPTS:
+                client.backoff_until = max(
+                    client.backoff_until, time.monotonic() + retry_after)
+                logger.warning(f'Telegram ответил 429, пауза отправки '
+                               f'{retry_after} с')
+                continue
+            logger.error(f'Не удалось отправить сообщение в чат {chat_id}. '
+                         f'Ошибка: {error}')
+            raise NoSendMessageError(
+                f'Не удалось отправить сообщение. Ошибка: {error}') from error
+        logger.debug(f'Бот отправил сообщение "{message}"')
+        return sent
+
+
+def send_or_edit(bot, store, key, chat_id, message) -> None:
+    """Обновление сообщения о работе или отправка нового.
+
+    Новое сообщение отправляется, только если прежнее изменить нельзя
+    (удалено, слишком старое, отправлено другим ботом). Прочие ошибки
+    (429, сбой сети) выбрасываются как NoSendMessageError: новое
+    сообщение продублировало бы вердикт.
+    """
+    previous = store.get(chat_id, key)
+    if previous is not None:
+        if previous['text'] == message:
+            return
+        try:
+            with SEND_LIMIT.slot():
+                bot.edit_message_text(
+                    text=message, chat_id=chat_id,
+                    message_id=previous['message_id']
+                )
+        except Exception as error:
+            description = str(error).lower()
+            if not any(reason in description
+                       for reason in EDIT_GONE_ERRORS):
+                raise NoSendMessageError(
+                    f'Не удалось изменить сообщение. Ошибка: {error}'
+                ) from error
+            logger.warning(
+                f'Не удалось изменить сообщение {previous["message_id"]} '
+                f'в чате {chat_id}: {error}. Отправляю новое.'
+            )
+        else:
+            store.put(chat_id, key, previous['message_id'], message)
+            logger.debug(f'Бот изменил сообщение на "{message}"')
+            return
+    sent = send_to_chat(bot, chat_id, message)
+    message_id = getattr(sent, 'message_id', None)
+    if message_id is not None:
+        store.put(chat_id, key, message_id, message)
 
 
 def get_api_answer(timestamp) -> dict:
     """Получить ответ от API."""
+    return request_homeworks(timestamp, HEADERS)
+
+
+@tracing.stage('get_api_answer', first=True)
+def request_homeworks(timestamp, headers) -> dict:
+    """Получить ответ от API с заголовками конкретного тенанта."""
     params = {'from_date': timestamp}
     message = ''
-    try:
-        response = requests.get(url=ENDPOINT, headers=HEADERS, params=params)
-    except Exception as error:
-        message = (f'Сбой в работе программы: Ошибка {error}')
-    else:
+    with API_LIMIT.slot():
+        try:
+            response = requests.get(
+                url=ENDPOINT,
+                headers=POLL_CACHE.request_headers(headers, params),
+                params=params, timeout=API_TIMEOUT)
+        except Exception as error:
+            raise CanSendMessageError(
+                f'Сбой в работе программы: Ошибка {error}') from error
         status = response.status_code
+        if status == HTTPStatus.NOT_MODIFIED:
+            return POLL_CACHE.cached(headers, params)
         if status == HTTPStatus.BAD_REQUEST:
             message = ('Сбой в работе программы: Код ответа API: 400\n'
                        'Неверный формат даты')
@@ -108,11 +342,12 @@ def get_api_answer(timestamp) -> dict:
                        'недоступен. Код ответа API: 404')
         elif status != HTTPStatus.OK:
             message = (f'Сбой в работе программы: Код ответа API: {status}')
-    if message:
-        raise CanSendMessageError(message)
-    return response.json()
+        if message:
+            raise APIStatusError(message, status)
+    return POLL_CACHE.decode(headers, params, response)
 
 
+@tracing.stage('check_response')
 def check_response(response) -> None:
     """Проверка полученного ответа от API."""
     message = ''
@@ -146,14 +381,686 @@ def parse_status(homework) -> str:
     verdict = HOMEWORK_VERDICTS.get(status)
     if not verdict:
         raise CanSendMessageError(f'Неизвестный статус работы: {status}')
-    return f'Изменился статус проверки работы "{homework_name}". {verdict}'
+    return TEMPLATES.render(status, homework_name)
+
+
+class HomeworkRecord(NamedTuple):
+    """Проверенная запись о домашней работе."""
+
+    id: Optional[int]
+    name: str
+    status: str
+    date_updated: Optional[str]
+
+    @property
+    def verdict(self) -> str:
+        """Вердикт по статусу."""
+        return HOMEWORK_VERDICTS[self.status]
+
+    @property
+    def message(self) -> str:
+        """Текст уведомления, как у parse_status."""
+        return str(self.name).join(DEFAULT_PARTS[self.status])
+
+
+@tracing.stage('check_response')
+def validate_response(response) -> list:
+    """Проверка ответа API и всех работ в нём за один проход.
+
+    Ошибки те же, что у check_response и parse_status, в том же порядке
+    проверок. Возвращает список HomeworkRecord.
+    """
+    if not isinstance(response, dict):
+        raise TypeError(f'Неожиданный формат ответа: {type(response)}\n'
+                        f'Сообщение: {response}')
+    if 'homeworks' not in response:
+        raise CanSendMessageError(
+            'Ответ не содержит сведения о домашних заданиях')
+    if 'current_date' not in response:
+        raise CanSendMessageError('Ответ не содержит сведения о текущей дате')
+    homeworks = response['homeworks']
+    if not isinstance(homeworks, list):
+        raise TypeError('Неверный тип данных homeworks: '
+                        f'{type(homeworks)}\n Сообщение: {homeworks}')
+    status_keys = STATUS_KEYS
+    # tuple.__new__ заметно быстрее конструктора NamedTuple.
+    make_record = tuple.__new__
+    records: list = []
+    append = records.append
+    for homework in homeworks:
+        try:
+            status = homework['status']
+            name = homework['homework_name']
+        except (KeyError, TypeError):
+            # Медленный путь выбрасывает ту же ошибку, что и раньше.
+            parse_status(homework)
+            raise
+        status_key = status_keys.get(status)
+        if status_key is None:
+            raise CanSendMessageError(f'Неизвестный статус работы: {status}')
+        append(make_record(HomeworkRecord, (
+            homework.get('id'), name, status_key,
+            homework.get('date_updated'))))
+    return records
+
+
+def record_history(homeworks) -> None:
+    """Запись полученных статусов в историю для аналитики."""
+    if not HISTORY_FILE or not homeworks:
+        return
+    try:
+        with open(HISTORY_FILE, 'a', encoding='utf-8') as file:
+            for homework in homeworks:
+                file.write(json.dumps(homework, ensure_ascii=False) + '\n')
+    except OSError as error:
+        logger.error(f'Не удалось записать историю статусов: {error}')
+
+
+def load_sinks(bot):
+    """Подключение приёмников уведомлений из SINKS_CONFIG."""
+    if not SINKS_CONFIG:
+        return None
+    try:
+        return sinks.load_fan_out(SINKS_CONFIG, bot, TELEGRAM_CHAT_ID)
+    except (OSError, ValueError, KeyError) as error:
+        logger.error(
+            f'Не удалось загрузить приёмники из {SINKS_CONFIG}: {error}\n'
+            'Сообщения будут отправляться только в Telegram.'
+        )
+        return None
+
+
+def broadcast(delivery, chat_ids, message, send=None) -> None:
+    """Параллельная отправка сообщения во все чаты подписки.
+
+    Ошибка одного чата только логируется; NoSendMessageError
+    выбрасывается, если сообщение не дошло ни в один чат.
+    """
+    broadcast_messages(delivery, [(chat_ids, message)], send)
+
+
+def broadcast_messages(delivery, messages, send=None, key=None) -> None:
+    """Отправка своего текста каждой группе чатов, как у broadcast.
+
+    messages — пары (список чатов, текст), key — ключ очереди
+    доставки (тенант).
+    """
+    wait_messages(submit_messages(delivery, messages, send, key))
+
+
+def submit_messages(delivery, messages, send=None, key=None) -> list:
+    """Постановка сообщений broadcast_messages() без ожидания.
+
+    Возвращает пары (число чатов, Future) для wait_messages().
+    """
+    return [(len(chat_ids), delivery.submit(chat_ids, message, send,
+                                            key=key))
+            for chat_ids, message in messages]
+
+
+def wait_messages(pending) -> None:
+    """Ожидание отправок из submit_messages() с ошибками, как у broadcast."""
+    failures: dict = {}
+    chat_count = 0
+    for count, future in pending:
+        failures.update(future.result())
+        chat_count += count
+    for chat_id, error in failures.items():
+        logger.error(f'Не удалось отправить сообщение в чат {chat_id}: '
+                     f'{error}')
+    if failures and len(failures) == chat_count:
+        raise NoSendMessageError(
+            'Не удалось отправить сообщение ни в один чат подписки.')
+
+
+def homework_key(homework):
+    """Ключ работы для режима редактирования сообщений."""
+    return homework.get('id', homework.get('homework_name'))
+
+
+def homework_messages(homework) -> list:
+    """Сообщения о работе для всех чатов: пары (чат, текст)."""
+    message = parse_status(homework)
+    return [(chat_id, message)
+            for chat_id in [TELEGRAM_CHAT_ID, *SUBSCRIBED_CHAT_IDS]]
+
+
+def pipeline_send(services, chat_id, message, key=None) -> None:
+    """Отправка сообщения конвейера через общую рассылку.
+
+    Действуют те же ограничения частоты, полоса вердиктов и режим
+    EDIT_IN_PLACE для работы key, что и без конвейера.
+    """
+    failures = services.delivery.submit(
+        [chat_id], message, services.sender(key)).result()
+    if failures:
+        raise failures[chat_id]
+
+
+def load_pipeline(services):
+    """Конвейер доставки, если задана PIPELINE_POLICY.
+
+    Приёмники SINKS_CONFIG сами держат очереди и повторяют отправку,
+    поэтому вместе с ними конвейер не запускается.
+    """
+    if not PIPELINE_POLICY:
+        return None
+    if services.fan_out is not None:
+        logger.warning('PIPELINE_POLICY не действует вместе '
+                       'с SINKS_CONFIG: у приёмников свои очереди')
+        return None
+    try:
+        return Pipeline(homework_messages, partial(pipeline_send, services),
+                        size=PIPELINE_QUEUE_SIZE, policy=PIPELINE_POLICY,
+                        spill_dir=PIPELINE_SPILL_DIR,
+                        on_sent=services.pipeline_sent)
+    except ValueError as error:
+        logger.error(f'Конвейер не запущен: {error}\n'
+                     'Вердикты будут отправляться из цикла опроса.')
+        return None
+
+
+def load_message_store():
+    """Хранилище сообщений, если включён режим EDIT_IN_PLACE."""
+    if not EDIT_IN_PLACE:
+        return None
+    return MessageStore(EDIT_STATE_FILE)
+
+
+def make_bot_pool(bot):
+    """Объединение основного бота с дополнительными в пул."""
+    if not TELEGRAM_EXTRA_TOKENS:
+        return bot
+    extra_bots = [TeleBot(token=token) for token in TELEGRAM_EXTRA_TOKENS]
+    logger.debug(f'Пул отправки из {len(extra_bots) + 1} ботов')
+    return BotPool([bot, *extra_bots])
+
+
+def make_delivery(bot, bot_count, weights=None):
+    """Рассылка по чатам: асинхронная или в пуле потоков.
+
+    weights — веса тенантов в очереди отправки.
+    """
+    if ASYNC_DELIVERY and bot_count == 1:
+        if any(weight != 1 for weight in (weights or {}).values()):
+            logger.warning('Веса тенантов не действуют с ASYNC_DELIVERY: '
+                           'отправки идут одновременно, без очереди')
+        return AsyncDelivery(TELEGRAM_TOKEN, send_to_chat_async)
+    if ASYNC_DELIVERY:
+        logger.warning('ASYNC_DELIVERY не действует с пулом ботов: '
+                       'рассылка идёт в пуле потоков')
+    return ChatDelivery(partial(send_to_chat, bot),
+                        global_rate=GLOBAL_RATE * bot_count,
+                        weights=weights)
+
+
+class Services:
+    """Компоненты доставки и необязательные режимы работы бота."""
+
+    def __init__(self, bot, tenant_list=None) -> None:
+        """Компоненты для бота или пула ботов bot."""
+        self.bot = bot
+        bot_count = len(bot) if isinstance(bot, BotPool) else 1
+        self.delivery = make_delivery(
+            bot, bot_count,
+            {tenant.name: tenant.weight for tenant in tenant_list or []})
+        self.store = load_message_store()
+        self.fan_out = None if tenant_list else load_sinks(bot)
+        self.latency = SLOTracker(LATENCY_SLO)
+        self.pipeline = None if tenant_list else load_pipeline(self)
+        self.tracer = tracing.load_tracer(TRACES_EXPORT, TRACES_SAMPLE_RATE)
+        self.health = start_health()
+        self.health.sources['latency'] = self.latency.metrics
+        if self.pipeline is not None:
+            self.health.sources['pipeline'] = self.pipeline.metrics
+        self.cache = None
+        self.chat_tenants = None
+        self.closed = False
+        if BOT_COMMANDS:
+            self.cache = StatusCache(ttl=STATUS_CACHE_TTL)
+            self.chat_tenants = start_commands(bot, self.cache, tenant_list)
+
+    def pipeline_sent(self, message) -> None:
+        """Учёт задержки сообщения, отправленного конвейером."""
+        record_latency(self, DEFAULT_TENANT, message.get('updated'))
+
+    def sender(self, key):
+        """Функция отправки для работы key или None для обычной."""
+        if self.store is None or key is None:
+            return None
+        return partial(send_or_edit, self.bot, self.store, key)
+
+    def close(self, timeout=None) -> None:
+        """Досылка очередей отправки и остановка фоновых потоков.
+
+        Повторный вызов ничего не делает.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        if self.pipeline is not None:
+            if not self.pipeline.drain(timeout):
+                logger.warning('Очереди конвейера не досланы до остановки: '
+                               f'{self.pipeline.metrics()}')
+            self.pipeline.stop()
+        self.delivery.shutdown()
+        self.tracer.shutdown()
+        if self.health.server is not None:
+            self.health.server.shutdown()
+            self.health.server.server_close()
+
+
+def start_health() -> health.HealthState:
+    """Состояние проверок; сервер запускается, если задан HEALTH_PORT.
+
+    Вызывается после check_tokens и создания бота, поэтому
+    состояние сразу отмечается готовым.
+    """
+    state = health.HealthState()
+    state.ready = True
+    state.sources['api_limit'] = API_LIMIT.metrics
+    state.sources['send_limit'] = SEND_LIMIT.metrics
+    state.sources['polling'] = POLL_CACHE.metrics
+    if HEALTH_PORT:
+        try:
+            state.server = health.serve(state, int(HEALTH_PORT))
+        except (OSError, ValueError) as error:
+            logger.error(f'Не удалось запустить проверки живости '
+                         f'на порту {HEALTH_PORT}: {error}')
+    return state
+
+
+def chat_tenant_map(tenant_list) -> dict:
+    """Соответствие чатов тенантам для команд."""
+    if tenant_list:
+        return {chat_id: tenant.name for tenant in tenant_list
+                for chat_id in tenant.chat_ids}
+    return {chat_id: DEFAULT_TENANT
+            for chat_id in [TELEGRAM_CHAT_ID, *SUBSCRIBED_CHAT_IDS]}
+
+
+def start_commands(bot, cache, tenant_list) -> dict:
+    """Запуск команд /status и /history для чатов подписок.
+
+    Возвращает соответствие чатов тенантам, которое читают команды.
+    """
+    chat_tenants = chat_tenant_map(tenant_list)
+    if isinstance(bot, BotPool):
+        bot = bot.primary
+    commands.start_command_polling(bot, cache, chat_tenants,
+                                   HOMEWORK_VERDICTS)
+    return chat_tenants
+
+
+def notify(services, message, key=None, date_updated=None) -> None:
+    """Отправка вердикта напрямую, в чаты подписки или по приёмникам.
+
+    В режиме EDIT_IN_PLACE сообщение о работе key обновляется.
+    Задержка вердикта со сменой статуса в date_updated учитывается
+    после отправки, у приёмников — после доставки первым из них.
+    """
+    send = services.sender(key)
+    if services.fan_out is not None:
+        services.fan_out.publish(message, partial(
+            record_latency, services, DEFAULT_TENANT, date_updated))
+        return
+    if SUBSCRIBED_CHAT_IDS:
+        broadcast(services.delivery,
+                  [TELEGRAM_CHAT_ID, *SUBSCRIBED_CHAT_IDS], message, send)
+    elif send is not None:
+        send(TELEGRAM_CHAT_ID, message)
+    else:
+        send_message(services.bot, message)
+    record_latency(services, DEFAULT_TENANT, date_updated)
+
+
+def record_latency(services, tenant, date_updated) -> None:
+    """Учёт задержки отправленного вердикта и проверка цели SLO."""
+    try:
+        services.latency.record(tenant, date_updated)
+    except (TypeError, ValueError):
+        logger.debug(f'Нет времени смены статуса: {date_updated!r}')
+        return
+    alerts = services.latency.check((tenant, OVERALL))
+    if not alerts:
+        return
+    for alert in alerts:
+        logger.warning(alert)
+    try:
+        # Одним сообщением: в чат можно писать раз в секунду.
+        send_operator(services.bot, services.delivery, '\n'.join(alerts))
+    except NoSendMessageError as error:
+        logger.error(repr(error))
+
+
+def deliver_homework(services, homework) -> None:
+    """Разбор работы и отправка вердикта в трассе работы."""
+    key = homework_key(homework)
+    attributes = {'homework_id': str(key),
+                  'status': str(homework.get('status'))}
+    if services.pipeline is not None:
+        # Трассу продолжают и завершают потоки конвейера.
+        services.pipeline.submit(
+            key, homework, services.tracer.start('homework', **attributes))
+        return
+    with services.tracer.trace('homework', **attributes) as trace:
+        with trace.span('parse_status'):
+            status = parse_status(homework)
+        logger.debug(status)
+        with trace.span('send_message'):
+            notify(services, status, key, homework.get('date_updated'))
+
+
+def handle_homeworks(services, homeworks) -> None:
+    """Отправка вердиктов по полученным домашним работам."""
+    services.health.polled(DEFAULT_TENANT)
+    if not homeworks:
+        logger.debug('Нет новых статусов')
+    record_history(homeworks)
+    for homework in homeworks:
+        deliver_homework(services, homework)
+    if services.pipeline is not None:
+        logger.debug(f'Очереди конвейера: {services.pipeline.metrics()}')
+    if services.cache is not None:
+        services.cache.update(DEFAULT_TENANT, homeworks)
+
+
+def tenant_chat_groups(tenant) -> list:
+    """Чаты тенанта по наборам шаблонов: пары (чаты, части шаблонов).
+
+    Считается один раз после загрузки или изменения тенанта.
+    """
+    if tenant.chat_groups is None:
+        TEMPLATES.add_tenant(tenant.name, tenant.templates)
+        groups: dict = {}
+        for chat_id in tenant.chat_ids:
+            template_set = TEMPLATES.resolve(
+                tenant.chat_locales.get(chat_id, tenant.locale), tenant.name)
+            groups.setdefault(template_set, []).append(chat_id)
+        tenant.chat_groups = [(chat_ids, TEMPLATES.parts[template_set])
+                              for template_set, chat_ids in groups.items()]
+    return tenant.chat_groups
+
+
+def poll_tenant(services, tenant) -> None:
+    """Один опрос API для тенанта и рассылка вердиктов по его чатам."""
+    response = request_homeworks(tenant.timestamp, tenant.headers)
+    records = validate_response(response)
+    tenant.timestamp = response['current_date']
+    services.health.polled(tenant.name)
+    if not records:
+        logger.debug(f'Нет новых статусов у тенанта {tenant.name}')
+    record_history(response['homeworks'])
+    if services.cache is not None:
+        services.cache.update(tenant.name, response['homeworks'])
+    groups = tenant_chat_groups(tenant) if records else []
+    # Все вердикты цикла ставятся в очередь сразу, чтобы веса тенантов
+    # в очереди доставки решали, чьи сообщения уходят раньше.
+    submitted = []
+    for record in records:
+        key = record.name if record.id is None else record.id
+        trace = services.tracer.start('homework', tenant=tenant.name,
+                                      homework_id=str(key),
+                                      status=record.status)
+        try:
+            with trace.span('parse_status'):
+                name = str(record.name)
+                messages = [(chat_ids, name.join(parts[record.status]))
+                            for chat_ids, parts in groups]
+            started = time.time_ns()
+            pending = submit_messages(services.delivery, messages,
+                                      services.sender(key), tenant.name)
+        except Exception as error:
+            trace.finish(repr(error))
+            raise
+        submitted.append((record, trace, started, pending))
+    first_error = None
+    for record, trace, started, pending in submitted:
+        try:
+            wait_messages(pending)
+        except NoSendMessageError as error:
+            trace.record('send_message', started, error=repr(error),
+                         chats=len(tenant.chat_ids))
+            trace.finish(repr(error))
+            first_error = first_error or error
+            continue
+        trace.record('send_message', started, chats=len(tenant.chat_ids))
+        trace.finish()
+        record_latency(services, tenant.name, record.date_updated)
+    if first_error is not None:
+        raise first_error
+
+
+def alert_tenant(delivery, tenant, error=None) -> None:
+    """Сообщение тенанту об ошибке его опроса или сводка повторов.
+
+    Как report_error, но со сводкой тенанта и в его чаты.
+    """
+    messages = []
+    if error is not None:
+        message = repr(error)
+        logger.error(f'Тенант {tenant.name}: {message}')
+        if tenant.errors.record(error, message):
+            messages.append((message, ALERT))
+    report = tenant.errors.flush()
+    if report:
+        messages.append((report, DIGEST))
+    if tenant.cant_send:
+        return
+    for message, priority in messages:
+        future = delivery.submit(tenant.chat_ids, message,
+                                 priority=priority, key=tenant.name)
+        future.add_done_callback(log_failures)
+        if priority == DIGEST:
+            future.add_done_callback(partial(
+                commit_digest, tenant.errors, len(tenant.chat_ids)))
+
+
+def serve_tenant(services, tenant) -> None:
+    """Опрос одного тенанта; его ошибки не затрагивают остальных."""
+    try:
+        poll_tenant(services, tenant)
+    except NoSendMessageError as error:
+        tenant.cant_send = True
+        logger.error(f'Тенант {tenant.name}: {error!r}')
+    except Exception as error:
+        status = getattr(error, 'status', None)
+        if tenant.record_failure(status):
+            logger.warning(
+                f'Тенант {tenant.name} на карантине до '
+                f'{time.ctime(tenant.quarantined_until)}: '
+                f'API отвечает {status} {tenant.failures} раз подряд'
+            )
+        alert_tenant(services.delivery, tenant, error)
+    else:
+        tenant.record_success()
+        alert_tenant(services.delivery, tenant)
+
+
+def load_registry() -> tenants.TenantRegistry:
+    """Загрузка реестра тенантов из TENANTS_CONFIG."""
+    try:
+        return tenants.TenantRegistry(TENANTS_CONFIG)
+    except (OSError, ValueError) as error:
+        logger.critical(
+            f'Не удалось загрузить тенантов из {TENANTS_CONFIG}: {error}\n'
+            'Программа принудительно остановлена.'
+        )
+        sys.exit()
+
+
+def next_poll_delay(tenant, now, period=RETRY_PERIOD) -> float:
+    """Пауза до следующего опроса тенанта с учётом карантина.
+
+    period — обычный период опроса; его подбирает simulator.py.
+    """
+    return max(period, tenant.quarantined_until - now)
+
+
+def watch_reload_signal(registry) -> None:
+    """Перечитывание реестра по SIGHUP, где он есть."""
+    if not hasattr(signal, 'SIGHUP'):
+        return
+    try:
+        signal.signal(signal.SIGHUP,
+                      lambda *args: registry.request_reload())
+    except ValueError:
+        # Сигналы принимает только главный поток.
+        logger.debug('SIGHUP недоступен: цикл опроса не в главном потоке')
+
+
+def apply_registry_changes(services, registry, wheel, timers) -> None:
+    """Применение изменений реестра к таймерам опроса.
+
+    Таймеры добавленных и сменивших токен тенантов ставятся
+    на ближайший такт, удалённых — отменяются, остальных не меняются.
+    """
+    try:
+        added, removed, rekeyed = registry.reload()
+    except (OSError, ValueError) as error:
+        logger.error(f'Не удалось перечитать {registry.path}: {error}\n'
+                     'Тенанты не изменены.')
+        return
+    for tenant in removed:
+        wheel.cancel(timers.pop(tenant.name))
+        services.health.last_success.pop(tenant.name, None)
+    for tenant in [*added, *rekeyed]:
+        if tenant.name in timers:
+            wheel.cancel(timers[tenant.name])
+        timers[tenant.name] = wheel.schedule(0, tenant)
+    for tenant in registry:
+        services.delivery.set_weight(tenant.name, tenant.weight)
+    if services.chat_tenants is not None:
+        mapping = chat_tenant_map(list(registry))
+        services.chat_tenants.update(mapping)
+        for chat_id in set(services.chat_tenants) - set(mapping):
+            del services.chat_tenants[chat_id]
+    logger.info(f'Реестр тенантов перечитан: добавлено {len(added)}, '
+                f'удалено {len(removed)}, сменили токен {len(rekeyed)}')
+
+
+def tenants_snapshot(registry, wheel, timers) -> dict:
+    """Состояние тенантов и сроки их следующих опросов."""
+    return {'tenants': {
+        tenant.name: {**tenant.snapshot(),
+                      'next_poll': timers[tenant.name].deadline * wheel.tick}
+        for tenant in registry
+    }}
+
+
+def run_tenants(services, registry, handoff=None, state=None) -> None:
+    """Цикл опроса API для нескольких тенантов.
+
+    У каждого тенанта свой срок опроса в колесе таймеров; тенант
+    на карантине ставится сразу на конец карантина. Изменения реестра
+    применяются между опросами. state — снимок прежнего процесса:
+    курсоры и сроки опроса тенантов продолжаются с него.
+    """
+    handoff = handoff or Handoff()
+    saved = (state or {}).get('tenants', {})
+    watch_reload_signal(registry)
+    now = time.time()
+    wheel = TimingWheel(tick=POLL_TICK, jitter=POLL_JITTER, now=now)
+    timers = {}
+    for tenant in registry:
+        if tenant.name in saved:
+            tenant.restore(saved[tenant.name])
+        delay = saved.get(tenant.name, {}).get('next_poll', now) - now
+        timers[tenant.name] = wheel.schedule(max(0, delay), tenant)
+    try:
+        while True:
+            if registry.changed():
+                apply_registry_changes(services, registry, wheel, timers)
+            for tenant in wheel.advance(time.time()):
+                serve_tenant(services, tenant)
+                timers[tenant.name] = wheel.schedule(
+                    next_poll_delay(tenant, time.time()), tenant)
+            with handoff.sleeping():
+                time.sleep(POLL_TICK)
+    except HandoffRequested:
+        services.close(HANDOFF_DRAIN_TIMEOUT)
+        handoff.release(tenants_snapshot(registry, wheel, timers))
+
+
+def error_message(error) -> str:
+    """Текст сообщения об ошибке цикла опроса."""
+    if isinstance(error, (NoSendMessageError, CanSendMessageError,
+                          TypeError)):
+        return repr(error)
+    return f'Сбой в работе программы: {error}'
+
+
+def commit_digest(digest, chat_count, future) -> None:
+    """Подтверждение сводки, если она дошла хотя бы в один чат."""
+    if not future.cancelled() and len(future.result()) < chat_count:
+        digest.commit()
+
+
+def report_error(bot, digest, error, cant_send, delivery=None) -> bool:
+    """Сообщение об ошибке цикла или сводка повторов.
+
+    С delivery сообщения ставятся в полосы ALERT и DIGEST, после
+    вердиктов, без ожидания отправки. Повторы из сводки считаются
+    сообщёнными, когда она дошла. Возвращает новое значение флага
+    cant_send.
+    """
+    messages = []
+    if error is None:
+        cant_send = False
+    else:
+        message = error_message(error)
+        logger.error(message)
+        cant_send = cant_send or isinstance(error, NoSendMessageError)
+        if digest.record(error, message):
+            messages.append((message, ALERT))
+    report = digest.flush()
+    if report:
+        messages.append((report, DIGEST))
+    for message, priority in messages:
+        if cant_send:
+            break
+        try:
+            future = send_operator(bot, delivery, message, priority)
+        except NoSendMessageError as send_error:
+            logger.error(repr(send_error))
+            cant_send = True
+            continue
+        if priority != DIGEST:
+            continue
+        if future is None:
+            digest.commit()
+        else:
+            future.add_done_callback(partial(commit_digest, digest, 1))
+    return cant_send
+
+
+def load_digest(state) -> ErrorDigest:
+    """Сводка ошибок, продолженная со снимка state прежнего процесса."""
+    digest = ErrorDigest(ERROR_DIGEST_PERIOD)
+    if 'errors' in state:
+        digest.restore(state['errors'])
+    return digest
+
+
+def main_tenants(bot, handoff) -> None:
+    """Работа бота для тенантов из TENANTS_CONFIG."""
+    registry = load_registry()
+    services = Services(bot, list(registry))
+    handoff.install(services.health)
+    try:
+        run_tenants(services, registry, handoff, handoff.acquire())
+    finally:
+        services.close()
 
 
 def main() -> None:
     """Основная логика работы бота."""
     check_tokens()
+    if CASSETTE_RECORD:
+        cassette.start_recording(CASSETTE_RECORD)
     try:
         bot = TeleBot(token=TELEGRAM_TOKEN)
+        bot = make_bot_pool(bot)
     except Exception as error:
         logger.critical(
             f'Не удалось подключить бота {TELEGRAM_TOKEN}\n'
@@ -161,42 +1068,40 @@ def main() -> None:
             'Программа принудительно остановлена.', exc_info=True
         )
         return
-    # Какие сообщения уже отсылались.
-    already_sent: set = set()
+    handoff = Handoff(HANDOFF_FILE)
+    # Проверки живости отвечают и пока ждём снимок старого процесса.
+    if TENANTS_CONFIG:
+        main_tenants(bot, handoff)
+        return
+    services = Services(bot)
+    handoff.install(services.health)
+    state = handoff.acquire() or {}
+    digest = load_digest(state)
     # Флаг, что сообщение нельзя отослать.
-    cant_send = False
-    timestamp = int(time.time())
-    while True:
-        message = ''
-        try:
-            response_content = get_api_answer(timestamp)
-            check_response(response_content)
-            timestamp = response_content['current_date']
-            homeworks = response_content['homeworks']
-            if not homeworks:
-                logger.debug('Нет новых статусов')
-            for homework in homeworks:
-                status = parse_status(homework)
-                logger.debug(status)
-                send_message(bot, status)
-        except NoSendMessageError as error:
-            message = repr(error)
-            cant_send = True
-        except (CanSendMessageError, TypeError) as error:
-            message = repr(error)
-        except Exception as error:
-            message = f'Сбой в работе программы: {error}'
-        finally:
-            if not message:
-                already_sent = set()
-                cant_send = False
-            elif message not in already_sent and not cant_send:
-                logger.error(message)
-                send_message(bot, message)
-                already_sent.add(message)
-            else:
-                logger.error(message)
-            time.sleep(RETRY_PERIOD)
+    cant_send = state.get('cant_send', False)
+    timestamp = state.get('timestamp', int(time.time()))
+    try:
+        while True:
+            error = None
+            try:
+                response_content = get_api_answer(timestamp)
+                check_response(response_content)
+                timestamp = response_content['current_date']
+                handle_homeworks(services, response_content['homeworks'])
+            except Exception as caught:
+                error = caught
+            # BaseException (остановка, конец прогона) сюда не доходит:
+            # прерванный цикл не считается ни успехом, ни ошибкой.
+            cant_send = report_error(bot, digest, error, cant_send,
+                                     services.delivery)
+            with handoff.sleeping():
+                time.sleep(RETRY_PERIOD)
+    except HandoffRequested:
+        services.close(HANDOFF_DRAIN_TIMEOUT)
+        handoff.release({'timestamp': timestamp, 'cant_send': cant_send,
+                         'errors': digest.snapshot()})
+    finally:
+        services.close()
 
 
 if __name__ == '__main__':
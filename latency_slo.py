@@ -0,0 +1,157 @@
+"""Задержка уведомления: от смены статуса ревьюером до отправки.
+
+Задержка — разница между моментом успешной отправки вердикта
+и полем date_updated работы. Перцентили считаются потоковым
+скетчем с относительной точностью (как DDSketch): значения
+раскладываются по логарифмическим корзинам, память зависит от
+разброса значений, а не от их числа.
+
+Перцентили считаются за два последних окна window секунд, по тенантам
+и в целом. Если p95 (percentile) общего скетча или скетча тенанта
+превышает slo секунд при хотя бы min_count замерах, возвращается
+текст предупреждения; повторно — только после возврата в норму.
+"""
+
+import calendar
+import math
+import threading
+import time
+
+DATE_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+OVERALL = '*'
+
+
+def parse_date(value) -> int:
+    """Unix-время из поля date_updated."""
+    return calendar.timegm(time.strptime(value, DATE_FORMAT))
+
+
+class LatencySketch:
+    """Потоковый скетч перцентилей с относительной точностью accuracy."""
+
+    def __init__(self, accuracy=0.01) -> None:
+        """Пустой скетч."""
+        self.gamma = (1 + accuracy) / (1 - accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.buckets: dict = {}
+        self.zeros = 0
+        self.count = 0
+
+    def add(self, value) -> None:
+        """Учёт значения; неположительные считаются нулём."""
+        self.count += 1
+        if value <= 0:
+            self.zeros += 1
+            return
+        index = math.ceil(math.log(value) / self.log_gamma)
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+
+    def merge(self, other) -> None:
+        """Добавление значений другого скетча той же точности."""
+        self.count += other.count
+        self.zeros += other.zeros
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+
+    def quantile(self, q):
+        """Значение перцентиля q (от 0 до 1) или None без данных."""
+        if not self.count:
+            return None
+        rank = q * (self.count - 1)
+        seen = self.zeros
+        if rank < seen:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                return 2 * self.gamma ** index / (self.gamma + 1)
+        return 2 * self.gamma ** max(self.buckets) / (self.gamma + 1)
+
+
+class SLOTracker:
+    """Скетчи задержки по тенантам и проверка порога slo."""
+
+    def __init__(self, slo=None, percentile=95, window=24 * 60 * 60,
+                 min_count=20, accuracy=0.01) -> None:
+        """Отслеживание перцентиля percentile против slo секунд."""
+        self.slo = slo
+        self.percentile = percentile
+        self.window = window
+        self.min_count = min_count
+        self.accuracy = accuracy
+        self.lock = threading.Lock()
+        self.current: dict = {}
+        self.previous: dict = {}
+        self.window_started = time.time()
+        self.breached: set = set()
+
+    def _rotate(self, now) -> None:
+        """Переход к новому окну."""
+        if now - self.window_started >= self.window:
+            self.previous = (self.current if now - self.window_started
+                             < 2 * self.window else {})
+            self.current = {}
+            self.window_started = now
+
+    def record(self, tenant, date_updated, now=None) -> None:
+        """Учёт отправки вердикта о статусе от date_updated."""
+        now = time.time() if now is None else now
+        latency = now - parse_date(date_updated)
+        with self.lock:
+            self._rotate(now)
+            for name in (tenant, OVERALL):
+                sketch = self.current.get(name)
+                if sketch is None:
+                    sketch = self.current[name] = LatencySketch(
+                        self.accuracy)
+                sketch.add(latency)
+
+    def _sketch(self, name) -> LatencySketch:
+        """Скетч за два последних окна."""
+        sketch = LatencySketch(self.accuracy)
+        for windows in (self.previous, self.current):
+            if name in windows:
+                sketch.merge(windows[name])
+        return sketch
+
+    def percentiles(self, name=OVERALL) -> dict:
+        """p50, p95 и p99 задержки в секундах."""
+        with self.lock:
+            sketch = self._sketch(name)
+        return {'count': sketch.count,
+                **{f'p{q}': sketch.quantile(q / 100) for q in (50, 95, 99)}}
+
+    def check(self, names=None) -> list:
+        """Тексты предупреждений о новых нарушениях порога.
+
+        names ограничивает проверку тенантами (OVERALL — в целом).
+        """
+        if self.slo is None:
+            return []
+        alerts = []
+        with self.lock:
+            if names is None:
+                names = set(self.previous) | set(self.current)
+            for name in sorted(names):
+                sketch = self._sketch(name)
+                value = sketch.quantile(self.percentile / 100)
+                if sketch.count < self.min_count or value <= self.slo:
+                    self.breached.discard(name)
+                    continue
+                if name in self.breached:
+                    continue
+                self.breached.add(name)
+                who = 'всех тенантов' if name == OVERALL else name
+                alerts.append(
+                    f'Задержка уведомлений для {who}: '
+                    f'p{self.percentile} {value / 60:.1f} мин, '
+                    f'цель {self.slo / 60:.1f} мин '
+                    f'({sketch.count} уведомлений)'
+                )
+        return alerts
+
+    def metrics(self) -> dict:
+        """Перцентили по тенантам и в целом."""
+        with self.lock:
+            names = sorted(set(self.previous) | set(self.current))
+        return {name: self.percentiles(name) for name in names}
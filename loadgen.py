@@ -0,0 +1,357 @@
+"""Синтетическая нагрузка: потоки статусов домашних работ.
+
+Модель: каждый студент сдаёт работы с заданной частотой, через
+случайную задержку работа берётся на проверку (reviewing), затем
+получает вердикт approved или rejected; отклонённая работа
+пересдаётся. Время модели идёт в time_scale раз быстрее реального,
+поэтому сутки трафика проходят за минуты.
+
+Ошибки 400/401/404/500 подмешиваются с заданными вероятностями
+и проходят через те же ветки get_api_answer, что и настоящие.
+
+Запуск (через локальный HTTP-заменитель API):
+    python loadgen.py --students 10000 --duration 30 --time-scale 3600
+или без сети, подменой requests.get:
+    python loadgen.py --students 10000 --in-process
+"""
+
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+
+STATUS_REVIEWING = 'reviewing'
+STATUS_APPROVED = 'approved'
+STATUS_REJECTED = 'rejected'
+TOKEN_PREFIX = 'student-'
+
+
+def format_date(timestamp) -> str:
+    """Дата в формате поля date_updated."""
+    return time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime(timestamp))
+
+
+def pick_error(rng, error_rates):
+    """Случайный код ошибки по вероятностям error_rates или None."""
+    roll = rng.random()
+    for status, rate in error_rates.items():
+        if roll < rate:
+            return int(status)
+        roll -= rate
+    return None
+
+
+class LoadConfig:
+    """Параметры модели нагрузки; задержки в секундах времени модели."""
+
+    def __init__(self, students=100, submissions_per_day=2.0,
+                 review_delay=3600.0, verdict_delay=1800.0,
+                 fix_delay=7200.0, reject_rate=0.4, error_rates=None,
+                 time_scale=3600.0, seed=None) -> None:
+        """Параметры по умолчанию близки к реальному трафику."""
+        self.students = students
+        self.submissions_per_day = submissions_per_day
+        self.review_delay = review_delay
+        self.verdict_delay = verdict_delay
+        self.fix_delay = fix_delay
+        self.reject_rate = reject_rate
+        self.error_rates = error_rates or {}
+        self.time_scale = time_scale
+        self.seed = seed
+
+
+class Student:
+    """Работы одного студента и их запланированные переходы."""
+
+    def __init__(self, number, config, rng, now) -> None:
+        """Студент number, начинающий в момент модели now."""
+        self.number = number
+        self.config = config
+        self.rng = rng
+        self.lock = threading.Lock()
+        self.homeworks: dict = {}
+        self.next_submission = now + self._delay(
+            86400 / config.submissions_per_day)
+        self.counter = 0
+
+    def _delay(self, mean) -> float:
+        """Экспоненциально распределённая задержка."""
+        return self.rng.expovariate(1 / mean) if mean > 0 else 0.0
+
+    def _submit(self, at) -> None:
+        """Новая работа, которая будет взята на проверку позже."""
+        self.counter += 1
+        homework_id = self.number * 1_000_000 + self.counter
+        self.homeworks[homework_id] = {
+            'homework': {
+                'id': homework_id,
+                'homework_name': f'student{self.number}_hw{self.counter}.zip',
+                'lesson_name': f'Спринт {self.counter % 20 + 1}',
+                'reviewer_comment': '',
+            },
+            'updated': None,
+            'next_at': at + self._delay(self.config.review_delay),
+            'next_status': STATUS_REVIEWING,
+        }
+
+    def _transition(self, state) -> None:
+        """Применение запланированного перехода и планирование нового."""
+        at = state['next_at']
+        status = state['next_status']
+        state['homework']['status'] = status
+        state['homework']['date_updated'] = format_date(at)
+        state['updated'] = at
+        if status == STATUS_REVIEWING:
+            state['next_at'] = at + self._delay(self.config.verdict_delay)
+            state['next_status'] = (
+                STATUS_REJECTED
+                if self.rng.random() < self.config.reject_rate
+                else STATUS_APPROVED
+            )
+        elif status == STATUS_REJECTED:
+            state['next_at'] = at + self._delay(
+                self.config.fix_delay + self.config.review_delay)
+            state['next_status'] = STATUS_REVIEWING
+        else:
+            state['next_at'] = None
+
+    def advance(self, now) -> None:
+        """Продвижение модели до момента now."""
+        while self.next_submission <= now:
+            self._submit(self.next_submission)
+            self.next_submission += self._delay(
+                86400 / self.config.submissions_per_day)
+        for state in self.homeworks.values():
+            while state['next_at'] is not None and state['next_at'] <= now:
+                self._transition(state)
+
+    def changed_since(self, from_date, now) -> list:
+        """Работы, изменившиеся после from_date, как в ответе API.
+
+        Принятые работы после выдачи забываются, чтобы память модели
+        не росла.
+        """
+        with self.lock:
+            self.advance(now)
+            changed = []
+            for homework_id, state in list(self.homeworks.items()):
+                updated = state['updated']
+                if updated is None or updated <= from_date:
+                    continue
+                changed.append(dict(state['homework']))
+                if state['next_at'] is None:
+                    del self.homeworks[homework_id]
+            return changed
+
+
+class LoadModel:
+    """Все студенты, часы модели и подмешивание ошибок."""
+
+    def __init__(self, config) -> None:
+        """Модель по параметрам config."""
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.started = time.time()
+        self.real_started = time.monotonic()
+        self.students = [
+            Student(number, config, random.Random(self.rng.random()),
+                    self.started)
+            for number in range(config.students)
+        ]
+
+    def now(self) -> float:
+        """Текущее время модели."""
+        elapsed = time.monotonic() - self.real_started
+        return self.started + elapsed * self.config.time_scale
+
+    def tokens(self) -> list:
+        """Токены всех студентов."""
+        return [f'{TOKEN_PREFIX}{number}' for number in range(len(
+            self.students))]
+
+    def injected_error(self):
+        """Код ошибки для этого запроса или None."""
+        return pick_error(self.rng, self.config.error_rates)
+
+    def respond(self, token, from_date) -> tuple:
+        """Код ответа и тело ответа API для токена и from_date."""
+        error = self.injected_error()
+        if error is not None:
+            return error, {'code': 'injected', 'message': 'Ошибка модели'}
+        number = None
+        if token.startswith(TOKEN_PREFIX):
+            number = token[len(TOKEN_PREFIX):]
+        if number is None or not number.isdigit() or int(number) >= len(
+                self.students):
+            return HTTPStatus.UNAUTHORIZED, {
+                'code': 'not_authenticated',
+                'message': 'Учетные данные не были предоставлены.',
+            }
+        try:
+            from_date = int(from_date)
+        except (TypeError, ValueError):
+            return HTTPStatus.BAD_REQUEST, {
+                'code': 'UnknownError',
+                'error': {'error': 'Wrong from_date format'},
+            }
+        now = self.now()
+        return HTTPStatus.OK, {
+            'homeworks': self.students[int(number)].changed_since(
+                from_date, now),
+            'current_date': int(now),
+        }
+
+
+class ModelResponse:
+    """Ответ модели с интерфейсом requests.Response для режима без сети."""
+
+    def __init__(self, status_code, data) -> None:
+        """Ответ с кодом status_code и телом data."""
+        self.status_code = status_code
+        self.data = data
+        self.headers: dict = {}
+        self.reason = ''
+
+    @property
+    def text(self) -> str:
+        """Тело ответа."""
+        return json.dumps(self.data, ensure_ascii=False)
+
+    @property
+    def content(self) -> bytes:
+        """Тело ответа в байтах."""
+        return self.text.encode('utf-8')
+
+    def json(self):
+        """Тело ответа без сериализации."""
+        return self.data
+
+
+def in_process_get(model):
+    """Замена requests.get, отвечающая из модели без сети."""
+    def get(url=None, headers=None, params=None, **kwargs):
+        token = (headers or {}).get('Authorization', '')[len('OAuth '):]
+        status, data = model.respond(token, (params or {}).get('from_date'))
+        return ModelResponse(status, data)
+    return get
+
+
+def drive(model, duration, concurrency=16, endpoint=None) -> dict:
+    """Опрос API всеми студентами модели с максимальной скоростью.
+
+    Весь конвейер бота (запрос, проверка, разбор, рассылка) выполняется
+    как в run_tenants, но без пауз между опросами; сообщения считает
+    OfflineBot. Возвращает сводку с пропускной способностью и памятью.
+    """
+    import homework
+    from cassette import OfflineBot, patched_get
+    from delivery import ChatDelivery
+    from tenants import Tenant
+
+    bot = OfflineBot()
+    services = homework.Services(bot, tenant_list=[])
+    # Рассылка по умолчанию заменяется: её потоки больше не нужны.
+    services.delivery.shutdown()
+    services.delivery = ChatDelivery(
+        lambda chat_id, text: bot.send_message(chat_id=chat_id, text=text),
+        max_workers=concurrency, global_rate=10 ** 9, chat_rate=10 ** 9
+    )
+    start = int(model.now())
+    tenant_list = [Tenant(token, token, [token], timestamp=start)
+                   for token in model.tokens()]
+    counters = {'polls': 0, 'errors': 0}
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def worker(offset) -> None:
+        index = offset
+        while time.monotonic() < deadline:
+            tenant = tenant_list[index % len(tenant_list)]
+            index += concurrency
+            try:
+                homework.poll_tenant(services, tenant)
+                failed = 0
+            except Exception:
+                failed = 1
+            with lock:
+                counters['polls'] += 1
+                counters['errors'] += failed
+
+    saved_endpoint = homework.ENDPOINT
+    saved_level = homework.logger.level
+    # Журнал каждого опроса исказил бы измерения.
+    homework.logger.setLevel(logging.WARNING)
+    tracemalloc.start()
+    memory_start = tracemalloc.get_traced_memory()[0]
+    started = time.monotonic()
+    try:
+        if endpoint:
+            homework.ENDPOINT = endpoint
+            with ThreadPoolExecutor(concurrency) as executor:
+                list(executor.map(worker, range(concurrency)))
+        else:
+            with patched_get(in_process_get(model)):
+                with ThreadPoolExecutor(concurrency) as executor:
+                    list(executor.map(worker, range(concurrency)))
+        memory_end, memory_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+        homework.ENDPOINT = saved_endpoint
+        homework.logger.setLevel(saved_level)
+        services.close()
+    elapsed = time.monotonic() - started
+    return {
+        'polls': counters['polls'],
+        'errors': counters['errors'],
+        'messages': bot.sent,
+        'seconds': round(elapsed, 3),
+        'polls_per_second': round(counters['polls'] / elapsed, 1),
+        'messages_per_second': round(bot.sent / elapsed, 1),
+        'memory_growth_kb': round((memory_end - memory_start) / 1024, 1),
+        'memory_peak_kb': round(memory_peak / 1024, 1),
+    }
+
+
+def main() -> None:
+    """Точка входа командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--students', type=int, default=1000)
+    parser.add_argument('--duration', type=float, default=10.0,
+                        help='Длительность прогона, реальные секунды.')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--time-scale', type=float, default=3600.0)
+    parser.add_argument('--submissions-per-day', type=float, default=2.0)
+    parser.add_argument('--reject-rate', type=float, default=0.4)
+    parser.add_argument('--error-rate', type=float, nargs=2, action='append',
+                        metavar=('STATUS', 'RATE'), default=[],
+                        help='Например: --error-rate 401 0.01')
+    parser.add_argument('--in-process', action='store_true',
+                        help='Без HTTP: подменить requests.get моделью.')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+    config = LoadConfig(
+        students=args.students,
+        submissions_per_day=args.submissions_per_day,
+        reject_rate=args.reject_rate,
+        error_rates={int(status): rate for status, rate in args.error_rate},
+        time_scale=args.time_scale,
+        seed=args.seed,
+    )
+    model = LoadModel(config)
+    if args.in_process:
+        summary = drive(model, args.duration, args.concurrency)
+    else:
+        from stand_in import PracticumStandIn
+        with PracticumStandIn(model) as server:
+            summary = drive(model, args.duration, args.concurrency,
+                            endpoint=server.url)
+    print(json.dumps(summary, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
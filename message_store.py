@@ -0,0 +1,143 @@
+"""Хранилище идентификаторов сообщений для режима редактирования.
+
+В режиме EDIT_IN_PLACE на каждую домашнюю работу в чате приходится
+одно сообщение, которое обновляется при смене статуса. Здесь хранится,
+какое сообщение какой работе соответствует.
+
+Файл — журнал JSON Lines: каждая запись и каждое удаление дописываются
+одной строкой, поэтому отправка сообщения не переписывает весь файл.
+Когда строк становится заметно больше, чем записей, журнал сжимается:
+атомарно переписывается одними действующими записями. Файл старого
+формата (один объект JSON) тоже читается.
+"""
+
+import json
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Сколько последних сообщений помнить; старые вытесняются первыми.
+MAX_MESSAGES = 10000
+# Журнал сжимается, когда в нём больше строк, чем записей, на столько.
+COMPACT_SLACK = 1000
+
+
+class MessageStore:
+    """Идентификаторы и тексты сообщений по чату и работе."""
+
+    def __init__(self, path=None, max_messages=MAX_MESSAGES) -> None:
+        """Хранилище, сохраняемое в файл path, если он задан."""
+        self.path = path
+        self.max_messages = max_messages
+        self.lock = threading.Lock()
+        self.messages: dict = {}
+        # Число строк в журнале.
+        self.lines = 0
+        if path and os.path.exists(path):
+            self._load()
+
+    @staticmethod
+    def _key(chat_id, homework_key) -> str:
+        """Ключ записи."""
+        return f'{chat_id}:{homework_key}'
+
+    def _apply(self, key, value) -> list:
+        """Запись value под ключом key; None удаляет запись.
+
+        Возвращает ключи вытесненных записей.
+        """
+        self.messages.pop(key, None)
+        evicted: list = []
+        if value is None:
+            return evicted
+        self.messages[key] = value
+        while len(self.messages) > self.max_messages:
+            evicted.append(next(iter(self.messages)))
+            del self.messages[evicted[-1]]
+        return evicted
+
+    def _load(self) -> None:
+        """Чтение журнала; повреждённые строки пропускаются.
+
+        Файл старого формата сразу переписывается журналом.
+        """
+        legacy = False
+        try:
+            with open(self.path, encoding='utf-8') as file:
+                for line in file:
+                    if not line.strip():
+                        continue
+                    self.lines += 1
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        logger.warning(f'Пропущена повреждённая строка '
+                                       f'{self.path}')
+                        continue
+                    if 'key' not in entry:
+                        # Старый формат: весь словарь одним объектом.
+                        legacy = True
+                        for key, value in entry.items():
+                            self._apply(key, value)
+                        continue
+                    self._apply(entry['key'], entry.get('message'))
+        except OSError as error:
+            logger.error(f'Не удалось прочитать {self.path}: {error}')
+            self.messages = {}
+            return
+        if legacy:
+            self._compact()
+
+    def _append(self, changes) -> None:
+        """Дозапись пар (ключ, запись или None), при необходимости сжатие."""
+        if not self.path:
+            return
+        if self.lines >= len(self.messages) + COMPACT_SLACK:
+            self._compact()
+            return
+        try:
+            with open(self.path, 'a', encoding='utf-8') as file:
+                file.write(''.join(
+                    json.dumps({'key': key, 'message': value},
+                               ensure_ascii=False) + '\n'
+                    for key, value in changes))
+            self.lines += len(changes)
+        except OSError as error:
+            logger.error(f'Не удалось сохранить {self.path}: {error}')
+
+    def _compact(self) -> None:
+        """Атомарная перезапись журнала действующими записями."""
+        temp_path = f'{self.path}.tmp'
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as file:
+                for key, value in self.messages.items():
+                    file.write(json.dumps({'key': key, 'message': value},
+                                          ensure_ascii=False) + '\n')
+            os.replace(temp_path, self.path)
+            self.lines = len(self.messages)
+        except OSError as error:
+            logger.error(f'Не удалось сохранить {self.path}: {error}')
+
+    def get(self, chat_id, homework_key):
+        """Запись о сообщении или None."""
+        with self.lock:
+            return self.messages.get(self._key(chat_id, homework_key))
+
+    def put(self, chat_id, homework_key, message_id, text) -> None:
+        """Запоминание сообщения о работе."""
+        key = self._key(chat_id, homework_key)
+        value = {'message_id': message_id, 'text': text}
+        with self.lock:
+            evicted = self._apply(key, value)
+            self._append([(key, value),
+                          *((old_key, None) for old_key in evicted)])
+
+    def discard(self, chat_id, homework_key) -> None:
+        """Забыть сообщение о работе."""
+        key = self._key(chat_id, homework_key)
+        with self.lock:
+            if key in self.messages:
+                self._apply(key, None)
+                self._append([(key, None)])
@@ -0,0 +1,405 @@
+"""Конвейер опрос → разбор → доставка с ограниченными очередями.
+
+Опрос API кладёт домашние работы в очередь разбора, поток разбора
+превращает их в сообщения для чатов и кладёт в очередь доставки,
+поток доставки отправляет их, повторяя попытки при сбоях Telegram.
+Повтор откладывается до своего времени и не задерживает сообщения
+других чатов; следующие сообщения того же чата ждут за ним, чтобы
+сохранить порядок. Отложено не больше сообщений, чем вмещает очередь
+доставки, иначе поток ждёт ближайшего повтора.
+Обе очереди ограничены, и при переполнении действует политика:
+
+    block    — запись ждёт, пока в очереди не освободится место;
+               при долгом сбое Telegram останавливается и опрос;
+    coalesce — новая запись объединяется с ожидающей записью того же
+               ключа (работы — в очереди разбора, чата — в очереди
+               доставки); если такой нет, запись ждёт как при block;
+    spill    — лишние записи дописываются в файл и читаются обратно
+               по мере освобождения очереди, порядок сохраняется.
+
+metrics() возвращает глубину очередей и счётчики переполнений.
+После успешной отправки каждого сообщения вызывается on_sent(message):
+в записи сообщения есть время смены статуса работы ('updated').
+
+Трасса работы (tracing.Trace) едет с записью по обеим очередям:
+в неё пишутся спаны ожидания в очередях, разбора и каждой попытки
+отправки, а завершается она после последнего сообщения работы.
+Трасса живёт только в памяти: у записей, выгруженных в файл, и у
+работы, вытесненной при объединении, она теряется или обрывается.
+"""
+
+import heapq
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+
+from tracing import NOOP_TRACE
+
+logger = logging.getLogger(__name__)
+
+POLICIES = ('block', 'coalesce', 'spill')
+# Ограничение Telegram на длину одного сообщения.
+MAX_MESSAGE_LENGTH = 4096
+
+
+def take_newer(old, new):
+    """Объединение записей: остаётся более новая."""
+    return new
+
+
+def join_messages(old, new):
+    """Объединение сообщений одного чата в одно или None."""
+    text = f'{old["text"]}\n\n{new["text"]}'
+    if len(text) > MAX_MESSAGE_LENGTH:
+        return None
+    # Время смены статуса остаётся от более старой работы,
+    # а сообщение о двух работах уже не относится ни к одной.
+    merged = dict(old, text=text)
+    if old.get('key') != new.get('key'):
+        merged['key'] = None
+    if 'traces' in old or 'traces' in new:
+        merged['traces'] = [*old.get('traces', ()), *new.get('traces', ())]
+    return merged
+
+
+def traces(item):
+    """Трассы записи; после выгрузки в файл их нет."""
+    return [trace for trace in item.get('traces', ()) if trace is not None]
+
+
+class BoundedQueue:
+    """Очередь пар (ключ, запись) с политикой переполнения."""
+
+    def __init__(self, name, maxsize, policy='block', merge=take_newer,
+                 spill_path=None) -> None:
+        """Очередь не длиннее maxsize записей в памяти."""
+        if policy not in POLICIES:
+            raise ValueError(f'Неизвестная политика очереди: {policy}')
+        if policy == 'spill' and not spill_path:
+            raise ValueError('Для политики spill нужен файл')
+        self.name = name
+        self.maxsize = maxsize
+        self.policy = policy
+        self.merge = merge
+        self.spill_path = spill_path
+        self.items: deque = deque()
+        self.condition = threading.Condition()
+        self.spilled = 0
+        self.spill_offset = 0
+        self.unfinished = 0
+        self.counters = {'put': 0, 'coalesced': 0, 'spilled': 0,
+                         'blocked_seconds': 0.0, 'max_depth': 0}
+        if spill_path and os.path.exists(spill_path):
+            self._restore_spill()
+
+    def _restore_spill(self) -> None:
+        """Подхват записей, оставшихся в файле от прошлого запуска.
+
+        Файл удаляется только после полного чтения, поэтому после сбоя
+        часть записей может быть обработана повторно.
+        """
+        with open(self.spill_path, encoding='utf-8') as file:
+            self.spilled = sum(1 for line in file if line.strip())
+        self.unfinished = self.spilled
+
+    def __len__(self) -> int:
+        """Число записей в памяти и в файле."""
+        return len(self.items) + self.spilled
+
+    def _coalesce(self, key, item) -> bool:
+        """Объединение с последней ожидающей записью ключа key."""
+        for index in range(len(self.items) - 1, -1, -1):
+            pending_key, pending = self.items[index]
+            if pending_key == key:
+                merged = self.merge(pending, item)
+                if merged is None:
+                    return False
+                self.items[index] = (key, merged)
+                self.counters['coalesced'] += 1
+                return True
+        return False
+
+    def _spill(self, key, item) -> None:
+        """Запись в файл переполнения."""
+        with open(self.spill_path, 'a', encoding='utf-8') as file:
+            # Трассы не сохраняются: вместо них пишется null.
+            file.write(json.dumps([key, item], ensure_ascii=False,
+                                  default=lambda value: None) + '\n')
+        self.spilled += 1
+        self.counters['spilled'] += 1
+
+    def _refill(self) -> None:
+        """Перенос записей из файла в освободившуюся очередь."""
+        with open(self.spill_path, encoding='utf-8') as file:
+            file.seek(self.spill_offset)
+            while self.spilled and len(self.items) < self.maxsize:
+                line = file.readline()
+                if not line:
+                    break
+                if line.strip():
+                    key, item = json.loads(line)
+                    self.items.append((key, item))
+                    self.spilled -= 1
+            self.spill_offset = file.tell()
+        if not self.spilled:
+            os.remove(self.spill_path)
+            self.spill_offset = 0
+
+    def put(self, key, item) -> None:
+        """Постановка записи в очередь по политике переполнения."""
+        with self.condition:
+            self.counters['put'] += 1
+            if self.policy == 'coalesce' and len(self.items) >= self.maxsize:
+                if self._coalesce(key, item):
+                    return
+            if self.policy == 'spill' and (
+                    self.spilled or len(self.items) >= self.maxsize):
+                self._spill(key, item)
+                self.unfinished += 1
+                return
+            started = time.monotonic()
+            while len(self.items) >= self.maxsize:
+                self.condition.wait()
+            self.counters['blocked_seconds'] += time.monotonic() - started
+            self.items.append((key, item))
+            self.unfinished += 1
+            self.counters['max_depth'] = max(self.counters['max_depth'],
+                                             len(self.items))
+            self.condition.notify_all()
+
+    def get(self, timeout=None):
+        """Следующая пара (ключ, запись) или None по истечении timeout."""
+        with self.condition:
+            if not self.items and self.spilled:
+                self._refill()
+            if not self.items:
+                self.condition.wait(timeout)
+                if not self.items:
+                    return None
+            entry = self.items.popleft()
+            if self.spilled and len(self.items) < self.maxsize // 2:
+                self._refill()
+            self.condition.notify_all()
+            return entry
+
+    def task_done(self) -> None:
+        """Запись из get() обработана."""
+        with self.condition:
+            self.unfinished -= 1
+            self.condition.notify_all()
+
+    def metrics(self) -> dict:
+        """Глубина очереди и счётчики."""
+        with self.condition:
+            return {'depth': len(self.items), 'spilled_depth': self.spilled,
+                    **self.counters,
+                    'blocked_seconds': round(
+                        self.counters['blocked_seconds'], 3)}
+
+
+class Pipeline:
+    """Потоки разбора и доставки между двумя ограниченными очередями."""
+
+    def __init__(self, parse, send, size=100, policy='block',
+                 spill_dir=None, retry_delay=1.0, max_retry_delay=300.0,
+                 attempts=20, on_sent=None) -> None:
+        """Конвейер из функций parse(homework) и send(chat_id, text, key).
+
+        parse возвращает пары (чат, текст); key — ключ работы
+        из submit() или None у объединённых сообщений. send
+        повторяется до attempts раз с растущей паузой.
+        """
+        spill_dir = spill_dir or '.'
+        self.parse = parse
+        self.send = send
+        self.on_sent = on_sent
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.attempts = attempts
+        # Отложенные сообщения по чатам и очередь их повторов.
+        self.held: dict = {}
+        self.held_count = 0
+        self.retries: list = []
+        self.sequence = itertools.count()
+        self.inbox = BoundedQueue(
+            'parse', size, policy, merge=self._take_newer,
+            spill_path=os.path.join(spill_dir, 'pipeline_parse.jsonl'))
+        self.outbox = BoundedQueue(
+            'delivery', size, policy, merge=join_messages,
+            spill_path=os.path.join(spill_dir, 'pipeline_delivery.jsonl'))
+        self.stopped = threading.Event()
+        self.threads = [
+            threading.Thread(target=self._parse_loop, daemon=True,
+                             name='pipeline-parse'),
+            threading.Thread(target=self._send_loop, daemon=True,
+                             name='pipeline-send'),
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def submit(self, key, homework, trace=NOOP_TRACE) -> None:
+        """Постановка работы в очередь разбора.
+
+        trace — трасса работы; её завершит конвейер.
+        """
+        self.inbox.put(key, {'homework': homework, 'traces': [trace],
+                             'queued': time.time_ns()})
+
+    @staticmethod
+    def _take_newer(old, new):
+        """Объединение работ: остаётся новая, трасса старой завершается."""
+        for trace in traces(old):
+            trace.release()
+        return new
+
+    def _parse_loop(self) -> None:
+        """Разбор работ в сообщения для чатов."""
+        while not self.stopped.is_set():
+            entry = self.inbox.get(timeout=0.1)
+            if entry is None:
+                continue
+            key, item = entry
+            (trace,) = traces(item) or (NOOP_TRACE,)
+            trace.record('pipeline.parse_queue', item['queued'])
+            error = None
+            try:
+                with trace.span('parse_status'):
+                    messages = list(self.parse(item['homework']))
+                trace.hold(len(messages))
+                for chat_id, text in messages:
+                    self.outbox.put(chat_id, {
+                        'chat_id': chat_id, 'text': text, 'key': key,
+                        'updated': item['homework'].get('date_updated'),
+                        'traces': [trace], 'queued': time.time_ns()})
+            except Exception as caught:
+                error = repr(caught)
+                logger.error(f'Не удалось разобрать работу: {error}')
+            finally:
+                trace.release(error)
+                self.inbox.task_done()
+
+    def _attempt(self, message, attempt) -> bool:
+        """Попытка отправки; False, если её нужно повторить позже."""
+        started = time.time_ns()
+        if attempt == 1:
+            for trace in traces(message):
+                trace.record('pipeline.delivery_queue', message['queued'],
+                             started, chat_id=message['chat_id'])
+        try:
+            self.send(message['chat_id'], message['text'],
+                      message.get('key'))
+        except Exception as caught:
+            error = repr(caught)
+            logger.error(f'Попытка {attempt} отправки в чат '
+                         f'{message["chat_id"]} не удалась: {error}')
+        else:
+            self._record_attempt(message, started, attempt)
+            if self.on_sent is not None:
+                try:
+                    self.on_sent(message)
+                except Exception as caught:
+                    logger.error(f'Ошибка обработки отправленного '
+                                 f'сообщения: {caught!r}')
+            return True
+        if attempt < self.attempts:
+            self._record_attempt(message, started, attempt, error,
+                                 done=False)
+            return False
+        logger.error(f'Сообщение в чат {message["chat_id"]} отброшено '
+                     f'после {self.attempts} попыток')
+        self._record_attempt(message, started, attempt, error)
+        return True
+
+    @staticmethod
+    def _record_attempt(message, started, attempt, error=None,
+                        done=True) -> None:
+        """Спан попытки отправки; после последней трассы отпускаются."""
+        for trace in traces(message):
+            trace.record('send_message', started, error=error,
+                         chat_id=message['chat_id'], attempt=attempt)
+            if done:
+                trace.release(error)
+
+    def _schedule(self, chat_id, delay) -> None:
+        """Повтор отложенного сообщения чата через delay секунд."""
+        heapq.heappush(self.retries, (time.monotonic() + delay,
+                                      next(self.sequence), chat_id))
+
+    def _accept(self, message) -> None:
+        """Сообщение из очереди: отправка или ожидание за чатом."""
+        chat_id = message['chat_id']
+        held = self.held.get(chat_id)
+        if held is not None:
+            held['messages'].append(message)
+            self.held_count += 1
+        elif self._attempt(message, 1):
+            self.outbox.task_done()
+        else:
+            self.held[chat_id] = {'messages': deque([message]),
+                                  'attempt': 1, 'delay': self.retry_delay}
+            self.held_count += 1
+            self._schedule(chat_id, self.retry_delay)
+
+    def _retry(self, chat_id) -> None:
+        """Повтор первого отложенного сообщения чата."""
+        held = self.held[chat_id]
+        held['attempt'] += 1
+        if not self._attempt(held['messages'][0], held['attempt']):
+            held['delay'] = min(held['delay'] * 2, self.max_retry_delay)
+            self._schedule(chat_id, held['delay'])
+            return
+        held['messages'].popleft()
+        self.held_count -= 1
+        self.outbox.task_done()
+        if held['messages']:
+            held['attempt'] = 0
+            held['delay'] = self.retry_delay
+            self._schedule(chat_id, 0)
+        else:
+            del self.held[chat_id]
+
+    def _send_loop(self) -> None:
+        """Доставка сообщений из очереди и отложенные повторы."""
+        while not self.stopped.is_set():
+            wait = (self.retries[0][0] - time.monotonic()
+                    if self.retries else None)
+            if wait is not None and wait <= 0:
+                self._retry(heapq.heappop(self.retries)[2])
+                continue
+            if self.held_count >= self.outbox.maxsize:
+                self.stopped.wait(wait)
+                continue
+            entry = self.outbox.get(
+                timeout=0.1 if wait is None else min(wait, 0.1))
+            if entry is not None:
+                self._accept(entry[1])
+
+    def drain(self, timeout=None) -> bool:
+        """Ожидание обработки всех записей; False по таймауту."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for queue in (self.inbox, self.outbox):
+            with queue.condition:
+                while queue.unfinished:
+                    left = (None if deadline is None
+                            else deadline - time.monotonic())
+                    if left is not None and left <= 0:
+                        return False
+                    queue.condition.wait(left)
+        return True
+
+    def stop(self) -> None:
+        """Остановка потоков; записи в файлах переполнения сохраняются."""
+        self.stopped.set()
+        for thread in self.threads:
+            thread.join()
+
+    def metrics(self) -> dict:
+        """Метрики обеих очередей и число отложенных сообщений."""
+        metrics = {queue.name: queue.metrics()
+                   for queue in (self.inbox, self.outbox)}
+        metrics['delivery']['retrying'] = self.held_count
+        return metrics
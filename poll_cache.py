@@ -0,0 +1,190 @@
+"""Экономия трафика и процессора при опросе API без изменений.
+
+Почти каждый опрос ENDPOINT возвращает пустой список homeworks,
+и тело отличается от прошлого только полем current_date. Для каждого
+токена (значения заголовка Authorization) запоминаются:
+
+- ETag и Last-Modified ответа без работ: повторный запрос с теми же
+  параметрами уходит с If-None-Match/If-Modified-Since, и ответ
+  304 Not Modified заменяет тело. Ответ с работами условий
+  не получает: его могли не обработать (например, из-за ошибки
+  проверки), и 304 на повтор не должен его потерять; если сервер
+  всё же ответит 304, возвращается копия последнего тела;
+- хеш тела без значения current_date, если в нём не было работ:
+  такое же тело не декодируется из JSON, вместо него возвращается
+  готовый ответ без работ с новым current_date.
+
+Сжатие тела (gzip, deflate) запрашивается явно. Сэкономленные байты
+и оценка сэкономленного процессорного времени (по средней скорости
+декодирования) доступны в metrics().
+"""
+
+import copy
+import hashlib
+import re
+import threading
+import time
+
+ACCEPT_ENCODING = 'gzip, deflate'
+# Значение current_date в сыром теле ответа.
+CURRENT_DATE = re.compile(rb'"current_date"\s*:\s*(\d+)')
+# Сколько токенов помнить; при переполнении кэш очищается.
+MAX_ENTRIES = 100_000
+# Тела короче сравниваются без хеширования: это быстрее.
+HASH_MIN_SIZE = 256
+
+
+class PollEntry:
+    """Что известно о прошлом ответе для одного токена."""
+
+    __slots__ = ('params', 'etag', 'last_modified', 'current_date',
+                 'empty_digest', 'empty', 'data')
+
+    def __init__(self) -> None:
+        """Пустая запись."""
+        self.params = None
+        self.etag = None
+        self.last_modified = None
+        self.current_date = None
+        self.empty_digest = None
+        # Прошлый ответ был без работ; иначе data — его тело.
+        self.empty = False
+        self.data = None
+
+
+def body_digest(content):
+    """Хеш тела без значения current_date и само значение.
+
+    Короткое тело без значения служит хешем само. Если current_date
+    в теле нет, возвращается (None, None).
+    """
+    match = CURRENT_DATE.search(content)
+    if match is None:
+        return None, None
+    start, end = match.span(1)
+    if len(content) < HASH_MIN_SIZE:
+        return content[:start] + content[end:], int(match.group(1))
+    digest = hashlib.blake2b(content[:start], digest_size=16)
+    digest.update(content[end:])
+    return digest.digest(), int(match.group(1))
+
+
+def empty_response(current_date) -> dict:
+    """Ответ API без новых работ."""
+    return {'homeworks': [], 'current_date': current_date}
+
+
+class PollCache:
+    """Условные запросы и пропуск неизменных тел по токенам."""
+
+    def __init__(self, max_entries=MAX_ENTRIES) -> None:
+        """Пустой кэш не более чем на max_entries токенов."""
+        self.max_entries = max_entries
+        self.entries: dict = {}
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.not_modified = 0
+        self.unchanged = 0
+        self.wire_bytes = 0
+        self.body_bytes = 0
+        self.skipped_bytes = 0
+        self.decoded_bytes = 0
+        self.decode_seconds = 0.0
+
+    def _entry(self, key) -> PollEntry:
+        """Запись токена key, при необходимости новая."""
+        entry = self.entries.get(key)
+        if entry is None:
+            if len(self.entries) >= self.max_entries:
+                self.entries.clear()
+            entry = self.entries[key] = PollEntry()
+        return entry
+
+    def request_headers(self, headers, params) -> dict:
+        """Заголовки запроса с params: сжатие и условия по кэшу."""
+        headers = {**headers, 'Accept-Encoding': ACCEPT_ENCODING}
+        with self.lock:
+            self.requests += 1
+            entry = self.entries.get(headers.get('Authorization'))
+            if (entry is None or entry.params != params
+                    or not entry.empty):
+                return headers
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def cached(self, headers, params) -> dict:
+        """Ответ на 304 Not Modified: прошлый ответ.
+
+        Если прошлое тело с теми же params содержало работы,
+        возвращается его копия, иначе ответ без работ.
+        """
+        with self.lock:
+            self.not_modified += 1
+            entry = self.entries.get(headers.get('Authorization'))
+            if (entry is not None and entry.params == params
+                    and entry.data is not None):
+                return copy.deepcopy(entry.data)
+            current_date = None if entry is None else entry.current_date
+        return empty_response(
+            params['from_date'] if current_date is None else current_date)
+
+    def decode(self, headers, params, response):
+        """Тело ответа 200: из кэша, если не изменилось, иначе из JSON.
+
+        Ответы без сырого тела (content) просто декодируются.
+        """
+        content = getattr(response, 'content', None)
+        if not isinstance(content, bytes):
+            return response.json()
+        response_headers = getattr(response, 'headers', None) or {}
+        wire = len(content)
+        if response_headers.get('Content-Encoding') and response_headers.get(
+                'Content-Length', '').isdigit():
+            wire = int(response_headers['Content-Length'])
+        digest, current_date = body_digest(content)
+        key = headers.get('Authorization')
+        with self.lock:
+            self.wire_bytes += wire
+            self.body_bytes += len(content)
+            entry = self._entry(key)
+            entry.params = params
+            entry.etag = response_headers.get('ETag')
+            entry.last_modified = response_headers.get('Last-Modified')
+            entry.current_date = current_date
+            if digest is not None and digest == entry.empty_digest:
+                entry.empty = True
+                entry.data = None
+                self.unchanged += 1
+                self.skipped_bytes += len(content)
+                return empty_response(current_date)
+        started = time.perf_counter()
+        data = response.json()
+        elapsed = time.perf_counter() - started
+        empty = (isinstance(data, dict) and data.get('homeworks') == []
+                 and data.get('current_date') == current_date)
+        with self.lock:
+            self.decoded_bytes += len(content)
+            self.decode_seconds += elapsed
+            entry.empty_digest = digest if empty else None
+            entry.empty = empty
+            entry.data = None if empty else copy.deepcopy(data)
+        return data
+
+    def metrics(self) -> dict:
+        """Сэкономленные байты и оценка сэкономленного времени."""
+        with self.lock:
+            per_byte = (self.decode_seconds / self.decoded_bytes
+                        if self.decoded_bytes else 0.0)
+            return {
+                'requests': self.requests,
+                'not_modified': self.not_modified,
+                'unchanged': self.unchanged,
+                'wire_bytes': self.wire_bytes,
+                'compression_saved_bytes': self.body_bytes - self.wire_bytes,
+                'decode_skipped_bytes': self.skipped_bytes,
+                'decode_saved_seconds': round(
+                    per_byte * self.skipped_bytes, 6),
+            }
@@ -0,0 +1,147 @@
+"""Дискретно-событийный симулятор для подбора периода опроса.
+
+Опросы всех тенантов выполняются по модельным часам без time.sleep:
+очередь событий упорядочена по времени, и сутки работы бота для
+тысяч тенантов считаются за секунды. Студенты и ошибки API берутся
+из модели loadgen, ответы проходят через validate_response бота.
+Расписание опросов — то же, что у бота в режиме тенантов: ошибки
+учитывает Tenant.record_failure (карантин после отказов 401/404),
+паузу считает homework.next_poll_delay, разброс — как у колеса
+таймеров.
+
+Для каждой политики опроса выводится число запросов к API и
+перцентили задержки уведомления (от смены статуса до опроса, который
+её заметил).
+
+Запуск:
+    python simulator.py --tenants 1000 --days 1 --intervals 60 300 600
+"""
+
+import argparse
+import calendar
+import heapq
+import json
+import random
+import time
+
+import numpy as np
+
+import tenants
+from loadgen import LoadConfig, Student, pick_error
+
+PERCENTILES = (50, 95, 99)
+SECONDS_IN_DAY = 86400
+
+
+class PollingPolicy:
+    """Период опроса бота и разброс сроков, как у колеса таймеров."""
+
+    def __init__(self, interval=600.0, jitter=0.0) -> None:
+        """Политика с периодом interval и разбросом jitter секунд."""
+        self.interval = interval
+        self.jitter = jitter
+
+    def next_delay(self, tenant, now, rng) -> float:
+        """Пауза до следующего опроса тенанта, как в run_tenants."""
+        import homework
+
+        delay = homework.next_poll_delay(tenant, now, self.interval)
+        return delay + rng.randint(0, int(self.jitter))
+
+    def __repr__(self) -> str:
+        """Краткое описание политики."""
+        return (f'PollingPolicy(interval={self.interval}, '
+                f'jitter={self.jitter})')
+
+
+def parse_date(value) -> int:
+    """Unix-время из поля date_updated."""
+    return calendar.timegm(time.strptime(value, '%Y-%m-%dT%H:%M:%SZ'))
+
+
+def simulate(policy, config, days=1.0) -> dict:
+    """Прогон политики policy на популяции config за days суток."""
+    import homework
+
+    rng = random.Random(config.seed)
+    students = [
+        Student(number, config, random.Random(rng.random()), 0.0)
+        for number in range(config.students)
+    ]
+    horizon = days * SECONDS_IN_DAY
+    polled = [tenants.Tenant(str(number), '', [], timestamp=0)
+              for number in range(len(students))]
+    # Первые опросы равномерно распределены по периоду.
+    events = [(rng.uniform(0, policy.interval), number)
+              for number in range(len(students))]
+    heapq.heapify(events)
+    calls = 0
+    errors = 0
+    quarantines = 0
+    latencies = []
+    while events:
+        now, number = heapq.heappop(events)
+        if now > horizon:
+            break
+        calls += 1
+        tenant = polled[number]
+        status = pick_error(rng, config.error_rates)
+        if status is not None:
+            errors += 1
+            quarantines += tenant.record_failure(status, now)
+        else:
+            tenant.record_success()
+            response = {
+                'homeworks': students[number].changed_since(
+                    tenant.timestamp, now),
+                'current_date': int(now),
+            }
+            for record in homework.validate_response(response):
+                latencies.append(now - parse_date(record.date_updated))
+            tenant.timestamp = response['current_date']
+        heapq.heappush(events, (
+            now + policy.next_delay(tenant, now, rng), number))
+    result = {
+        'policy': repr(policy),
+        'api_calls': calls,
+        'api_calls_per_tenant_day': round(
+            calls / max(1, len(students)) / days, 1),
+        'errors': errors,
+        'quarantines': quarantines,
+        'notifications': len(latencies),
+    }
+    if latencies:
+        values = np.percentile(latencies, PERCENTILES)
+        result.update({f'latency_p{p}': round(float(value), 1)
+                       for p, value in zip(PERCENTILES, values)})
+        result['latency_max'] = round(max(latencies), 1)
+    return result
+
+
+def main() -> None:
+    """Точка входа командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--tenants', type=int, default=1000)
+    parser.add_argument('--days', type=float, default=1.0)
+    parser.add_argument('--intervals', type=float, nargs='+',
+                        default=[600.0])
+    parser.add_argument('--jitter', type=float, default=0.0)
+    parser.add_argument('--submissions-per-day', type=float, default=2.0)
+    parser.add_argument('--error-rate', type=float, nargs=2, action='append',
+                        metavar=('STATUS', 'RATE'), default=[])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    config = LoadConfig(
+        students=args.tenants,
+        submissions_per_day=args.submissions_per_day,
+        error_rates={int(status): rate for status, rate in args.error_rate},
+        seed=args.seed,
+    )
+    for interval in args.intervals:
+        policy = PollingPolicy(interval, args.jitter)
+        print(json.dumps(simulate(policy, config, args.days),
+                         ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,280 @@
+"""Приёмники уведомлений и параллельная рассылка по ним.
+
+Каждый приёмник обслуживается своей очередью и своими потоками,
+поэтому медленный приёмник не задерживает остальные.
+
+Пример файла настроек (путь задаётся переменной SINKS_CONFIG):
+    [
+        {"type": "telegram"},
+        {"type": "webhook", "url": "https://example.com/hook",
+         "batch_size": 20, "concurrency": 2, "retries": 3},
+        {"type": "file", "path": "verdicts.jsonl"}
+    ]
+"""
+
+import json
+import logging
+import queue
+import threading
+import time
+
+import requests  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+WEBHOOK_TIMEOUT = 10
+
+
+class PartialBatchError(Exception):
+    """Пачка принята не полностью: первые sent сообщений доставлены."""
+
+    def __init__(self, sent, error) -> None:
+        """Ошибка после доставки sent сообщений пачки."""
+        super().__init__(f'доставлено {sent} сообщений, затем: {error}')
+        self.sent = sent
+
+
+class Sink:
+    """Базовый приёмник уведомлений."""
+
+    name = 'sink'
+
+    def send_batch(self, messages) -> None:
+        """Отправка пачки сообщений.
+
+        Если часть пачки уже доставлена, выбрасывается PartialBatchError,
+        и повторяются только оставшиеся сообщения.
+        """
+        raise NotImplementedError
+
+
+class TelegramSink(Sink):
+    """Отправка сообщений в чат Telegram."""
+
+    name = 'telegram'
+
+    def __init__(self, bot, chat_id) -> None:
+        """Приёмник для чата chat_id."""
+        self.bot = bot
+        self.chat_id = chat_id
+
+    def send_batch(self, messages) -> None:
+        """Telegram не принимает пачки, сообщения уходят по одному."""
+        for sent, message in enumerate(messages):
+            try:
+                self.bot.send_message(chat_id=self.chat_id, text=message)
+            except Exception as error:
+                if not sent:
+                    raise
+                raise PartialBatchError(sent, error) from error
+
+
+class WebhookSink(Sink):
+    """Отправка пачки сообщений POST-запросом с JSON."""
+
+    name = 'webhook'
+
+    def __init__(self, url, timeout=WEBHOOK_TIMEOUT) -> None:
+        """Приёмник для адреса url."""
+        self.url = url
+        self.timeout = timeout
+
+    def send_batch(self, messages) -> None:
+        """Отправка пачки одним запросом."""
+        response = requests.post(
+            url=self.url, json={'messages': list(messages)},
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+
+
+class FileSink(Sink):
+    """Запись сообщений в файл JSONL."""
+
+    name = 'file'
+
+    def __init__(self, path) -> None:
+        """Приёмник для файла path."""
+        self.path = path
+        self.lock = threading.Lock()
+
+    def send_batch(self, messages) -> None:
+        """Дозапись пачки в файл."""
+        now = int(time.time())
+        lines = ''.join(
+            json.dumps({'time': now, 'text': message}, ensure_ascii=False)
+            + '\n' for message in messages
+        )
+        with self.lock, open(self.path, 'a', encoding='utf-8') as file:
+            file.write(lines)
+
+
+class RetryPolicy:
+    """Повторные попытки с экспоненциальной задержкой."""
+
+    def __init__(self, retries=3, delay=1.0, backoff=2.0) -> None:
+        """Число повторов, начальная задержка и множитель задержки."""
+        self.retries = retries
+        self.delay = delay
+        self.backoff = backoff
+
+    def run(self, func, *args) -> None:
+        """Вызов функции с повторами; последняя ошибка пробрасывается."""
+        delay = self.delay
+        for attempt in range(self.retries + 1):
+            try:
+                func(*args)
+                return
+            except Exception:
+                if attempt == self.retries:
+                    raise
+                time.sleep(delay)
+                delay *= self.backoff
+
+
+class SinkWorker:
+    """Очередь и потоки доставки одного приёмника."""
+
+    def __init__(self, sink, batch_size=1, concurrency=1,
+                 retry_policy=None) -> None:
+        """Запуск потоков доставки для приёмника."""
+        self.sink = sink
+        self.batch_size = max(1, batch_size)
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.queue: queue.Queue = queue.Queue()
+        self.threads = [
+            threading.Thread(target=self._run, daemon=True,
+                             name=f'sink-{sink.name}-{number}')
+            for number in range(max(1, concurrency))
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def put(self, message, done=None) -> None:
+        """Постановка сообщения в очередь без ожидания.
+
+        done(error) вызывается после доставки (error — None)
+        или после исчерпания попыток.
+        """
+        self.queue.put((message, done))
+
+    def _take_batch(self) -> list:
+        """Ожидание первого сообщения и добор пачки из очереди."""
+        batch = [self.queue.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _send_rest(self, pending) -> None:
+        """Отправка pending; доставленные сообщения убираются из списка."""
+        try:
+            self.sink.send_batch(pending)
+        except PartialBatchError as error:
+            del pending[:error.sent]
+            raise
+
+    def _run(self) -> None:
+        """Цикл доставки."""
+        while True:
+            batch = self._take_batch()
+            pending = [message for message, _ in batch]
+            error = None
+            try:
+                self.retry_policy.run(self._send_rest, pending)
+            except Exception as caught:
+                error = caught
+                logger.error(
+                    f'Приёмник {self.sink.name} не принял '
+                    f'{len(pending)} сообщений. Ошибка: {error}'
+                )
+            finally:
+                # Недоставленные сообщения — последние len(pending).
+                sent = len(batch) - len(pending) if error else len(batch)
+                for index, (_, done) in enumerate(batch):
+                    if done is not None:
+                        self._done(done, None if index < sent else error)
+                    self.queue.task_done()
+
+    def _done(self, done, error) -> None:
+        """Вызов done(error) сообщения; его ошибка только логируется."""
+        try:
+            done(error)
+        except Exception as caught:
+            logger.error(f'Ошибка обработки доставки в приёмник '
+                         f'{self.sink.name}: {caught!r}')
+
+    def join(self) -> None:
+        """Ожидание доставки всех поставленных сообщений."""
+        self.queue.join()
+
+
+class FanOut:
+    """Рассылка каждого сообщения во все приёмники."""
+
+    def __init__(self, workers) -> None:
+        """Рассылка по списку обработчиков приёмников."""
+        self.workers = list(workers)
+
+    def publish(self, message, delivered=None) -> None:
+        """Рассылка сообщения без ожидания доставки.
+
+        delivered() вызывается один раз, когда сообщение доставит
+        первый из приёмников.
+        """
+        done = None
+        if delivered is not None:
+            lock = threading.Lock()
+            reported = []
+
+            def done(error) -> None:
+                if error is not None:
+                    return
+                with lock:
+                    if reported:
+                        return
+                    reported.append(True)
+                delivered()
+
+        for worker in self.workers:
+            worker.put(message, done)
+
+    def join(self) -> None:
+        """Ожидание доставки во все приёмники."""
+        for worker in self.workers:
+            worker.join()
+
+
+def build_sink(config, bot, chat_id) -> Sink:
+    """Создание приёмника по описанию из файла настроек."""
+    sink_type = config.get('type')
+    if sink_type == 'telegram':
+        return TelegramSink(bot, config.get('chat_id', chat_id))
+    if sink_type == 'webhook':
+        return WebhookSink(config['url'],
+                           config.get('timeout', WEBHOOK_TIMEOUT))
+    if sink_type == 'file':
+        return FileSink(config['path'])
+    raise ValueError(f'Неизвестный тип приёмника: {sink_type}')
+
+
+def load_fan_out(path, bot, chat_id) -> FanOut:
+    """Создание рассылки по файлу настроек."""
+    with open(path, encoding='utf-8') as file:
+        configs = json.load(file)
+    workers = []
+    for config in configs:
+        retry_policy = RetryPolicy(
+            retries=config.get('retries', 3),
+            delay=config.get('retry_delay', 1.0),
+            backoff=config.get('retry_backoff', 2.0),
+        )
+        workers.append(SinkWorker(
+            build_sink(config, bot, chat_id),
+            batch_size=config.get('batch_size', 1),
+            concurrency=config.get('concurrency', 1),
+            retry_policy=retry_policy,
+        ))
+    return FanOut(workers)
@@ -0,0 +1,190 @@
+"""Длительный прогон main() с контролем утечек и дрейфа задержки.
+
+main() работает против локальных заменителей API Практикума и Bot API
+Telegram (stand_in.py) с RETRY_PERIOD = 0. Каждые --sample-every
+циклов снимаются RSS процесса, число открытых дескрипторов и среднее
+время цикла. В конце первое окно после прогрева сравнивается
+с последним; при превышении порогов процесс завершается с кодом 1.
+
+Запуск:
+    python soak.py --iterations 1000000 --sample-every 10000
+С --in-process API Практикума отвечает без сети, а сообщения
+считает OfflineBot: так быстрее, но сетевой стек не проверяется.
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+
+import requests  # type: ignore
+import telebot  # type: ignore
+
+from cassette import (OfflineBot, RunFinished, offline_settings,
+                      patched_attributes, patched_get, run_main)
+from loadgen import LoadConfig, LoadModel, in_process_get
+from stand_in import PracticumStandIn, TelegramStandIn
+
+
+class SoakFinished(RunFinished):
+    """Нужное число циклов выполнено."""
+
+
+def read_rss() -> int:
+    """Текущий RSS процесса в байтах."""
+    try:
+        with open('/proc/self/statm') as file:
+            pages = int(file.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        # Не Linux: доступен только пиковый RSS (в байтах на macOS).
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def count_fds() -> int:
+    """Число открытых файловых дескрипторов или -1."""
+    for path in ('/proc/self/fd', '/dev/fd'):
+        try:
+            return len(os.listdir(path))
+        except OSError:
+            continue
+    return -1
+
+
+class Sampler:
+    """Обёртка requests.get, считающая циклы main() и снимающая замеры.
+
+    Один запрос к API — один цикл main(); время цикла — интервал
+    между соседними запросами.
+    """
+
+    def __init__(self, get, iterations, sample_every) -> None:
+        """Замеры каждые sample_every из iterations циклов."""
+        self.get_inner = get
+        self.iterations = iterations
+        self.sample_every = sample_every
+        self.count = 0
+        self.last = None
+        self.window_total = 0.0
+        self.window_max = 0.0
+        self.samples: list = []
+
+    def _sample(self) -> None:
+        """Замер в конце окна."""
+        self.samples.append({
+            'iteration': self.count,
+            'rss_mb': round(read_rss() / 2 ** 20, 2),
+            'fds': count_fds(),
+            'cycle_ms': round(
+                self.window_total / self.sample_every * 1000, 4),
+            'cycle_max_ms': round(self.window_max * 1000, 4),
+        })
+        self.window_total = 0.0
+        self.window_max = 0.0
+
+    def get(self, *args, **kwargs):
+        """Учёт цикла и запрос."""
+        now = time.monotonic()
+        if self.last is not None:
+            cycle = now - self.last
+            self.window_total += cycle
+            self.window_max = max(self.window_max, cycle)
+        self.last = now
+        self.count += 1
+        if self.count % self.sample_every == 0:
+            self._sample()
+        if self.count > self.iterations:
+            raise SoakFinished
+        return self.get_inner(*args, **kwargs)
+
+
+def evaluate(samples, max_rss_growth_mb, max_fd_growth,
+             max_cycle_drift, warmup=0.1) -> dict:
+    """Сравнение первого окна после прогрева с последним."""
+    if len(samples) < 2:
+        return {'ok': False, 'reason': 'Слишком мало замеров'}
+    first = samples[min(len(samples) - 2, int(len(samples) * warmup))]
+    last = samples[-1]
+    rss_growth = last['rss_mb'] - first['rss_mb']
+    fd_growth = last['fds'] - first['fds']
+    drift = last['cycle_ms'] / first['cycle_ms'] if first['cycle_ms'] else 1
+    failures = []
+    if rss_growth > max_rss_growth_mb:
+        failures.append(f'RSS вырос на {rss_growth:.2f} МБ')
+    if fd_growth > max_fd_growth:
+        failures.append(f'Дескрипторов стало больше на {fd_growth}')
+    if drift > max_cycle_drift:
+        failures.append(f'Цикл замедлился в {drift:.2f} раза')
+    return {
+        'ok': not failures,
+        'reason': '; '.join(failures),
+        'rss_growth_mb': round(rss_growth, 2),
+        'fd_growth': fd_growth,
+        'cycle_drift': round(drift, 3),
+    }
+
+
+def soak(iterations, sample_every, in_process=False,
+         time_scale=3600.0) -> list:
+    """Прогон main() на iterations циклов; возвращает замеры."""
+    import homework
+
+    model = LoadModel(LoadConfig(students=1, submissions_per_day=24,
+                                 time_scale=time_scale, seed=0))
+    settings = offline_settings(homework)
+    settings['HEADERS'] = {'Authorization': f'OAuth {model.tokens()[0]}'}
+    saved_level = homework.logger.level
+    # Журнал каждого цикла сам по себе дал бы дрейф.
+    homework.logger.setLevel(logging.WARNING)
+    try:
+        if in_process:
+            sampler = Sampler(in_process_get(model), iterations,
+                              sample_every)
+            settings['TeleBot'] = OfflineBot
+            with patched_attributes(homework, **settings), \
+                    patched_get(sampler.get):
+                run_main(homework)
+        else:
+            with PracticumStandIn(model) as practicum, \
+                    TelegramStandIn() as telegram:
+                sampler = Sampler(requests.get, iterations,
+                                  sample_every)
+                settings['ENDPOINT'] = practicum.url
+                with patched_attributes(homework, **settings), \
+                        patched_attributes(telebot.apihelper,
+                                           API_URL=telegram.api_url), \
+                        patched_get(sampler.get):
+                    run_main(homework)
+    finally:
+        homework.logger.setLevel(saved_level)
+    return sampler.samples
+
+
+def main() -> None:
+    """Точка входа командной строки."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=100_000)
+    parser.add_argument('--sample-every', type=int, default=1000)
+    parser.add_argument('--in-process', action='store_true')
+    parser.add_argument('--max-rss-growth-mb', type=float, default=10.0)
+    parser.add_argument('--max-fd-growth', type=int, default=5)
+    parser.add_argument('--max-cycle-drift', type=float, default=2.0)
+    parser.add_argument('--samples', action='store_true',
+                        help='Вывести все замеры.')
+    args = parser.parse_args()
+    samples = soak(args.iterations, args.sample_every, args.in_process)
+    verdict = evaluate(samples, args.max_rss_growth_mb, args.max_fd_growth,
+                       args.max_cycle_drift)
+    if args.samples:
+        for sample in samples:
+            print(json.dumps(sample))
+    print(json.dumps(verdict, ensure_ascii=False))
+    sys.exit(0 if verdict['ok'] else 1)
+
+
+if __name__ == '__main__':
+    main()
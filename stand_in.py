@@ -0,0 +1,188 @@
+"""Локальные HTTP-заменители внешних API для нагрузочных прогонов."""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+PRACTICUM_PATH = '/api/user_api/homework_statuses/'
+
+
+class StandInServer:
+    """HTTP-сервер на свободном порту localhost в отдельном потоке."""
+
+    handler_class = BaseHTTPRequestHandler
+
+    def __init__(self) -> None:
+        """Сервер создаётся и запускается в start()."""
+        self.server = None
+        self.thread = None
+
+    @property
+    def base_url(self) -> str:
+        """Адрес сервера."""
+        host, port = self.server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        """Запуск сервера."""
+        handler = type('Handler', (self.handler_class,), {'stand_in': self})
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Остановка сервера."""
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        """Запуск в блоке with."""
+        return self.start()
+
+    def __exit__(self, *args) -> None:
+        """Остановка по выходу из блока with."""
+        self.stop()
+
+
+class JSONHandler(BaseHTTPRequestHandler):
+    """Обработчик с ответами в JSON и без журнала запросов."""
+
+    protocol_version = 'HTTP/1.1'
+    # Заголовки и тело пишутся отдельно; без этого каждый ответ
+    # ждал бы отложенного ACK клиента (~40 мс).
+    disable_nagle_algorithm = True
+
+    def send_json(self, status, data) -> None:
+        """Ответ с телом в JSON."""
+        body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+        self.send_response(int(status))
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        """Журнал запросов отключён."""
+
+
+class PracticumHandler(JSONHandler):
+    """Ответы API Практикума из модели нагрузки."""
+
+    def do_GET(self) -> None:
+        """Запрос статусов домашних работ."""
+        url = urlsplit(self.path)
+        if url.path != PRACTICUM_PATH:
+            self.send_json(404, {'detail': 'Not found'})
+            return
+        from_date = parse_qs(url.query).get('from_date', [None])[0]
+        token = self.headers.get('Authorization', '')[len('OAuth '):]
+        status, data = self.stand_in.model.respond(token, from_date)
+        self.send_json(status, data)
+
+
+class PracticumStandIn(StandInServer):
+    """Заменитель API Практикума поверх loadgen.LoadModel."""
+
+    handler_class = PracticumHandler
+
+    def __init__(self, model) -> None:
+        """Сервер, отвечающий из модели model."""
+        super().__init__()
+        self.model = model
+
+    @property
+    def url(self) -> str:
+        """Адрес для подстановки в ENDPOINT."""
+        return self.base_url + PRACTICUM_PATH
+
+
+class TelegramHandler(JSONHandler):
+    """Ответы Bot API Telegram: сообщения только считаются."""
+
+    def _handle(self) -> None:
+        """Обработка вызова метода /bot<token>/<method>."""
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        url = urlsplit(self.path)
+        method = url.path.rsplit('/', 1)[-1]
+        params = {key: values[0]
+                  for key, values in parse_qs(url.query).items()}
+        if self.headers.get('Content-Type') == 'application/json' and body:
+            params.update({key: str(value) for key, value
+                           in json.loads(body).items()})
+        if params.get('chat_id') in self.stand_in.failing_chats:
+            self.send_json(403, {'ok': False, 'error_code': 403,
+                                 'description': 'Forbidden: bot was '
+                                                'blocked by the user'})
+            return
+        if self.stand_in.throttle(params.get('chat_id')):
+            self.send_json(429, {
+                'ok': False, 'error_code': 429,
+                'description': 'Too Many Requests',
+                'parameters': {'retry_after': self.stand_in.retry_after}})
+            return
+        result = self.stand_in.call(method, params)
+        if result is None:
+            self.send_json(404, {'ok': False, 'error_code': 404,
+                                 'description': 'Not Found'})
+        else:
+            self.send_json(200, {'ok': True, 'result': result})
+
+    do_GET = _handle
+    do_POST = _handle
+
+
+class TelegramStandIn(StandInServer):
+    """Заменитель Bot API: для telebot задайте apihelper.API_URL = api_url."""
+
+    handler_class = TelegramHandler
+
+    def __init__(self) -> None:
+        """Сервер со счётчиком сообщений."""
+        super().__init__()
+        self.lock = threading.Lock()
+        self.messages = 0
+        self.edits = 0
+        # Чаты, отправка в которые завершается ошибкой 403.
+        self.failing_chats: set = set()
+        # Сколько раз ответить 429 на отправку в чат.
+        self.throttled_chats: dict = {}
+        self.retry_after = 1
+
+    @property
+    def api_url(self) -> str:
+        """Шаблон адреса в формате telebot.apihelper.API_URL."""
+        return self.base_url + '/bot{0}/{1}'
+
+    def throttle(self, chat_id) -> bool:
+        """Ответить ли 429 на вызов для чата chat_id."""
+        with self.lock:
+            remaining = self.throttled_chats.get(chat_id, 0)
+            if remaining <= 0:
+                return False
+            self.throttled_chats[chat_id] = remaining - 1
+            return True
+
+    def call(self, method, params):
+        """Результат метода API или None для неизвестного метода."""
+        chat_id = params.get('chat_id', '0')
+        chat = {'id': int(chat_id) if chat_id.lstrip('-').isdigit() else 0,
+                'type': 'private'}
+        with self.lock:
+            if method == 'sendMessage':
+                self.messages += 1
+                message_id = self.messages
+            elif method == 'editMessageText':
+                self.edits += 1
+                message_id = int(params.get('message_id', 0))
+            elif method == 'getMe':
+                return {'id': 1, 'is_bot': True, 'first_name': 'stand-in',
+                        'username': 'stand_in_bot'}
+            else:
+                return None
+        return {'message_id': message_id, 'date': 0, 'chat': chat,
+                'text': params.get('text', '')}
@@ -0,0 +1,74 @@
+"""Локальная копия последних ответов API для команд бота.
+
+Кэш пополняется только опросом API; команды читают его и никогда
+не обращаются к ENDPOINT. Данные старше ttl не показываются.
+"""
+
+import threading
+import time
+from collections import deque
+
+# Сколько последних смен статуса помнить на тенанта.
+HISTORY_SIZE = 20
+
+
+class TenantStatus:
+    """Последние статусы работ и история смен для одного тенанта."""
+
+    def __init__(self, history_size) -> None:
+        """Пустое состояние."""
+        self.updated = 0.0
+        self.homeworks: dict = {}
+        self.history: deque = deque(maxlen=history_size)
+
+    def copy(self):
+        """Копия, которую можно читать без блокировки кэша."""
+        state = TenantStatus(self.history.maxlen)
+        state.updated = self.updated
+        state.homeworks = dict(self.homeworks)
+        state.history.extend(self.history)
+        return state
+
+
+class StatusCache:
+    """Статусы работ по тенантам с ограничением свежести ttl."""
+
+    def __init__(self, ttl, history_size=HISTORY_SIZE) -> None:
+        """Кэш, данные которого устаревают через ttl секунд."""
+        self.ttl = ttl
+        self.history_size = history_size
+        self.lock = threading.Lock()
+        self.tenants: dict = {}
+
+    def update(self, tenant, homeworks, now=None) -> None:
+        """Учёт успешного опроса API тенантом tenant."""
+        with self.lock:
+            state = self.tenants.get(tenant)
+            if state is None:
+                state = TenantStatus(self.history_size)
+                self.tenants[tenant] = state
+            state.updated = time.time() if now is None else now
+            for homework in homeworks:
+                key = homework.get('id', homework.get('homework_name'))
+                state.homeworks[key] = dict(homework)
+                state.history.append(dict(homework))
+
+    def get(self, tenant, now=None):
+        """Копия свежего состояния тенанта или None.
+
+        Данные старше ttl считаются отсутствующими. Копия снимается
+        под блокировкой, поэтому опрос не меняет её во время чтения.
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            state = self.tenants.get(tenant)
+            if state is None or now - state.updated > self.ttl:
+                return None
+            return state.copy()
+
+    def age(self, tenant, now=None):
+        """Возраст данных тенанта в секундах или None."""
+        now = time.time() if now is None else now
+        with self.lock:
+            state = self.tenants.get(tenant)
+            return None if state is None else now - state.updated
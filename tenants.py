@@ -0,0 +1,258 @@
+"""Получатели уведомлений (тенанты) и их подписки на чаты.
+
+Пример файла настроек (путь задаётся переменной TENANTS_CONFIG):
+    [
+        {"name": "student", "practicum_token": "...",
+         "chat_ids": ["12345", "67890", "-100123456"],
+         "locale": "ru", "chat_locales": {"67890": "en"},
+         "templates": {"en": {"change": "{name}: {verdict}"}},
+         "weight": 2}
+    ]
+
+Необязательные locale и chat_locales задают язык уведомлений тенанта
+и отдельных чатов, templates — свои шаблоны тенанта по языкам,
+см. verdict_templates.py. weight — доля тенанта в очереди отправки
+относительно остальных (по умолчанию 1), см. delivery.py.
+
+Тенант, токен которого QUARANTINE_AFTER раз подряд отклоняется
+с кодом 401 или 404, уходит на карантин: его опрос пропускается,
+а повторные проверки идут через QUARANTINE_BASE, 2 * QUARANTINE_BASE
+и так далее до QUARANTINE_MAX секунд.
+
+TenantRegistry перечитывает файл при изменении и применяет разницу:
+новые тенанты добавляются, удалённые убираются, у тенанта с новым
+токеном меняется только токен. Курсоры опроса остальных не меняются.
+"""
+
+import json
+import os
+import threading
+import time
+from http import HTTPStatus
+
+from error_digest import ErrorDigest
+from verdict_templates import compile_template
+
+QUARANTINE_STATUSES = frozenset({HTTPStatus.UNAUTHORIZED,
+                                 HTTPStatus.NOT_FOUND})
+QUARANTINE_AFTER = 3
+QUARANTINE_BASE = 600
+QUARANTINE_MAX = 24 * 60 * 60
+
+
+class Tenant:
+    """Токен Практикума и список чатов, подписанных на его вердикты."""
+
+    def __init__(self, name, practicum_token, chat_ids,
+                 timestamp=None, locale=None, chat_locales=None,
+                 templates=None, weight=1) -> None:
+        """Тенант с курсором опроса timestamp."""
+        self.name = name
+        self.practicum_token = practicum_token
+        self.chat_ids = list(chat_ids)
+        self.locale = locale
+        self.chat_locales = dict(chat_locales or {})
+        self.templates = templates or {}
+        self.weight = weight
+        # Чаты, сгруппированные по наборам шаблонов; None — пересчитать.
+        self.chat_groups = None
+        self.timestamp = (
+            int(time.time()) if timestamp is None else timestamp
+        )
+        # Ошибки опроса тенанта: первая сразу, повторы сводкой.
+        self.errors = ErrorDigest()
+        # Флаг, что в чаты тенанта не удаётся ничего отправить.
+        self.cant_send = False
+        # Ошибки опроса подряд и состояние карантина.
+        self.failures = 0
+        self.quarantine_level = 0
+        self.quarantined_until = 0.0
+
+    @property
+    def headers(self) -> dict:
+        """Заголовки запроса к API Практикума."""
+        return {'Authorization': f'OAuth {self.practicum_token}'}
+
+    def in_quarantine(self, now=None) -> bool:
+        """Пропускать ли опрос тенанта сейчас."""
+        now = time.time() if now is None else now
+        return now < self.quarantined_until
+
+    def record_success(self) -> None:
+        """Учёт успешного опроса: карантин и ошибки сбрасываются."""
+        self.cant_send = False
+        self.failures = 0
+        self.quarantine_level = 0
+        self.quarantined_until = 0.0
+
+    def record_failure(self, status=None, now=None) -> bool:
+        """Учёт ошибки опроса; True, если тенант ушёл на карантин.
+
+        status — код ответа API или None для ошибок без кода.
+        Считаются только отказы 401 и 404 подряд: другая ошибка
+        сбрасывает счётчик.
+        """
+        if status not in QUARANTINE_STATUSES:
+            self.failures = 0
+            return False
+        self.failures += 1
+        if self.failures < QUARANTINE_AFTER:
+            return False
+        now = time.time() if now is None else now
+        delay = QUARANTINE_BASE * 2 ** self.quarantine_level
+        if delay < QUARANTINE_MAX:
+            self.quarantine_level += 1
+        self.quarantined_until = now + min(delay, QUARANTINE_MAX)
+        return True
+
+    def snapshot(self) -> dict:
+        """Курсор и состояние ошибок для передачи новому процессу."""
+        return {
+            'timestamp': self.timestamp,
+            'errors': self.errors.snapshot(),
+            'cant_send': self.cant_send,
+            'failures': self.failures,
+            'quarantine_level': self.quarantine_level,
+            'quarantined_until': self.quarantined_until,
+        }
+
+    def restore(self, state) -> None:
+        """Состояние из snapshot() прежнего процесса."""
+        self.timestamp = state['timestamp']
+        if 'errors' in state:
+            self.errors.restore(state['errors'])
+        self.cant_send = state['cant_send']
+        self.failures = state['failures']
+        self.quarantine_level = state['quarantine_level']
+        self.quarantined_until = state['quarantined_until']
+
+    def configure(self, other) -> None:
+        """Чаты, языки и вес из нового описания того же тенанта."""
+        self.chat_ids = other.chat_ids
+        self.locale = other.locale
+        self.chat_locales = other.chat_locales
+        self.templates = other.templates
+        self.weight = other.weight
+        self.chat_groups = None
+
+    def rekey(self, practicum_token) -> None:
+        """Смена токена; курсор опроса сохраняется, карантин снимается."""
+        self.practicum_token = practicum_token
+        self.record_success()
+
+    def __repr__(self) -> str:
+        """Представление без токена."""
+        return f'Tenant({self.name!r}, chats={len(self.chat_ids)})'
+
+
+def parse_chat_ids(value) -> list:
+    """Список чатов из строки через запятую."""
+    if not value:
+        return []
+    return [chat_id.strip() for chat_id in value.split(',')
+            if chat_id.strip()]
+
+
+def tenant_from_config(config) -> Tenant:
+    """Создание тенанта по описанию из файла настроек."""
+    try:
+        name = config['name']
+        token = config['practicum_token']
+        chat_ids = [str(chat_id) for chat_id in config['chat_ids']]
+    except (KeyError, TypeError) as error:
+        raise ValueError(f'Неверное описание тенанта: {config}') from error
+    if not chat_ids:
+        raise ValueError(f'У тенанта {name} нет чатов для уведомлений')
+    chat_locales = config.get('chat_locales') or {}
+    templates = config.get('templates') or {}
+    if not isinstance(chat_locales, dict) or not isinstance(templates, dict):
+        raise ValueError(f'Неверные языки или шаблоны тенанта {name}')
+    for template in templates.values():
+        if not isinstance(template, dict) or not isinstance(
+                template.get('verdicts') or {}, dict):
+            raise ValueError(f'Неверные шаблоны тенанта {name}')
+        if template.get('change'):
+            compile_template(template['change'], '')
+    weight = config.get('weight', 1)
+    if (not isinstance(weight, (int, float)) or isinstance(weight, bool)
+            or weight <= 0):
+        raise ValueError(f'Вес тенанта {name} должен быть больше нуля')
+    return Tenant(name, token, chat_ids, locale=config.get('locale'),
+                  chat_locales={str(chat_id): locale for chat_id, locale
+                                in chat_locales.items()},
+                  templates=templates, weight=weight)
+
+
+def load_tenants(path) -> list:
+    """Загрузка тенантов из файла настроек."""
+    with open(path, encoding='utf-8') as file:
+        configs = json.load(file)
+    tenants = [tenant_from_config(config) for config in configs]
+    names = [tenant.name for tenant in tenants]
+    if len(set(names)) != len(names):
+        raise ValueError('Имена тенантов должны быть уникальными')
+    return tenants
+
+
+class TenantRegistry:
+    """Тенанты из файла настроек с перечитыванием при изменении."""
+
+    def __init__(self, path) -> None:
+        """Реестр из файла path; ошибка в файле прерывает создание."""
+        self.path = path
+        self.tenants: dict = {}
+        self.signature = None
+        self.reload_requested = threading.Event()
+        self.reload()
+
+    def __iter__(self):
+        """Перебор тенантов."""
+        return iter(list(self.tenants.values()))
+
+    def __len__(self) -> int:
+        """Число тенантов."""
+        return len(self.tenants)
+
+    def _signature(self) -> tuple:
+        """Время изменения и размер файла."""
+        stat = os.stat(self.path)
+        return stat.st_mtime_ns, stat.st_size
+
+    def request_reload(self) -> None:
+        """Запрос перечитывания, например по SIGHUP."""
+        self.reload_requested.set()
+
+    def changed(self) -> bool:
+        """Нужно ли перечитать файл."""
+        if self.reload_requested.is_set():
+            return True
+        try:
+            return self._signature() != self.signature
+        except OSError:
+            return False
+
+    def reload(self) -> tuple:
+        """Перечитывание файла.
+
+        Возвращает списки добавленных, удалённых и сменивших токен
+        тенантов. При ошибке в файле реестр не меняется, а повторная попытка
+        будет после следующего изменения файла.
+        """
+        self.reload_requested.clear()
+        self.signature = self._signature()
+        fresh = load_tenants(self.path)
+        names = {tenant.name for tenant in fresh}
+        removed = [self.tenants.pop(name) for name in list(self.tenants)
+                   if name not in names]
+        added, rekeyed = [], []
+        for tenant in fresh:
+            current = self.tenants.get(tenant.name)
+            if current is None:
+                self.tenants[tenant.name] = tenant
+                added.append(tenant)
+                continue
+            if current.practicum_token != tenant.practicum_token:
+                current.rekey(tenant.practicum_token)
+                rekeyed.append(current)
+            current.configure(tenant)
+        return added, removed, rekeyed
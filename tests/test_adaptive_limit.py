@@ -0,0 +1,86 @@
+import threading
+from http import HTTPStatus
+
+import pytest
+import requests
+
+import adaptive_limit
+import tests.check_utils as check_utils
+from adaptive_limit import AdaptiveLimit
+
+
+class TestAdaptiveLimit:
+
+    def test_additive_increase(self):
+        limit = AdaptiveLimit(initial=2, max_limit=4)
+        for _ in range(20):
+            with limit.slot():
+                pass
+        assert limit.metrics()['limit'] == 4
+        assert limit.metrics()['calls'] == 20
+
+    def test_multiplicative_decrease(self, homework_module, monkeypatch):
+        limit = AdaptiveLimit(initial=16)
+        for error in (homework_module.APIStatusError('сбой', 503),
+                      requests.Timeout('таймаут')):
+            monkeypatch.setattr(limit, 'last_decrease', -10.0)
+            with pytest.raises(Exception):
+                with limit.slot():
+                    raise error
+        assert limit.limit == 4
+        with pytest.raises(homework_module.APIStatusError):
+            with limit.slot():
+                raise homework_module.APIStatusError('нет доступа', 401)
+        assert limit.limit > 4, 'Ошибка 401 не говорит о перегрузке.'
+
+    def test_burst_decreases_once(self):
+        limit = AdaptiveLimit(initial=16)
+        limit.latency = limit.baseline = 10.0
+        for _ in range(5):
+            with limit.slot() as slot:
+                slot.overloaded = True
+        assert limit.limit == 8
+
+    def test_wrapped_telegram_error(self, homework_module):
+        try:
+            raise homework_module.NoSendMessageError('сбой') from (
+                adaptive_limit.requests.HTTPError('x'))
+        except homework_module.NoSendMessageError as error:
+            assert not adaptive_limit.is_overload(error)
+        error = homework_module.NoSendMessageError('сбой')
+        error.__cause__ = type('E', (Exception,), {'error_code': 429})()
+        assert adaptive_limit.is_overload(error)
+
+    def test_in_flight_is_bounded(self):
+        limit = AdaptiveLimit(initial=2, max_limit=2)
+        release = threading.Event()
+        peak = []
+
+        def call():
+            with limit.slot():
+                peak.append(limit.in_flight)
+                release.wait(1)
+
+        threads = [threading.Thread(target=call) for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+        assert max(peak) <= 2
+
+    def test_api_polls_use_limit(self, homework_module, monkeypatch):
+        limit = AdaptiveLimit(initial=4)
+        monkeypatch.setattr(homework_module, 'API_LIMIT', limit)
+
+        def get(*args, **kwargs):
+            return check_utils.MockResponseGET(
+                http_status=HTTPStatus.SERVICE_UNAVAILABLE)
+
+        monkeypatch.setattr('requests.get', get)
+        with pytest.raises(homework_module.APIStatusError):
+            homework_module.get_api_answer(0)
+        assert limit.calls == 1 and limit.overloads == 1, (
+            'Опрос API идёт в пределах API_LIMIT, 5xx уменьшает предел.'
+        )
+        assert limit.limit < 4
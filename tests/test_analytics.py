@@ -0,0 +1,115 @@
+import json
+
+import pytest
+
+
+@pytest.fixture
+def history_file(tmp_path):
+    records = [
+        (1, 'reviewing', '2024-06-01T10:00:00Z', 'Бот'),
+        (1, 'reviewing', '2024-06-01T10:00:00Z', 'Бот'),
+        (1, 'rejected', '2024-06-01T12:00:00Z', 'Бот'),
+        (1, 'reviewing', '2024-06-02T10:00:00Z', 'Бот'),
+        (1, 'approved', '2024-06-02T11:00:00Z', 'Бот'),
+        (2, 'reviewing', '2024-06-01T09:00:00Z', 'API'),
+        (2, 'approved', '2024-06-01T09:30:00Z', 'API'),
+    ]
+    path = tmp_path / 'history.jsonl'
+    with open(path, 'w', encoding='utf-8') as file:
+        for hw_id, status, date, lesson in records:
+            file.write(json.dumps({
+                'id': hw_id, 'status': status,
+                'date_updated': date, 'lesson_name': lesson,
+            }) + '\n')
+    return path
+
+
+class TestAnalytics:
+
+    def test_report(self, history_file):
+        import analytics
+        report = analytics.build_report(analytics.load_history(history_file))
+        assert report['records'] == 6, (
+            'Повторы одного статуса должны отбрасываться.'
+        )
+        assert report['homeworks'] == 2
+        transitions = report['transitions']
+        assert transitions['reviewing->approved']['count'] == 2
+        assert transitions['reviewing->approved']['p50'] == 2700
+        assert transitions['reviewing->rejected']['p50'] == 7200
+        assert report['turnaround']['count'] == 2
+        assert report['rejections']['rate'] == pytest.approx(1 / 2)
+        assert report['rejections']['verdicts'] == 3
+        assert report['rejections']['by_lesson']['API'] == 0
+        assert report['throughput']['days'] == 2
+
+    def test_npz_roundtrip(self, history_file, tmp_path):
+        import analytics
+        columns = analytics.load_history(history_file)
+        npz_path = tmp_path / 'history.npz'
+        analytics.save_history(columns, npz_path)
+        assert (
+            analytics.build_report(analytics.load_history(npz_path))
+            == analytics.build_report(columns)
+        )
+
+    def test_unknown_status_does_not_collide(self, tmp_path):
+        import analytics
+        records = [
+            (3, 'approved', '2024-06-01T10:00:00Z'),
+            (3, 'rejected', '2024-06-01T11:00:00Z'),
+            (4, 'reviewing', '2024-06-01T10:00:00Z'),
+            (4, 'returned', '2024-06-01T10:05:00Z'),
+        ]
+        path = tmp_path / 'history.jsonl'
+        with open(path, 'w', encoding='utf-8') as file:
+            for hw_id, status, date in records:
+                file.write(json.dumps({'id': hw_id, 'status': status,
+                                       'date_updated': date}) + '\n')
+        transitions = analytics.transition_stats(
+            analytics.prepare(analytics.load_history(path)))
+        assert transitions['approved->rejected']['count'] == 1, (
+            'Переходы с неизвестным статусом не попадают в чужую пару.'
+        )
+
+    def test_rejections_count_homeworks_once(self, tmp_path):
+        import analytics
+        records = [
+            (5, 'rejected', '2024-06-01T10:00:00Z'),
+            (5, 'reviewing', '2024-06-01T11:00:00Z'),
+            (5, 'rejected', '2024-06-01T12:00:00Z'),
+            (5, 'reviewing', '2024-06-01T13:00:00Z'),
+            (5, 'rejected', '2024-06-01T14:00:00Z'),
+            (6, 'approved', '2024-06-01T10:00:00Z'),
+            (7, 'approved', '2024-06-01T10:00:00Z'),
+        ]
+        path = tmp_path / 'history.jsonl'
+        with open(path, 'w', encoding='utf-8') as file:
+            for hw_id, status, date in records:
+                file.write(json.dumps({'id': hw_id, 'status': status,
+                                       'date_updated': date}) + '\n')
+        rejections = analytics.build_report(
+            analytics.load_history(path))['rejections']
+        assert rejections['homeworks'] == 3
+        assert rejections['rate'] == pytest.approx(1 / 3), (
+            'Работа, возвращённая трижды, считается один раз.'
+        )
+
+    def test_bad_records_skipped(self, tmp_path, caplog):
+        import analytics
+        path = tmp_path / 'history.jsonl'
+        path.write_text('\n'.join([
+            json.dumps({'id': 8, 'status': 'approved',
+                        'date_updated': '2024-06-01T10:00:00Z'}),
+            json.dumps({'status': 'approved',
+                        'date_updated': '2024-06-01T10:00:00Z'}),
+            json.dumps({'id': 9, 'status': 'approved',
+                        'date_updated': 'вчера'}),
+            '{"id": 10, "status":',
+            '[]',
+        ]) + '\n', encoding='utf-8')
+        columns = analytics.load_history(path)
+        assert columns['id'].tolist() == [8], (
+            'Записи без id, с битой датой или JSON пропускаются.'
+        )
+        assert 'Пропущено повреждённых записей: 4' in caplog.text
@@ -0,0 +1,126 @@
+import threading
+import time
+
+import pytest
+
+from async_delivery import AsyncDelivery
+from delivery import ALERT
+from stand_in import TelegramStandIn
+
+UNLIMITED = 10 ** 9
+
+
+@pytest.fixture
+def telegram():
+    with TelegramStandIn() as stand_in:
+        yield stand_in
+
+
+def make_delivery(homework_module, telegram, pool_size=4):
+    return AsyncDelivery('1:test', homework_module.send_to_chat_async,
+                         api_url=telegram.api_url, pool_size=pool_size,
+                         global_rate=UNLIMITED, chat_rate=UNLIMITED)
+
+
+class TestAsyncDelivery:
+
+    def test_pooled_connections(self, homework_module, telegram):
+        delivery = make_delivery(homework_module, telegram)
+        chat_ids = [str(number) for number in range(1, 51)]
+        assert delivery.deliver(chat_ids, 'вердикт') == {}
+        assert delivery.deliver(chat_ids, 'вердикт') == {}
+        opened = delivery.client.pool.opened
+        delivery.shutdown()
+        assert telegram.messages == 100
+        assert opened <= 4, 'Соединения должны переиспользоваться.'
+
+    def test_errors_map_to_no_send(self, homework_module, telegram):
+        telegram.failing_chats.add('2')
+        delivery = make_delivery(homework_module, telegram)
+        failures = delivery.deliver(['1', '2', '3'], 'вердикт')
+        assert list(failures) == ['2']
+        assert isinstance(failures['2'], homework_module.NoSendMessageError)
+        assert failures['2'].__cause__.error_code == 403
+        with pytest.raises(homework_module.NoSendMessageError):
+            homework_module.broadcast(delivery, ['2'], 'вердикт')
+        delivery.shutdown()
+        assert telegram.messages == 2
+
+    def test_sync_sender_fallback(self, homework_module, telegram):
+        delivery = make_delivery(homework_module, telegram)
+        sent = []
+        failures = delivery.deliver(
+            ['1', '2'], 'вердикт',
+            send=lambda chat_id, text: sent.append(chat_id))
+        delivery.shutdown()
+        assert failures == {} and sorted(sent) == ['1', '2']
+        assert telegram.messages == 0
+
+    def test_verdict_overtakes_alerts(self, homework_module, telegram):
+        delivery = AsyncDelivery('1:test', homework_module.send_to_chat_async,
+                                 api_url=telegram.api_url, global_rate=10,
+                                 chat_rate=UNLIMITED)
+        sent = []
+
+        def send(chat_id, text):
+            sent.append(chat_id)
+
+        alerts = [f'alert-{number}' for number in range(10)]
+        flood = threading.Thread(target=delivery.deliver, args=(
+            alerts, 'Сбой', send), kwargs={'priority': ALERT})
+        flood.start()
+        time.sleep(0.05)
+        delivery.deliver(['verdict'], 'вердикт', send)
+        flood.join()
+        delivery.shutdown()
+        assert sent.index('verdict') < len(alerts) - 2, (
+            'Вердикт не ждёт, пока уйдут все сообщения об ошибках.'
+        )
+
+    def test_too_many_requests_retried(self, homework_module, telegram):
+        telegram.throttled_chats['1'] = 1
+        telegram.retry_after = 0.2
+        delivery = make_delivery(homework_module, telegram)
+        started = time.monotonic()
+        failures = delivery.deliver(['1'], 'вердикт')
+        elapsed = time.monotonic() - started
+        backoff = delivery.client.backoff_until
+        delivery.shutdown()
+        assert failures == {} and telegram.messages == 1
+        assert elapsed >= 0.2, 'Повтор должен ждать retry_after.'
+        assert backoff > 0, 'Пауза должна действовать на весь клиент.'
+
+    def test_too_many_requests_gives_up(self, homework_module, telegram):
+        telegram.throttled_chats['1'] = 10
+        telegram.retry_after = 0.01
+        delivery = make_delivery(homework_module, telegram)
+        failures = delivery.deliver(['1'], 'вердикт')
+        delivery.shutdown()
+        assert isinstance(failures['1'], homework_module.NoSendMessageError)
+        assert telegram.throttled_chats['1'] == (
+            10 - homework_module.ASYNC_SEND_ATTEMPTS)
+
+    def test_send_limit_applies(self, homework_module, telegram):
+        delivery = make_delivery(homework_module, telegram)
+        calls = homework_module.SEND_LIMIT.calls
+        delivery.deliver(['1', '2', '3'], 'вердикт')
+        delivery.shutdown()
+        assert homework_module.SEND_LIMIT.calls == calls + 3
+
+    def test_warns_async_with_pool(self, homework_module, monkeypatch,
+                                   caplog):
+        monkeypatch.setattr(homework_module, 'ASYNC_DELIVERY', True)
+        delivery = homework_module.make_delivery(object(), 2)
+        delivery.shutdown()
+        assert not isinstance(delivery, AsyncDelivery)
+        assert 'ASYNC_DELIVERY не действует' in caplog.text
+
+    def test_warns_ignored_weights(self, homework_module, monkeypatch,
+                                   caplog):
+        monkeypatch.setattr(homework_module, 'ASYNC_DELIVERY', True)
+        delivery = homework_module.make_delivery(object(), 1, {'big': 3})
+        delivery.set_weight('small', 2)
+        delivery.shutdown()
+        assert isinstance(delivery, AsyncDelivery)
+        assert 'Веса тенантов не действуют' in caplog.text
+        assert 'Вес 2 ключа small не действует' in caplog.text
@@ -0,0 +1,97 @@
+import json
+import threading
+from http import HTTPStatus
+
+import pytest
+
+import cassette
+import tests.check_utils as check_utils
+
+
+@pytest.fixture
+def recorded_cassette(tmp_path, data_with_new_hw_status):
+    path = tmp_path / 'traffic.jsonl.gz'
+    responses = iter([
+        check_utils.MockResponseGET(data=data_with_new_hw_status),
+        check_utils.MockResponseGET(data={'homeworks': [],
+                                          'current_date': 1}),
+        check_utils.MockResponseGET(http_status=HTTPStatus.UNAUTHORIZED),
+    ])
+
+    def fake_get(url=None, params=None, **kwargs):
+        response = next(responses)
+        response.text = json.dumps(response.data)
+        return response
+
+    recorder = cassette.Recorder(path, get=fake_get)
+    for timestamp in range(3):
+        recorder.get(url='https://example.com', params={
+            'from_date': timestamp
+        }, headers={'Authorization': 'OAuth secret'})
+    recorder.close()
+    return path
+
+
+class TestCassette:
+
+    def test_token_is_not_recorded(self, recorded_cassette):
+        with cassette.open_cassette(recorded_cassette, 'r') as file:
+            assert 'secret' not in file.read(), (
+                'Заголовки с токеном не должны попадать в кассету.'
+            )
+
+    def test_player_returns_recorded_responses(self, recorded_cassette):
+        player = cassette.Player(recorded_cassette, speed=0)
+        assert player.get().json()['homeworks']
+        assert player.get().status_code == HTTPStatus.OK
+        assert player.get().status_code == HTTPStatus.UNAUTHORIZED
+        with pytest.raises(cassette.CassetteEnd):
+            player.get()
+
+    def test_replay_through_main(self, recorded_cassette, homework_module):
+        summary = cassette.replay(recorded_cassette, speed=0)
+        assert summary['responses'] == 3
+        assert summary['messages'] == 2, (
+            'При воспроизведении должны отправляться вердикт и сообщение '
+            'об ошибке 401.'
+        )
+        assert homework_module.RETRY_PERIOD == 600
+
+    def test_headers_and_not_modified(self, tmp_path, homework_module,
+                                      monkeypatch):
+        path = tmp_path / 'conditional.jsonl'
+        responses = iter([
+            (HTTPStatus.OK, {'homeworks': [], 'current_date': 5}),
+            (HTTPStatus.NOT_MODIFIED, None),
+        ])
+
+        def fake_get(url=None, params=None, **kwargs):
+            status, data = next(responses)
+            response = check_utils.MockResponseGET(http_status=status,
+                                                   data=data)
+            response.text = json.dumps(data) if data else ''
+            response.headers = {'ETag': '"v1"', 'Set-Cookie': 'session=1'}
+            return response
+
+        recorder = cassette.Recorder(path, get=fake_get)
+        for _ in range(2):
+            recorder.get(url='https://example.com', params={'from_date': 0})
+        recorder.close()
+        player = cassette.Player(path, speed=0)
+        first = player.get()
+        assert first.headers['etag'] == '"v1"'
+        assert 'Set-Cookie' not in first.headers, (
+            'Cookie из ответа не должны попадать в кассету.'
+        )
+        assert player.get().status_code == HTTPStatus.NOT_MODIFIED
+        monkeypatch.setattr(homework_module, 'TRACES_EXPORT',
+                            str(tmp_path / 'traces.jsonl'))
+        threads = threading.active_count()
+        summary = cassette.replay(path, speed=0)
+        assert summary['responses'] == 2
+        assert summary['messages'] == 0, (
+            'Записанный ответ 304 воспроизводится без ошибки.'
+        )
+        assert threading.active_count() == threads, (
+            'После воспроизведения фоновые потоки main() остановлены.'
+        )
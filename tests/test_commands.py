@@ -0,0 +1,72 @@
+import commands
+from status_cache import StatusCache
+
+VERDICTS = {'approved': 'Принято.', 'rejected': 'Есть замечания.'}
+
+
+def make_cache():
+    cache = StatusCache(ttl=600, history_size=2)
+    cache.update('student', [
+        {'id': 1, 'homework_name': 'hw1.zip', 'status': 'rejected',
+         'date_updated': '2024-06-01T10:00:00Z'},
+    ], now=1000)
+    cache.update('student', [
+        {'id': 1, 'homework_name': 'hw1.zip', 'status': 'approved',
+         'date_updated': '2024-06-02T10:00:00Z'},
+        {'id': 2, 'homework_name': 'hw2.zip', 'status': 'rejected',
+         'date_updated': '2024-06-02T11:00:00Z'},
+    ], now=1100)
+    return cache
+
+
+class TestCommands:
+
+    def test_status_from_cache(self, monkeypatch):
+        cache = make_cache()
+        monkeypatch.setattr('time.time', lambda: 1200)
+        text = commands.answer(cache, {'5': 'student'}, 5, 'status',
+                               VERDICTS)
+        assert text.splitlines() == [
+            '"hw1.zip": Принято.', '"hw2.zip": Есть замечания.'
+        ]
+
+    def test_history_is_bounded(self, monkeypatch):
+        cache = make_cache()
+        monkeypatch.setattr('time.time', lambda: 1200)
+        text = commands.answer(cache, {'5': 'student'}, 5, 'history',
+                               VERDICTS)
+        assert len(text.splitlines()) == 2
+        assert '2024-06-01' not in text
+
+    def test_stale_and_unknown(self, monkeypatch):
+        cache = make_cache()
+        monkeypatch.setattr('time.time', lambda: 1100 + 601)
+        assert 'устарели' in commands.answer(
+            cache, {'5': 'student'}, 5, 'status', VERDICTS), (
+            'Данные старше TTL не должны показываться.'
+        )
+        assert commands.answer(
+            cache, {'5': 'student'}, 6, 'status', VERDICTS
+        ) == commands.NO_SUBSCRIPTION
+
+    def test_commands_do_not_request_api(self, monkeypatch):
+        import requests
+
+        def forbidden(*args, **kwargs):
+            raise AssertionError('Команды не должны обращаться к API.')
+
+        monkeypatch.setattr(requests, 'get', forbidden)
+        cache = make_cache()
+        for command in commands.COMMANDS:
+            commands.answer(cache, {'5': 'student'}, 5, command, VERDICTS)
+
+    def test_cache_returns_copy(self):
+        cache = make_cache()
+        state = cache.get('student', now=1200)
+        cache.update('student', [
+            {'id': 3, 'homework_name': 'hw3.zip', 'status': 'reviewing'},
+        ], now=1150)
+        assert 3 not in state.homeworks, (
+            'Опрос не меняет состояние, которое уже читают команды.'
+        )
+        assert len(state.history) == 2
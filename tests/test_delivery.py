@@ -0,0 +1,162 @@
+import threading
+import time
+
+import pytest
+
+import delivery
+import tenants
+
+
+def make_send(failing_chats=()):
+    sent = []
+
+    def send(chat_id, text):
+        if chat_id in failing_chats:
+            raise ConnectionError(f'чат {chat_id} недоступен')
+        sent.append((chat_id, text))
+
+    return send, sent
+
+
+class TestDelivery:
+
+    def test_rate_limiter(self):
+        limiter = delivery.RateLimiter(rate=10, capacity=2)
+        assert limiter.reserve() == 0
+        assert limiter.reserve() == 0
+        assert limiter.reserve() == pytest.approx(0.1, abs=0.01), (
+            'После исчерпания ведра нужно ждать пополнения токена.'
+        )
+
+    def test_failure_is_isolated_per_chat(self):
+        send, sent = make_send(failing_chats={'2'})
+        chat_delivery = delivery.ChatDelivery(send, chat_rate=100)
+        failures = chat_delivery.deliver(['1', '2', '3'], 'вердикт')
+        assert set(failures) == {'2'}
+        assert sorted(sent) == [('1', 'вердикт'), ('3', 'вердикт')]
+        chat_delivery.shutdown()
+
+    def test_broadcast(self, homework_module):
+        send, sent = make_send(failing_chats={'2'})
+        chat_delivery = delivery.ChatDelivery(send, chat_rate=100)
+        homework_module.broadcast(chat_delivery, ['1', '2'], 'вердикт')
+        assert sent == [('1', 'вердикт')], (
+            'Ошибка одного чата не должна мешать доставке в остальные.'
+        )
+        with pytest.raises(homework_module.NoSendMessageError):
+            homework_module.broadcast(chat_delivery, ['2'], 'вердикт')
+        chat_delivery.shutdown()
+
+    def test_load_tenants(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        path.write_text(
+            '[{"name": "a", "practicum_token": "t", "chat_ids": [1, "2"]}]'
+        )
+        (tenant,) = tenants.load_tenants(path)
+        assert tenant.chat_ids == ['1', '2']
+        assert tenant.headers == {'Authorization': 'OAuth t'}
+        path.write_text('[{"name": "a", "chat_ids": []}]')
+        with pytest.raises(ValueError):
+            tenants.load_tenants(path)
+        path.write_text('[{"name": "a", "practicum_token": "t", '
+                        '"chat_ids": [1], "weight": 0}]')
+        with pytest.raises(ValueError):
+            tenants.load_tenants(path)
+
+
+def outgoing(chat_id, key=None):
+    return delivery.Outgoing(chat_id, 'текст', None, None, key or chat_id)
+
+
+class TestLanes:
+
+    def test_fair_lane_round_robin(self):
+        lane = delivery.FairLane()
+        for chat_id in ['noisy'] * 6 + ['a', 'b'] * 2:
+            lane.push(outgoing(chat_id))
+        order = []
+        while lane:
+            item, _ = lane.pop(lambda chat_id: 0, lambda chat_id: 1)
+            order.append(item.chat_id)
+        assert order[:6] == ['noisy', 'a', 'b'] * 2, (
+            'Шумный чат не задерживает остальные.'
+        )
+
+    def test_weights_and_waiting_chats(self):
+        lane = delivery.FairLane()
+        for chat_id in ['heavy'] * 4 + ['light'] * 4:
+            lane.push(outgoing(chat_id))
+        weights = {'heavy': 2, 'light': 1}
+        order = [lane.pop(lambda chat_id: 0, weights.get)[0].chat_id
+                 for _ in range(6)]
+        assert order == ['heavy', 'heavy', 'light'] * 2
+        assert lane.pop(lambda chat_id: 0.5, weights.get) == (None, 0.5)
+
+    def test_tenant_key_shares_lane(self):
+        lane = delivery.FairLane()
+        for number in range(4):
+            lane.push(outgoing(f'big-{number}', key='big'))
+        lane.push(outgoing('small-0', key='small'))
+        lane.push(outgoing('small-1', key='small'))
+        order = [lane.pop(lambda chat_id: 0, lambda key: 1)[0].chat_id
+                 for _ in range(4)]
+        assert order == ['big-0', 'small-0', 'big-1', 'small-1'], (
+            'Тенант с большим числом чатов не задерживает остальных.'
+        )
+
+    def test_skips_waiting_chat_of_key(self):
+        lane = delivery.FairLane()
+        lane.push(outgoing('busy', key='tenant'))
+        lane.push(outgoing('free', key='tenant'))
+        waits = {'busy': 0.5, 'free': 0}
+        item, _ = lane.pop(waits.get, lambda key: 1)
+        assert item.chat_id == 'free'
+        assert lane.pop(waits.get, lambda key: 1) == (None, 0.5)
+
+    def test_weight_must_be_positive(self):
+        with pytest.raises(ValueError):
+            delivery.ChatDelivery(print, weights={'tenant': 0})
+        chat_delivery = delivery.ChatDelivery(print)
+        with pytest.raises(ValueError):
+            chat_delivery.set_weight('tenant', -1)
+
+    def test_submit_does_not_wait(self):
+        release = threading.Event()
+
+        def send(chat_id, text):
+            release.wait(1)
+
+        chat_delivery = delivery.ChatDelivery(send, max_workers=1)
+        future = chat_delivery.submit(['1'], 'сводка',
+                                      priority=delivery.DIGEST)
+        assert not future.done(), 'submit() не ждёт отправки.'
+        release.set()
+        assert future.result(1) == {}
+        chat_delivery.shutdown()
+
+    def test_verdicts_go_first(self):
+        release = threading.Event()
+        sent = []
+
+        def send(chat_id, text):
+            if chat_id == 'first':
+                release.wait(1)
+            sent.append(text)
+
+        chat_delivery = delivery.ChatDelivery(send, max_workers=1)
+        threads = [threading.Thread(target=chat_delivery.deliver,
+                                    args=(['first'], 'занят'))]
+        for text, priority in (('сводка', delivery.DIGEST),
+                               ('ошибка', delivery.ALERT),
+                               ('вердикт', delivery.VERDICT)):
+            threads.append(threading.Thread(
+                target=chat_delivery.deliver, args=([text], text),
+                kwargs={'priority': priority}))
+        for thread in threads:
+            thread.start()
+            time.sleep(0.02)
+        release.set()
+        for thread in threads:
+            thread.join()
+        chat_delivery.shutdown()
+        assert sent == ['занят', 'вердикт', 'ошибка', 'сводка']
@@ -0,0 +1,88 @@
+import requests
+
+from error_digest import ErrorDigest, fingerprint
+
+
+def api_error(homework_module, status):
+    return homework_module.APIStatusError(f'Код ответа API: {status}', status)
+
+
+class TestErrorDigest:
+
+    def test_fingerprint(self, homework_module):
+        assert fingerprint(api_error(homework_module, 500)) == (
+            'APIStatusError', 500)
+        try:
+            raise homework_module.CanSendMessageError('сбой') from (
+                requests.ConnectionError('нет сети'))
+        except homework_module.CanSendMessageError as error:
+            assert fingerprint(error) == ('ConnectionError', None), (
+                'Обёрнутая ошибка группируется по исходному классу.'
+            )
+
+    def test_flapping_endpoint_is_bounded(self, homework_module):
+        digest = ErrorDigest(period=600)
+        digest.last_digest = 0
+        sent = []
+        for minute in range(60):
+            status = 500 if minute % 2 else 502
+            if digest.record(api_error(homework_module, status),
+                             f'Код ответа API: {status}', now=minute * 60):
+                sent.append(status)
+            report = digest.flush(now=minute * 60)
+            if report:
+                sent.append(report)
+                digest.commit()
+        assert sent[:2] == [502, 500], (
+            'О первой ошибке с новым отпечатком сообщается сразу.'
+        )
+        assert len(sent) == 2 + 5, (
+            'Повторы уходят не чаще одной сводки за период.'
+        )
+        assert '502: повторов 5, всего 6' in sent[2]
+
+    def test_unsent_digest_is_repeated(self, homework_module):
+        digest = ErrorDigest(period=600)
+        digest.last_digest = 0
+        error = api_error(homework_module, 500)
+        digest.record(error, 'сбой', now=0)
+        digest.record(error, 'сбой', now=10)
+        assert 'повторов 1' in digest.flush(now=600)
+        digest.record(error, 'сбой', now=700)
+        assert 'повторов 2' in digest.flush(now=1200), (
+            'Неотправленные повторы входят в следующую сводку.'
+        )
+        digest.commit()
+        assert not digest.flush(now=1800)
+
+    def test_quiet_fingerprint_is_forgotten(self, homework_module):
+        digest = ErrorDigest(period=600)
+        error = api_error(homework_module, 500)
+        assert digest.record(error, 'сбой', now=0)
+        assert not digest.record(error, 'сбой', now=10)
+        assert digest.flush(now=digest.last_digest + 600)
+        digest.commit()
+        assert digest.record(error, 'сбой', now=digest.last_digest + 1300)
+
+    def test_report_error_commits_sent_digest(self, homework_module,
+                                              monkeypatch):
+        digest = ErrorDigest(period=600)
+        digest.last_digest = 0
+        error = api_error(homework_module, 500)
+        digest.record(error, 'сбой', now=0)
+        digest.record(error, 'сбой', now=10)
+
+        def fail(bot, message):
+            raise homework_module.NoSendMessageError('нет связи')
+
+        monkeypatch.setattr(homework_module, 'send_message', fail)
+        homework_module.report_error(None, digest, None, False)
+        (record,) = digest.records.values()
+        assert record.reported == 1, (
+            'Неотправленная сводка не отмечает повторы сообщёнными.'
+        )
+        monkeypatch.setattr(homework_module, 'send_message',
+                            lambda bot, message: None)
+        digest.last_digest = 0
+        homework_module.report_error(None, digest, None, False)
+        assert record.reported == 2
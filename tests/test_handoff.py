@@ -0,0 +1,175 @@
+import inspect
+import json
+import os
+import signal
+import time
+
+import pytest
+
+import health
+import tests.check_utils as check_utils
+from cassette import OfflineBot
+from handoff import Handoff, HandoffRequested
+from tests.test_tenants import write_registry
+
+
+@pytest.fixture
+def sigterm():
+    saved = signal.getsignal(signal.SIGTERM)
+    yield
+    signal.signal(signal.SIGTERM, saved)
+
+
+class FakeClock:
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TestHandoff:
+
+    def test_snapshot_is_taken_once(self, tmp_path):
+        path = str(tmp_path / 'state.json')
+        old = Handoff(path)
+        assert old.acquire() is None
+        assert os.path.exists(old.marker)
+        old.release({'timestamp': 5})
+        assert not os.path.exists(old.marker)
+        new = Handoff(path)
+        assert new.acquire() == {'timestamp': 5}
+        assert not os.path.exists(path), 'Снимок забирается один раз.'
+
+    def test_waits_for_old_process(self, tmp_path):
+        path = str(tmp_path / 'state.json')
+        Handoff(path).acquire()
+        clock = FakeClock()
+        assert Handoff(path, wait=10).acquire(clock, clock.sleep) is None
+        assert clock.now >= 10, 'Пока старый процесс жив, снимок ждут.'
+
+    def test_foreign_marker_is_kept(self, tmp_path):
+        path = str(tmp_path / 'state.json')
+        old = Handoff(path)
+        old.acquire()
+        with open(old.marker, 'w', encoding='utf-8') as file:
+            file.write('1')
+        old.release({'timestamp': 5})
+        assert not os.path.exists(path), (
+            'Процесс, чью метку заняли, не пишет устаревший снимок.'
+        )
+        with open(old.marker, encoding='utf-8') as file:
+            assert file.read() == '1', 'Чужая метка не удаляется.'
+
+    def test_stale_snapshot_is_dropped(self, tmp_path):
+        path = str(tmp_path / 'state.json')
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({'version': 1, 'saved_at': 0, 'pid': '1',
+                       'state': {'timestamp': 5}}, file)
+        with open(f'{path}.active', 'w', encoding='utf-8') as file:
+            file.write('2')
+        clock = FakeClock()
+        assert Handoff(path, wait=1).acquire(clock, clock.sleep) is None, (
+            'Снимок не от владельца метки устарел.'
+        )
+        assert not os.path.exists(path)
+
+    def test_not_ready_while_waiting(self, tmp_path, sigterm):
+        path = str(tmp_path / 'state.json')
+        Handoff(path).acquire()
+        state = health.HealthState()
+        state.ready = True
+        readiness = []
+        clock = FakeClock()
+
+        def sleep(seconds):
+            readiness.append(state.ready)
+            clock.sleep(seconds)
+
+        handoff = Handoff(path, wait=1)
+        handoff.install(state)
+        handoff.acquire(clock, sleep)
+        assert readiness and not any(readiness), (
+            'Пока снимок ждут, процесс не готов.'
+        )
+        assert state.ready
+
+    def test_stop_interrupts_only_sleep(self):
+        handoff = Handoff()
+        handoff.request_stop()
+        with pytest.raises(HandoffRequested):
+            with handoff.sleeping():
+                pass
+        busy = Handoff()
+        busy._handle(signal.SIGTERM, None)
+        assert busy.stopping.is_set(), 'Вне ожидания цикл доводится до конца.'
+
+
+class TestRedeploy:
+
+    def run_main(self, homework_module, monkeypatch, requested):
+        def get(url, headers, params, timeout):
+            requested.append(params['from_date'])
+            return check_utils.MockResponseGET(random_timestamp=1000)
+
+        def sleep_then_stop(seconds):
+            os.kill(os.getpid(), signal.SIGTERM)
+            time.sleep(1)
+
+        monkeypatch.setattr('requests.get', get)
+        monkeypatch.setattr(homework_module, 'TeleBot', OfflineBot)
+        monkeypatch.setattr(homework_module.time, 'sleep', sleep_then_stop)
+        # test_bot оборачивает main проверкой таймаута.
+        inspect.unwrap(homework_module.main)()
+        monkeypatch.undo()
+
+    def test_cursor_survives_restart(self, homework_module, monkeypatch,
+                                     tmp_path, sigterm):
+        path = str(tmp_path / 'state.json')
+        requested = []
+        for _ in range(2):
+            monkeypatch.setattr(homework_module, 'HANDOFF_FILE', path)
+            self.run_main(homework_module, monkeypatch, requested)
+        with open(path, encoding='utf-8') as file:
+            assert json.load(file)['state']['timestamp'] == 1000
+        assert requested[1] == 1000, (
+            'Новый процесс продолжает опрос с курсора старого.'
+        )
+
+    def test_tenants_resume(self, homework_module, monkeypatch, tmp_path):
+        config = tmp_path / 'tenants.json'
+        write_registry(config, [
+            {'name': 'a', 'practicum_token': 'ta', 'chat_ids': [1]},
+        ])
+        monkeypatch.setattr(
+            'requests.get',
+            lambda *args, **kwargs: check_utils.MockResponseGET(
+                random_timestamp=1000))
+        handoff = Handoff(str(tmp_path / 'state.json'))
+        clock = FakeClock()
+        clock.now = time.time()
+        start = clock.now
+
+        def sleep(seconds):
+            clock.sleep(seconds)
+            if clock.now - start > homework_module.POLL_JITTER + 2:
+                handoff._handle(signal.SIGTERM, None)
+
+        monkeypatch.setattr(homework_module.time, 'time', clock)
+        monkeypatch.setattr(homework_module.time, 'sleep', sleep)
+        registry = homework_module.tenants.TenantRegistry(config)
+        services = homework_module.Services(OfflineBot(), list(registry))
+        homework_module.run_tenants(services, registry, handoff)
+        monkeypatch.undo()
+        state = Handoff(handoff.path).acquire()
+        saved = state['tenants']['a']
+        assert saved['timestamp'] == 1000
+        assert saved['next_poll'] > start + (
+            homework_module.RETRY_PERIOD / 2), 'Срок опроса сохраняется.'
+        fresh = homework_module.tenants.TenantRegistry(config)
+        fresh.tenants['a'].restore(saved)
+        assert fresh.tenants['a'].timestamp == 1000
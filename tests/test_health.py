@@ -0,0 +1,55 @@
+import json
+import urllib.error
+import urllib.request
+
+import pytest
+
+import health
+from cassette import OfflineBot
+
+
+def fetch(server, path):
+    host, port = server.server_address[:2]
+    try:
+        with urllib.request.urlopen(f'http://{host}:{port}{path}') as reply:
+            return reply.status, json.loads(reply.read())
+    except urllib.error.HTTPError as error:
+        return error.code, json.loads(error.read())
+
+
+@pytest.fixture
+def server():
+    state = health.HealthState()
+    server = health.serve(state, 0, host='127.0.0.1')
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestHealth:
+
+    def test_readiness(self, server):
+        status, report = fetch(server, '/readyz')
+        assert status == 503
+        server.RequestHandlerClass.state.ready = True
+        status, report = fetch(server, '/readyz')
+        assert status == 200 and report['ready']
+        assert fetch(server, '/healthz')[0] == 200
+        assert fetch(server, '/other')[0] == 404
+
+    def test_poll_age_per_tenant(self, server, monkeypatch):
+        state = server.RequestHandlerClass.state
+        monkeypatch.setattr('time.monotonic', lambda: 100.0)
+        state.polled('default')
+        monkeypatch.setattr('time.monotonic', lambda: 160.0)
+        status, report = fetch(server, '/healthz')
+        assert report['tenants'] == {'default': {'last_success_age': 60.0}}
+
+    def test_services_report_polls(self, homework_module):
+        services = homework_module.Services(OfflineBot())
+        assert services.health.ready
+        homework_module.handle_homeworks(services, [])
+        report = services.health.report()
+        assert 'default' in report['tenants']
+        assert {'limit', 'latency_ms'} <= set(report['api_limit'])
+        assert {'limit', 'latency_ms'} <= set(report['send_limit'])
@@ -0,0 +1,111 @@
+import json
+import random
+
+import numpy as np
+import pytest
+
+from cassette import OfflineBot
+from latency_slo import OVERALL, LatencySketch, SLOTracker, parse_date
+
+DATE = '2024-06-01T10:00:00Z'
+
+
+class TestLatencySketch:
+
+    @pytest.mark.parametrize('q', (0.5, 0.95, 0.99))
+    def test_relative_accuracy(self, q):
+        rng = random.Random(0)
+        values = [rng.lognormvariate(5, 1.5) for _ in range(20_000)]
+        sketch = LatencySketch(accuracy=0.01)
+        for value in values:
+            sketch.add(value)
+        exact = np.quantile(values, q, method='lower')
+        assert sketch.quantile(q) == pytest.approx(exact, rel=0.02)
+        assert len(sketch.buckets) < 2000, (
+            'Память не растёт с числом значений.'
+        )
+
+    def test_merge(self):
+        first, second = LatencySketch(), LatencySketch()
+        for value in range(1, 51):
+            first.add(value)
+            second.add(value + 50)
+        first.merge(second)
+        assert first.count == 100
+        assert first.quantile(0.5) == pytest.approx(50, rel=0.02)
+
+
+class TestSLOTracker:
+
+    def test_alert_once_per_breach(self):
+        start = parse_date(DATE)
+        tracker = SLOTracker(slo=600, min_count=5)
+        tracker.window_started = start
+        for _ in range(10):
+            tracker.record('student', DATE, now=start + 60)
+        assert tracker.check() == []
+        for _ in range(10):
+            tracker.record('student', DATE, now=start + 3600)
+        alerts = tracker.check(('student', OVERALL))
+        assert len(alerts) == 2 and 'student' in alerts[1]
+        assert tracker.check() == [], 'О том же нарушении не напоминают.'
+        assert tracker.percentiles('student')['p95'] == pytest.approx(
+            3600, rel=0.02)
+
+    def test_windows_expire(self):
+        start = parse_date(DATE)
+        tracker = SLOTracker(slo=600, window=3600, min_count=1)
+        tracker.window_started = start
+        tracker.record('student', DATE, now=start + 1000)
+        tracker.record('student', DATE, now=start + 3 * 3600)
+        assert tracker.percentiles()['count'] == 1, (
+            'Замеры старше двух окон забываются.'
+        )
+
+    def test_services_record_latency(self, homework_module, monkeypatch):
+        monkeypatch.setattr(homework_module, 'LATENCY_SLO', 1.0)
+        services = homework_module.Services(OfflineBot())
+        services.latency.min_count = 1
+        sent = []
+        monkeypatch.setattr(homework_module, 'send_message',
+                            lambda bot, message: sent.append(message))
+        homework_module.deliver_homework(services, {
+            'id': 1, 'homework_name': 'hw.zip', 'status': 'approved',
+            'date_updated': DATE})
+        services.close()
+        assert services.latency.percentiles()['count'] == 1
+        assert sent[-1].startswith('Задержка уведомлений'), (
+            'Превышение цели SLO сообщается в Telegram.'
+        )
+
+    def test_pipeline_records_latency(self, homework_module, monkeypatch,
+                                      tmp_path):
+        monkeypatch.setattr(homework_module, 'PIPELINE_POLICY', 'block')
+        monkeypatch.setattr(homework_module, 'PIPELINE_SPILL_DIR',
+                            str(tmp_path))
+        services = homework_module.Services(OfflineBot())
+        homework_module.deliver_homework(services, {
+            'id': 1, 'homework_name': 'hw.zip', 'status': 'approved',
+            'date_updated': DATE})
+        services.close(timeout=1)
+        assert services.latency.percentiles()['count'] == 1, (
+            'Задержка учитывается после отправки конвейером.'
+        )
+
+    @pytest.mark.parametrize('directory, count', (('', 1), ('missing', 0)))
+    def test_sinks_record_latency(self, homework_module, monkeypatch,
+                                  tmp_path, directory, count):
+        config = tmp_path / 'sinks.json'
+        config.write_text(json.dumps([{
+            'type': 'file', 'retries': 0,
+            'path': str(tmp_path / directory / 'verdicts.jsonl')}]))
+        monkeypatch.setattr(homework_module, 'SINKS_CONFIG', str(config))
+        services = homework_module.Services(OfflineBot())
+        homework_module.deliver_homework(services, {
+            'id': 1, 'homework_name': 'hw.zip', 'status': 'approved',
+            'date_updated': DATE})
+        services.fan_out.join()
+        services.close()
+        assert services.latency.percentiles()['count'] == count, (
+            'Задержка учитывается после доставки приёмником.'
+        )
@@ -0,0 +1,63 @@
+import threading
+from http import HTTPStatus
+
+import requests
+
+import loadgen
+from stand_in import PracticumStandIn
+
+
+def make_model(**kwargs):
+    config = loadgen.LoadConfig(
+        students=20, submissions_per_day=1000, review_delay=10,
+        verdict_delay=10, fix_delay=10, time_scale=10 ** 6, seed=1, **kwargs
+    )
+    return loadgen.LoadModel(config)
+
+
+class TestLoadGenerator:
+
+    def test_statuses_follow_review_flow(self, homework_module):
+        model = make_model()
+        status, data = model.respond('student-0', 0)
+        assert status == HTTPStatus.OK
+        assert data['homeworks'], 'Модель должна выдавать новые статусы.'
+        for homework in data['homeworks']:
+            assert homework['status'] in homework_module.HOMEWORK_VERDICTS
+            homework_module.parse_status(homework)
+        _, again = model.respond('student-0', data['current_date'] + 10 ** 9)
+        assert again['homeworks'] == []
+
+    def test_error_injection(self):
+        model = make_model(error_rates={401: 1.0})
+        assert model.respond('student-0', 0)[0] == 401
+        model = make_model()
+        assert model.respond('unknown', 0)[0] == HTTPStatus.UNAUTHORIZED
+        assert model.respond('student-0', 'x')[0] == HTTPStatus.BAD_REQUEST
+
+    def test_stand_in_serves_model(self):
+        model = make_model()
+        with PracticumStandIn(model) as server:
+            response = requests.get(
+                server.url, headers={'Authorization': 'OAuth student-1'},
+                params={'from_date': 0}, timeout=1
+            )
+            missing = requests.get(server.base_url + '/other', timeout=1)
+        assert response.status_code == HTTPStatus.OK
+        assert 'homeworks' in response.json()
+        assert missing.status_code == HTTPStatus.NOT_FOUND
+
+    def test_drive_in_process(self):
+        summary = loadgen.drive(make_model(), duration=0.05, concurrency=2)
+        assert summary['polls'] > 0
+        assert summary['messages'] > 0
+
+    def test_drive_stops_threads(self, monkeypatch, tmp_path):
+        import homework
+        monkeypatch.setattr(homework, 'TRACES_EXPORT',
+                            str(tmp_path / 'traces.jsonl'))
+        threads = threading.active_count()
+        loadgen.drive(make_model(), duration=0.05, concurrency=2)
+        assert threading.active_count() == threads, (
+            'Прогон должен останавливать фоновые потоки.'
+        )
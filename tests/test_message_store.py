@@ -0,0 +1,107 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+from telebot.apihelper import ApiTelegramException
+
+import message_store
+
+
+class EditingBot:
+    def __init__(self, edit_fails=False):
+        self.edit_fails = edit_fails
+        self.sent = []
+        self.edited = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.sent.append(text)
+        return SimpleNamespace(message_id=len(self.sent))
+
+    def edit_message_text(self, text=None, chat_id=None, message_id=None):
+        if self.edit_fails:
+            raise ValueError('message to edit not found')
+        self.edited.append((message_id, text))
+
+
+class TestEditInPlace:
+
+    def test_status_updates_edit_one_message(self, homework_module):
+        bot = EditingBot()
+        store = message_store.MessageStore()
+        for status in ('reviewing', 'rejected', 'rejected'):
+            homework_module.send_or_edit(bot, store, 7, '1', status)
+        assert bot.sent == ['reviewing'], (
+            'В режиме редактирования по работе отправляется одно сообщение.'
+        )
+        assert bot.edited == [(1, 'rejected')], (
+            'Неизменившийся текст не нужно отправлять повторно.'
+        )
+
+    def test_failed_edit_falls_back_to_new_message(self, homework_module):
+        bot = EditingBot(edit_fails=True)
+        store = message_store.MessageStore()
+        homework_module.send_or_edit(bot, store, 7, '1', 'reviewing')
+        homework_module.send_or_edit(bot, store, 7, '1', 'approved')
+        assert bot.sent == ['reviewing', 'approved']
+        assert store.get('1', 7) == {'message_id': 2, 'text': 'approved'}
+
+    def test_store_persists_and_evicts(self, tmp_path):
+        path = tmp_path / 'messages.json'
+        store = message_store.MessageStore(path, max_messages=2)
+        for homework_id in range(3):
+            store.put('1', homework_id, homework_id, 'текст')
+        restored = message_store.MessageStore(path)
+        assert restored.get('1', 0) is None
+        assert restored.get('1', 2) == {'message_id': 2, 'text': 'текст'}
+
+    def test_rate_limited_edit_is_not_duplicated(self, homework_module):
+        bot = EditingBot()
+        store = message_store.MessageStore()
+        homework_module.send_or_edit(bot, store, 7, '1', 'reviewing')
+
+        def edit_message_text(**kwargs):
+            raise ApiTelegramException('editMessageText', None, {
+                'error_code': 429, 'description': 'Too Many Requests',
+                'parameters': {'retry_after': 5}})
+
+        bot.edit_message_text = edit_message_text
+        with pytest.raises(homework_module.NoSendMessageError):
+            homework_module.send_or_edit(bot, store, 7, '1', 'approved')
+        assert bot.sent == ['reviewing'], (
+            'После 429 при изменении новое сообщение не отправляется.'
+        )
+
+    def test_edits_use_send_limit(self, homework_module):
+        bot = EditingBot()
+        store = message_store.MessageStore()
+        homework_module.send_or_edit(bot, store, 7, '1', 'reviewing')
+        calls = homework_module.SEND_LIMIT.calls
+        homework_module.send_or_edit(bot, store, 7, '1', 'approved')
+        assert homework_module.SEND_LIMIT.calls == calls + 1
+
+    def test_store_appends_and_compacts(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(message_store, 'COMPACT_SLACK', 3)
+        path = tmp_path / 'messages.jsonl'
+        store = message_store.MessageStore(path)
+        store.put('1', 7, 1, 'первый')
+        store.put('1', 7, 1, 'второй')
+        assert len(path.read_text(encoding='utf-8').splitlines()) == 2, (
+            'Каждое сообщение дописывает одну строку.'
+        )
+        for number in range(5):
+            store.put('1', 7, 1, f'текст {number}')
+        assert len(path.read_text(encoding='utf-8').splitlines()) <= 4, (
+            'Журнал сжимается.'
+        )
+        store.discard('1', 7)
+        assert message_store.MessageStore(path).get('1', 7) is None
+
+    def test_store_reads_old_format(self, tmp_path):
+        path = tmp_path / 'messages.json'
+        path.write_text(json.dumps(
+            {'1:7': {'message_id': 3, 'text': 'текст'}}))
+        store = message_store.MessageStore(path)
+        assert store.get('1', 7) == {'message_id': 3, 'text': 'текст'}
+        store.put('1', 8, 4, 'ещё')
+        restored = message_store.MessageStore(path)
+        assert restored.get('1', 7) and restored.get('1', 8)
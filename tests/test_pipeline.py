@@ -0,0 +1,146 @@
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+import pipeline
+
+
+class EditingBot:
+    def __init__(self):
+        self.sent = []
+        self.edited = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        self.sent.append(text)
+        return SimpleNamespace(message_id=len(self.sent))
+
+    def edit_message_text(self, text=None, chat_id=None, message_id=None):
+        self.edited.append((message_id, text))
+
+
+class TestBoundedQueue:
+
+    def test_unknown_policy(self):
+        with pytest.raises(ValueError):
+            pipeline.BoundedQueue('q', 2, policy='drop')
+
+    def test_block_waits_for_space(self):
+        queue = pipeline.BoundedQueue('q', 1)
+        queue.put(1, 'a')
+        thread = threading.Thread(target=queue.put, args=(2, 'b'))
+        thread.start()
+        thread.join(0.05)
+        assert thread.is_alive(), 'Запись в полную очередь должна ждать.'
+        assert queue.get() == (1, 'a')
+        thread.join(1)
+        assert queue.get() == (2, 'b')
+
+    def test_coalesce_per_chat(self):
+        queue = pipeline.BoundedQueue('q', 2, policy='coalesce',
+                                      merge=pipeline.join_messages)
+        for chat_id, text in (('1', 'a'), ('2', 'b'), ('1', 'c')):
+            queue.put(chat_id, {'chat_id': chat_id, 'text': text})
+        assert len(queue) == 2
+        assert queue.get() == ('1', {'chat_id': '1', 'text': 'a\n\nc'})
+        assert queue.metrics()['coalesced'] == 1
+
+    def test_spill_keeps_order(self, tmp_path):
+        path = tmp_path / 'spill.jsonl'
+        queue = pipeline.BoundedQueue('q', 2, policy='spill',
+                                      spill_path=str(path))
+        for number in range(6):
+            queue.put(number, {'n': number})
+        assert queue.metrics()['depth'] == 2
+        assert queue.metrics()['spilled_depth'] == 4
+        restored = pipeline.BoundedQueue('q', 2, policy='spill',
+                                         spill_path=str(path))
+        assert len(restored) == 4, 'Файл переполнения читается при запуске.'
+        assert [queue.get()[0] for _ in range(6)] == list(range(6))
+        assert not path.exists()
+
+
+class TestPipeline:
+
+    def test_outage_is_bounded_and_recovers(self):
+        telegram_up = threading.Event()
+        sent = []
+
+        def send(chat_id, text, key=None):
+            if not telegram_up.is_set():
+                raise ConnectionError('Telegram недоступен')
+            sent.append((chat_id, text))
+
+        def parse(homework):
+            return [('1', homework['status'])]
+
+        stages = pipeline.Pipeline(parse, send, size=2, policy='coalesce',
+                                   retry_delay=0.01, max_retry_delay=0.01)
+        for number in range(10):
+            stages.submit(number % 3, {'status': f's{number}'})
+        metrics = stages.metrics()
+        assert metrics['parse']['max_depth'] <= 2
+        assert metrics['delivery']['max_depth'] <= 2
+        telegram_up.set()
+        assert stages.drain(timeout=1)
+        stages.stop()
+        delivered = '\n\n'.join(text for _, text in sent).split('\n\n')
+        assert delivered[-1] == 's9', 'Последний статус должен дойти.'
+        assert len(sent) < 10, 'Сообщения одного чата объединяются.'
+
+    def test_retry_does_not_hold_other_chats(self):
+        delivered = threading.Event()
+
+        def send(chat_id, text, key=None):
+            if chat_id == '1':
+                raise ConnectionError('Чат недоступен')
+            delivered.set()
+
+        def parse(homework):
+            return [(homework['chat_id'], 'вердикт')]
+
+        stages = pipeline.Pipeline(parse, send, size=2, retry_delay=10)
+        stages.submit(1, {'chat_id': '1'})
+        stages.submit(2, {'chat_id': '2'})
+        assert delivered.wait(1), (
+            'Повтор для одного чата не должен задерживать другие чаты.'
+        )
+        assert stages.metrics()['delivery']['retrying'] == 1
+        assert not stages.drain(timeout=0.05), (
+            'Отложенное сообщение считается необработанным.'
+        )
+        stages.stop()
+
+
+class TestPipelineDelivery:
+
+    def test_pipeline_uses_delivery(self, homework_module, monkeypatch,
+                                    tmp_path):
+        monkeypatch.setattr(homework_module, 'PIPELINE_POLICY', 'block')
+        monkeypatch.setattr(homework_module, 'PIPELINE_SPILL_DIR',
+                            str(tmp_path))
+        monkeypatch.setattr(homework_module, 'EDIT_IN_PLACE', True)
+        monkeypatch.setattr(homework_module, 'EDIT_STATE_FILE', None)
+        bot = EditingBot()
+        services = homework_module.Services(bot)
+        # Без этого второе сообщение в чат ждало бы секунду.
+        services.delivery.chat_rate = 10 ** 9
+        submitted = []
+        submit = services.delivery.submit
+
+        def recording_submit(chat_ids, text, *args, **kwargs):
+            submitted.append(text)
+            return submit(chat_ids, text, *args, **kwargs)
+
+        monkeypatch.setattr(services.delivery, 'submit', recording_submit)
+        for status in ('reviewing', 'approved'):
+            homework_module.deliver_homework(services, {
+                'id': 7, 'homework_name': 'hw.zip', 'status': status})
+            assert services.pipeline.drain(timeout=1)
+        services.close(timeout=1)
+        assert len(submitted) == 2, (
+            'Конвейер отправляет через общую рассылку.'
+        )
+        assert len(bot.sent) == 1 and len(bot.edited) == 1, (
+            'Режим EDIT_IN_PLACE действует и в конвейере.'
+        )
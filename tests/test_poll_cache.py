@@ -0,0 +1,146 @@
+import json
+from http import HTTPStatus
+
+import pytest
+
+from poll_cache import PollCache, body_digest
+
+HEADERS = {'Authorization': 'OAuth token'}
+
+
+class RawResponse:
+
+    def __init__(self, data, status_code=HTTPStatus.OK, headers=None):
+        self.status_code = status_code
+        self.reason = ''
+        self.content = json.dumps(data).encode('utf-8') if data else b''
+        self.headers = headers or {}
+        self.decoded = 0
+
+    def json(self):
+        self.decoded += 1
+        return json.loads(self.content)
+
+
+def empty(current_date):
+    return {'homeworks': [], 'current_date': current_date}
+
+
+class TestPollCache:
+
+    def test_digest_ignores_current_date(self):
+        first, date = body_digest(json.dumps(empty(1)).encode())
+        second, _ = body_digest(json.dumps(empty(200)).encode())
+        assert first == second and date == 1
+        assert body_digest(b'{}') == (None, None)
+
+    def test_unchanged_body_is_not_decoded(self):
+        cache = PollCache()
+        first = RawResponse(empty(1))
+        assert cache.decode(HEADERS, {'from_date': 0}, first) == empty(1)
+        second = RawResponse(empty(2))
+        assert cache.decode(HEADERS, {'from_date': 1}, second) == empty(2)
+        assert second.decoded == 0, 'Неизменное тело не декодируется.'
+        metrics = cache.metrics()
+        assert metrics['unchanged'] == 1
+        assert metrics['decode_skipped_bytes'] == len(second.content)
+
+    def test_body_with_homeworks_is_always_decoded(self):
+        cache = PollCache()
+        data = {'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': 1}
+        for _ in range(2):
+            response = RawResponse(data)
+            assert cache.decode(HEADERS, {'from_date': 0}, response) == data
+            assert response.decoded == 1
+
+    def test_tokens_are_separate(self):
+        cache = PollCache()
+        cache.decode(HEADERS, {'from_date': 0}, RawResponse(empty(1)))
+        other = RawResponse(empty(2))
+        cache.decode({'Authorization': 'OAuth other'}, {'from_date': 0},
+                     other)
+        assert other.decoded == 1
+
+    def test_conditional_request(self):
+        cache = PollCache()
+        params = {'from_date': 0}
+        headers = cache.request_headers(HEADERS, params)
+        assert 'If-None-Match' not in headers
+        assert headers['Authorization'] == HEADERS['Authorization']
+        assert 'gzip' in headers['Accept-Encoding']
+        cache.decode(HEADERS, params, RawResponse(
+            empty(5), headers={'ETag': '"v1"'}))
+        assert cache.request_headers(HEADERS, params)[
+            'If-None-Match'] == '"v1"'
+        assert 'If-None-Match' not in cache.request_headers(
+            HEADERS, {'from_date': 5}), 'Условие только для тех же params.'
+        assert cache.cached(HEADERS, params) == empty(5)
+
+    def test_not_modified_keeps_homeworks(self):
+        cache = PollCache()
+        params = {'from_date': 0}
+        data = {'homeworks': [{'homework_name': 'hw', 'status': 'approved'}],
+                'current_date': 5}
+        cache.decode(HEADERS, params, RawResponse(
+            data, headers={'ETag': '"v1"'}))
+        assert 'If-None-Match' not in cache.request_headers(
+            HEADERS, params), 'Ответ с работами не даёт условий.'
+        assert cache.cached(HEADERS, params) == data, (
+            'Ответ 304 не должен терять работы прошлого тела.'
+        )
+
+    def test_compression_saving(self):
+        cache = PollCache()
+        response = RawResponse(empty(1), headers={
+            'Content-Encoding': 'gzip', 'Content-Length': '10'})
+        cache.decode(HEADERS, {'from_date': 0}, response)
+        assert cache.metrics()['compression_saved_bytes'] == (
+            len(response.content) - 10)
+
+
+class TestRequestHomeworks:
+
+    @pytest.fixture
+    def cache(self, homework_module, monkeypatch):
+        cache = PollCache()
+        monkeypatch.setattr(homework_module, 'POLL_CACHE', cache)
+        return cache
+
+    def test_not_modified(self, homework_module, monkeypatch, cache):
+        sent = []
+
+        def get(url, headers, params, timeout):
+            assert timeout, 'Запрос к API уходит с таймаутом.'
+            sent.append(headers)
+            if 'If-None-Match' in headers:
+                return RawResponse(None, HTTPStatus.NOT_MODIFIED)
+            return RawResponse(empty(7), headers={'ETag': '"v1"'})
+
+        monkeypatch.setattr('requests.get', get)
+        assert homework_module.get_api_answer(3) == empty(7)
+        assert homework_module.get_api_answer(3) == empty(7), (
+            'Ответ 304 заменяется прошлым ответом без работ.'
+        )
+        assert sent[1]['If-None-Match'] == '"v1"'
+        assert cache.metrics()['not_modified'] == 1
+
+    def test_not_modified_after_failed_validation(
+            self, homework_module, monkeypatch, cache):
+        data = {'homeworks': [
+            {'homework_name': 'hw1', 'status': 'approved'},
+            {'homework_name': 'hw2', 'status': 'unknown'},
+        ], 'current_date': 50}
+
+        def get(url, headers, params, timeout):
+            if 'If-None-Match' in headers:
+                return RawResponse(None, HTTPStatus.NOT_MODIFIED)
+            return RawResponse(data, headers={'ETag': '"v1"'})
+
+        monkeypatch.setattr('requests.get', get)
+        with pytest.raises(homework_module.CanSendMessageError):
+            homework_module.validate_response(
+                homework_module.get_api_answer(3))
+        assert homework_module.get_api_answer(3) == data, (
+            'Повтор после ошибки проверки получает те же работы.'
+        )
@@ -0,0 +1,48 @@
+import random
+from http import HTTPStatus
+
+import simulator
+import tenants
+from loadgen import LoadConfig
+
+
+class TestSimulator:
+
+    def test_latency_is_bounded_by_interval(self):
+        config = LoadConfig(students=20, submissions_per_day=20, seed=1)
+        policy = simulator.PollingPolicy(interval=600)
+        result = simulator.simulate(policy, config, days=1)
+        assert result['api_calls'] == 20 * 144, (
+            'Без ошибок каждый тенант опрашивается раз в период.'
+        )
+        assert result['notifications'] > 0
+        assert result['latency_max'] <= 601, (
+            'Без ошибок задержка уведомления не больше периода опроса.'
+        )
+
+    def test_server_errors_keep_period(self):
+        config = LoadConfig(students=5, error_rates={500: 1.0}, seed=1)
+        policy = simulator.PollingPolicy(interval=600)
+        result = simulator.simulate(policy, config, days=1)
+        assert result['errors'] == result['api_calls'] == 5 * 144, (
+            'Бот не замедляет опрос после ошибок сервера.'
+        )
+        assert result['quarantines'] == 0
+
+    def test_rejected_token_is_quarantined(self):
+        config = LoadConfig(students=5, error_rates={401: 1.0}, seed=1)
+        policy = simulator.PollingPolicy(interval=600)
+        result = simulator.simulate(policy, config, days=1)
+        assert result['quarantines'] > 0
+        assert result['api_calls'] < 5 * 144 / 3, (
+            'Тенант с отклонённым токеном опрашивается реже.'
+        )
+
+    def test_next_delay_follows_quarantine(self):
+        policy = simulator.PollingPolicy(interval=10)
+        tenant = tenants.Tenant('t', '', [], timestamp=0)
+        rng = random.Random(0)
+        assert policy.next_delay(tenant, 0, rng) == 10
+        for _ in range(tenants.QUARANTINE_AFTER):
+            tenant.record_failure(HTTPStatus.UNAUTHORIZED, now=0)
+        assert policy.next_delay(tenant, 0, rng) == tenants.QUARANTINE_BASE
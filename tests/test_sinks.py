@@ -0,0 +1,119 @@
+import json
+import threading
+
+import pytest
+
+import sinks
+
+
+class RecordingSink(sinks.Sink):
+    name = 'recording'
+
+    def __init__(self, fail_times=0, gate=None):
+        self.batches = []
+        self.fail_times = fail_times
+        self.gate = gate
+
+    def send_batch(self, messages):
+        if self.gate is not None:
+            self.gate.wait()
+        if self.fail_times:
+            self.fail_times -= 1
+            raise ConnectionError('временный сбой')
+        self.batches.append(list(messages))
+
+
+class TestSinks:
+
+    def test_slow_sink_does_not_block_others(self):
+        gate = threading.Event()
+        slow = RecordingSink(gate=gate)
+        fast = RecordingSink()
+        fast_worker = sinks.SinkWorker(fast)
+        fan_out = sinks.FanOut([sinks.SinkWorker(slow), fast_worker])
+        for number in range(3):
+            fan_out.publish(f'вердикт {number}')
+        fast_worker.join()
+        assert sum(len(batch) for batch in fast.batches) == 3, (
+            'Быстрый приёмник должен получить сообщения, не дожидаясь '
+            'медленного.'
+        )
+        assert not slow.batches
+        gate.set()
+        fan_out.join()
+        assert sum(len(batch) for batch in slow.batches) == 3
+
+    def test_retry_policy(self):
+        sink = RecordingSink(fail_times=2)
+        worker = sinks.SinkWorker(
+            sink, retry_policy=sinks.RetryPolicy(retries=2, delay=0)
+        )
+        worker.put('вердикт')
+        worker.join()
+        assert sink.batches == [['вердикт']]
+
+    def test_retry_resends_only_failed_messages(self):
+        sent = []
+        gate = threading.Event()
+
+        class FlakyBot:
+            failed = False
+
+            def send_message(self, chat_id, text):
+                gate.wait()
+                if text == 'второе' and not self.failed:
+                    self.failed = True
+                    raise ConnectionError('временный сбой')
+                sent.append(text)
+
+        worker = sinks.SinkWorker(
+            sinks.TelegramSink(FlakyBot(), '1'), batch_size=3,
+            retry_policy=sinks.RetryPolicy(retries=1, delay=0)
+        )
+        worker.put('нулевое')
+        for text in ('первое', 'второе', 'третье'):
+            worker.put(text)
+        gate.set()
+        worker.join()
+        assert sent == ['нулевое', 'первое', 'второе', 'третье'], (
+            'Повтор пачки не должен заново отправлять доставленные '
+            'сообщения.'
+        )
+
+    def test_file_sink_batches(self, tmp_path):
+        path = tmp_path / 'verdicts.jsonl'
+        config = tmp_path / 'sinks.json'
+        config.write_text(json.dumps(
+            [{'type': 'file', 'path': str(path), 'batch_size': 10}]
+        ))
+        fan_out = sinks.load_fan_out(config, bot=None, chat_id=None)
+        fan_out.publish('первое')
+        fan_out.publish('второе')
+        fan_out.join()
+        lines = path.read_text(encoding='utf-8').splitlines()
+        assert [json.loads(line)['text'] for line in lines] == [
+            'первое', 'второе'
+        ]
+
+    def test_unknown_sink_type(self):
+        with pytest.raises(ValueError):
+            sinks.build_sink({'type': 'pigeon'}, bot=None, chat_id=None)
+
+    def test_delivered_once(self):
+        delivered = []
+        fan_out = sinks.FanOut([sinks.SinkWorker(RecordingSink()),
+                                sinks.SinkWorker(RecordingSink())])
+        fan_out.publish('вердикт', lambda: delivered.append(True))
+        fan_out.join()
+        assert delivered == [True], (
+            'Доставка отмечается один раз, первым приёмником.'
+        )
+
+    def test_done_reports_error(self):
+        errors = []
+        worker = sinks.SinkWorker(
+            RecordingSink(fail_times=5),
+            retry_policy=sinks.RetryPolicy(retries=1, delay=0))
+        worker.put('вердикт', errors.append)
+        worker.join()
+        assert len(errors) == 1 and isinstance(errors[0], Exception)
@@ -0,0 +1,52 @@
+import threading
+
+import soak
+
+
+def make_samples(rss, fds, cycle):
+    return [{'iteration': number, 'rss_mb': rss[number], 'fds': fds[number],
+             'cycle_ms': cycle[number]} for number in range(len(rss))]
+
+
+class TestSoak:
+
+    def test_flat_run_passes(self):
+        samples = make_samples([50, 50.5, 50.5], [10, 10, 10], [1, 1, 1.1])
+        assert soak.evaluate(samples, 1, 0, 1.5)['ok']
+
+    def test_growth_fails(self):
+        samples = make_samples([50, 60, 70], [10, 12, 20], [1, 2, 3])
+        verdict = soak.evaluate(samples, 1, 0, 1.5)
+        assert not verdict['ok'], (
+            'Рост памяти, дескрипторов и времени цикла должен '
+            'проваливать прогон.'
+        )
+        assert verdict['fd_growth'] == 10
+
+    def test_in_process_soak(self, homework_module):
+        samples = soak.soak(iterations=200, sample_every=50, in_process=True)
+        assert [sample['iteration'] for sample in samples] == [
+            50, 100, 150, 200]
+        assert homework_module.RETRY_PERIOD == 600
+
+    def test_soak_stops_cleanly(self, homework_module, monkeypatch,
+                                tmp_path):
+        monkeypatch.setattr(homework_module, 'TRACES_EXPORT',
+                            str(tmp_path / 'traces.jsonl'))
+        report_error = homework_module.report_error
+        reports = []
+
+        def counting_report_error(*args, **kwargs):
+            reports.append(args)
+            return report_error(*args, **kwargs)
+
+        monkeypatch.setattr(homework_module, 'report_error',
+                            counting_report_error)
+        threads = threading.active_count()
+        soak.soak(iterations=20, sample_every=10, in_process=True)
+        assert threading.active_count() == threads, (
+            'После прогона фоновые потоки main() остановлены.'
+        )
+        assert len(reports) == 20, (
+            'Прерванный концом прогона цикл не учитывается как успешный.'
+        )
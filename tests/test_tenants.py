@@ -0,0 +1,193 @@
+import json
+import os
+import threading
+import time
+from http import HTTPStatus
+
+import delivery
+import tenants
+import tests.check_utils as check_utils
+from cassette import OfflineBot
+from timing_wheel import TimingWheel
+
+
+class TestQuarantine:
+
+    def test_exponential_schedule(self):
+        tenant = tenants.Tenant('broken', 'bad', ['1'], timestamp=0)
+        for _ in range(tenants.QUARANTINE_AFTER - 1):
+            assert not tenant.record_failure(HTTPStatus.UNAUTHORIZED, now=0)
+        assert tenant.record_failure(HTTPStatus.UNAUTHORIZED, now=0)
+        assert tenant.in_quarantine(now=tenants.QUARANTINE_BASE - 1)
+        assert not tenant.in_quarantine(now=tenants.QUARANTINE_BASE)
+        assert tenant.record_failure(HTTPStatus.NOT_FOUND, now=1000)
+        assert tenant.quarantined_until == 1000 + 2 * tenants.QUARANTINE_BASE
+        for _ in range(30):
+            tenant.record_failure(HTTPStatus.UNAUTHORIZED, now=0)
+        assert tenant.quarantined_until == tenants.QUARANTINE_MAX, (
+            'Интервал повторной проверки должен быть ограничен.'
+        )
+        tenant.record_success()
+        assert not tenant.in_quarantine(now=0)
+        assert tenant.failures == 0
+
+    def test_other_errors_do_not_quarantine(self):
+        tenant = tenants.Tenant('flaky', 't', ['1'], timestamp=0)
+        for _ in range(10):
+            assert not tenant.record_failure(
+                HTTPStatus.INTERNAL_SERVER_ERROR, now=0)
+            assert not tenant.record_failure(None, now=0)
+        assert not tenant.in_quarantine(now=0)
+
+    def test_only_consecutive_rejections_count(self):
+        tenant = tenants.Tenant('flaky', 't', ['1'], timestamp=0)
+        for _ in range(tenants.QUARANTINE_AFTER - 1):
+            assert not tenant.record_failure(HTTPStatus.UNAUTHORIZED, now=0)
+        assert not tenant.record_failure(
+            HTTPStatus.INTERNAL_SERVER_ERROR, now=0)
+        assert not tenant.record_failure(HTTPStatus.UNAUTHORIZED, now=0), (
+            'Другая ошибка прерывает серию отказов 401/404.'
+        )
+
+    def test_broken_token_is_isolated(self, homework_module, monkeypatch):
+        broken = tenants.Tenant('broken', 'bad', ['1'], timestamp=0)
+        healthy = tenants.Tenant('healthy', 'good', ['2'], timestamp=0)
+        calls = []
+
+        def get(*args, headers=None, **kwargs):
+            calls.append(headers['Authorization'])
+            status = (HTTPStatus.UNAUTHORIZED
+                      if headers['Authorization'] == 'OAuth bad'
+                      else HTTPStatus.OK)
+            return check_utils.MockResponseGET(random_timestamp=100,
+                                               http_status=status)
+
+        monkeypatch.setattr('requests.get', get)
+        services = homework_module.Services(OfflineBot(), tenant_list=[])
+        for _ in range(tenants.QUARANTINE_AFTER + 5):
+            for tenant in (broken, healthy):
+                if not tenant.in_quarantine():
+                    homework_module.serve_tenant(services, tenant)
+        services.delivery.shutdown()
+        assert calls.count('OAuth bad') == tenants.QUARANTINE_AFTER, (
+            'Тенант на карантине не должен опрашиваться.'
+        )
+        assert calls.count('OAuth good') == tenants.QUARANTINE_AFTER + 5
+        assert healthy.failures == 0 and healthy.timestamp == 100
+        assert broken.in_quarantine()
+        (record,) = broken.errors.records.values()
+        assert record.count == tenants.QUARANTINE_AFTER
+        assert record.reported == 1, (
+            'Об одной и той же ошибке тенанту пишут один раз, '
+            'повторы уходят сводкой.'
+        )
+
+    def test_weights_decide_send_order(self, homework_module, monkeypatch):
+        heavy = tenants.Tenant('heavy', 'heavy', ['h'], timestamp=0,
+                               weight=3)
+        light = tenants.Tenant('light', 'light', ['l'], timestamp=0)
+
+        class Response:
+            status_code = HTTPStatus.OK
+
+            def __init__(self, token):
+                self.data = {'current_date': 100, 'homeworks': [
+                    {'id': f'{token}-{number}', 'homework_name': 'hw.zip',
+                     'status': 'approved'} for number in range(8)]}
+
+            def json(self):
+                return self.data
+
+        monkeypatch.setattr(
+            'requests.get', lambda *args, headers=None, **kwargs: Response(
+                headers['Authorization'][len('OAuth '):]))
+        release = threading.Event()
+        sent = []
+
+        def send(chat_id, text):
+            release.wait(1)
+            sent.append(chat_id)
+
+        services = homework_module.Services(OfflineBot(),
+                                            tenant_list=[heavy, light])
+        services.delivery.shutdown()
+        services.delivery = delivery.ChatDelivery(
+            send, max_workers=1, global_rate=10 ** 9, chat_rate=10 ** 9,
+            weights={'heavy': 3, 'light': 1})
+        threads = [threading.Thread(target=homework_module.poll_tenant,
+                                    args=(services, tenant))
+                   for tenant in (heavy, light)]
+        for thread in threads:
+            thread.start()
+        while sum(services.delivery.metrics().values()) < 15:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join()
+        services.close()
+        assert sent[1:9].count('h') == 6, (
+            'Вердикты цикла ставятся в очередь сразу, и тенант с весом 3 '
+            'получает втрое больше отправок.'
+        )
+
+
+def write_registry(path, tenants_config, bump=0):
+    path.write_text(json.dumps(tenants_config))
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + bump))
+
+
+class TestRegistry:
+
+    def test_incremental_reload(self, tmp_path):
+        path = tmp_path / 'tenants.json'
+        write_registry(path, [
+            {'name': 'a', 'practicum_token': 'ta', 'chat_ids': [1]},
+            {'name': 'b', 'practicum_token': 'tb', 'chat_ids': [2]},
+        ])
+        registry = tenants.TenantRegistry(path)
+        first_a, first_b = registry.tenants['a'], registry.tenants['b']
+        first_a.timestamp, first_b.timestamp = 100, 200
+        first_b.quarantined_until = 10 ** 10
+        assert not registry.changed()
+        write_registry(path, [
+            {'name': 'b', 'practicum_token': 'new', 'chat_ids': [2, 3]},
+            {'name': 'c', 'practicum_token': 'tc', 'chat_ids': [4]},
+        ], bump=10 ** 9)
+        assert registry.changed()
+        added, removed, rekeyed = registry.reload()
+        assert [t.name for t in added] == ['c']
+        assert removed == [first_a]
+        assert rekeyed == [first_b]
+        assert registry.tenants['b'] is first_b
+        assert first_b.timestamp == 200, 'Курсор опроса сохраняется.'
+        assert first_b.headers == {'Authorization': 'OAuth new'}
+        assert not first_b.in_quarantine(), 'Новый токен снимает карантин.'
+        assert first_b.chat_ids == ['2', '3']
+
+    def test_broken_file_keeps_tenants(self, homework_module, tmp_path):
+        path = tmp_path / 'tenants.json'
+        write_registry(path, [
+            {'name': 'a', 'practicum_token': 'ta', 'chat_ids': [1]},
+        ])
+        registry = tenants.TenantRegistry(path)
+        services = homework_module.Services(OfflineBot(), list(registry))
+        wheel = TimingWheel()
+        timers = {tenant.name: wheel.schedule(5, tenant)
+                  for tenant in registry}
+        path.write_text('[{"name": "a"')
+        homework_module.apply_registry_changes(services, registry, wheel,
+                                               timers)
+        assert list(registry.tenants) == ['a']
+        assert not registry.changed(), 'Сломанный файл не перечитывается.'
+        write_registry(path, [
+            {'name': 'b', 'practicum_token': 'tb', 'chat_ids': [1]},
+        ], bump=10 ** 9)
+        homework_module.apply_registry_changes(services, registry, wheel,
+                                               timers)
+        services.delivery.shutdown()
+        assert list(timers) == ['b']
+        assert wheel.advance(1) == [registry.tenants['b']], (
+            'Новый тенант опрашивается на ближайшем такте, '
+            'таймер удалённого отменён.'
+        )
@@ -0,0 +1,57 @@
+import random
+
+import pytest
+
+from timing_wheel import TimingWheel
+
+
+def run(wheel, until):
+    fired = []
+    for second in range(1, until + 1):
+        fired.extend((second, item) for item in wheel.advance(second))
+    return fired
+
+
+class TestTimingWheel:
+
+    def test_fires_on_deadline_across_levels(self):
+        wheel = TimingWheel(tick=1, slots=4, levels=3)
+        rng = random.Random(0)
+        delays = [rng.randint(1, 200) for _ in range(300)]
+        for number, delay in enumerate(delays):
+            wheel.schedule(delay, number)
+        fired = run(wheel, 250)
+        assert sorted(fired) == sorted(
+            (delay, number) for number, delay in enumerate(delays)
+        ), 'Каждый таймер срабатывает ровно на своём такте.'
+        assert len(wheel) == 0
+
+    def test_cancel(self):
+        wheel = TimingWheel(tick=1, slots=4, levels=2)
+        keep = wheel.schedule(3, 'keep')
+        drop = wheel.schedule(30, 'drop')
+        assert wheel.cancel(drop)
+        assert not wheel.cancel(drop)
+        assert run(wheel, 40) == [(3, 'keep')]
+        assert not wheel.cancel(keep), 'Сработавший таймер не отменяется.'
+
+    def test_precision_and_jitter(self):
+        wheel = TimingWheel(tick=10, jitter=30, seed=1)
+        for number in range(100):
+            wheel.schedule(25, number)
+        fired = run(wheel, 100)
+        seconds = {second for second, _ in fired}
+        assert len(fired) == 100
+        assert min(seconds) >= 30 and max(seconds) <= 60, (
+            'Срок округляется вверх до такта и сдвигается на целые такты.'
+        )
+        assert len(seconds) > 1, 'Разброс распределяет таймеры по корзинам.'
+
+    def test_far_timer_beyond_top_level(self):
+        wheel = TimingWheel(tick=1, slots=2, levels=2)
+        wheel.schedule(11, 'far')
+        assert run(wheel, 12) == [(11, 'far')]
+
+    def test_invalid(self):
+        with pytest.raises(ValueError):
+            TimingWheel(tick=0)
@@ -0,0 +1,68 @@
+from telebot.apihelper import ApiTelegramException
+
+import token_pool
+
+
+class PoolBot:
+    def __init__(self, name, limited_times=0):
+        self.name = name
+        self.limited_times = limited_times
+        self.sent = []
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        if self.limited_times:
+            self.limited_times -= 1
+            raise ApiTelegramException('sendMessage', None, {
+                'error_code': 429,
+                'description': 'Too Many Requests',
+                'parameters': {'retry_after': 30},
+            })
+        self.sent.append((chat_id, text))
+        return self.name
+
+
+class TestTokenPool:
+
+    def test_sticky_and_balanced(self):
+        bots = [PoolBot('a'), PoolBot('b')]
+        pool = token_pool.BotPool(bots, rate=1000)
+        first = pool.send_message(chat_id='1', text='x')
+        second = pool.send_message(chat_id='2', text='x')
+        assert first != second, (
+            'Новый чат должен достаться наименее загруженному боту.'
+        )
+        assert pool.send_message(chat_id='1', text='y') == first, (
+            'Чат должен быть закреплён за одним ботом.'
+        )
+
+    def test_backoff_is_per_token(self):
+        limited = PoolBot('a', limited_times=1)
+        healthy = PoolBot('b')
+        pool = token_pool.BotPool([limited, healthy], rate=1000)
+        assert pool.send_message(chat_id='1', text='x') == 'b', (
+            'После 429 сообщение должно уйти через другого бота.'
+        )
+        assert pool.entries[0].backoff_until > 0
+        assert pool.entries[1].backoff_until == 0
+        assert pool.send_message(chat_id='2', text='x') == 'b'
+
+    def test_chat_returns_after_backoff(self):
+        limited = PoolBot('a', limited_times=1)
+        pool = token_pool.BotPool([limited, PoolBot('b')], rate=1000)
+        assert pool.send_message(chat_id='1', text='x') == 'b'
+        assert pool.send_message(chat_id='1', text='y') == 'b', (
+            'Во время паузы чат остаётся у другого бота.'
+        )
+        pool.entries[0].backoff_until = 0.0
+        assert pool.send_message(chat_id='1', text='z') == 'a', (
+            'После паузы чат должен вернуться к своему боту.'
+        )
+        assert [entry.chats for entry in pool.entries] == [1, 0]
+
+    def test_retry_after(self):
+        error = ApiTelegramException('sendMessage', None, {
+            'error_code': 429, 'description': '',
+            'parameters': {'retry_after': 5},
+        })
+        assert token_pool.get_retry_after(error) == 5
+        assert token_pool.get_retry_after(ValueError()) is None
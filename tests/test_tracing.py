@@ -0,0 +1,105 @@
+import json
+
+import pytest
+
+import tests.check_utils as check_utils
+import tracing
+from cassette import OfflineBot
+
+
+@pytest.fixture
+def traced(homework_module, monkeypatch, tmp_path):
+    path = tmp_path / 'traces.jsonl'
+    monkeypatch.setattr(homework_module, 'TRACES_EXPORT', str(path))
+    monkeypatch.setattr(tracing, '_active', None)
+    yield path
+    monkeypatch.setattr(tracing, '_active', None)
+
+
+def read_spans(path):
+    spans = []
+    for line in path.read_text(encoding='utf-8').splitlines():
+        for resource in json.loads(line)['resourceSpans']:
+            for scope in resource['scopeSpans']:
+                spans.extend(scope['spans'])
+    return spans
+
+
+class TestTracing:
+
+    def test_homework_trace(self, homework_module, monkeypatch, traced,
+                            data_with_new_hw_status):
+        monkeypatch.setattr(
+            'requests.get',
+            lambda *args, **kwargs: check_utils.MockResponseGET(
+                random_timestamp=1, data=data_with_new_hw_status))
+        services = homework_module.Services(OfflineBot())
+        response = homework_module.get_api_answer(0)
+        homework_module.check_response(response)
+        homework_module.handle_homeworks(services, response['homeworks'])
+        services.tracer.shutdown()
+        spans = read_spans(traced)
+        names = sorted(span['name'] for span in spans)
+        assert names == ['check_response', 'get_api_answer', 'homework',
+                         'parse_status', 'send_message']
+        (root,) = [span for span in spans if span['name'] == 'homework']
+        assert {span['traceId'] for span in spans} == {root['traceId']}
+        assert all(span['parentSpanId'] == root['spanId']
+                   for span in spans if span is not root)
+        assert int(root['startTimeUnixNano']) <= min(
+            int(span['startTimeUnixNano']) for span in spans)
+
+    def test_sampling(self, homework_module, monkeypatch, traced,
+                      data_with_new_hw_status):
+        monkeypatch.setattr(homework_module, 'TRACES_SAMPLE_RATE', 0.0)
+        services = homework_module.Services(OfflineBot())
+        homework_module.handle_homeworks(
+            services, data_with_new_hw_status['homeworks'])
+        services.tracer.shutdown()
+        assert not traced.exists(), 'Вне выборки спаны не записываются.'
+
+    def test_exporter_drops_when_full(self):
+        class Sink:
+            def export(self, spans):
+                pass
+
+        exporter = tracing.BatchExporter(Sink(), max_queue=2, interval=60)
+        exporter.add([tracing.Span('t', str(n), None, 'x', 0, 1)
+                      for n in range(5)])
+        assert exporter.dropped == 3
+        exporter.shutdown()
+
+    def test_stage_is_transparent_without_tracer(self, monkeypatch):
+        monkeypatch.setattr(tracing, '_active', None)
+        calls = []
+
+        @tracing.stage('x')
+        def func(value):
+            """Документация."""
+            calls.append(value)
+            return value
+
+        assert func(1) == 1 and calls == [1]
+        assert func.__doc__ == 'Документация.'
+
+    def test_pipeline_trace(self, homework_module, monkeypatch, traced,
+                            tmp_path, data_with_new_hw_status):
+        monkeypatch.setattr(homework_module, 'PIPELINE_POLICY', 'block')
+        monkeypatch.setattr(homework_module, 'PIPELINE_SPILL_DIR',
+                            str(tmp_path))
+        services = homework_module.Services(OfflineBot())
+        homework_module.handle_homeworks(
+            services, data_with_new_hw_status['homeworks'])
+        services.close(timeout=1)
+        spans = read_spans(traced)
+        names = {span['name'] for span in spans}
+        assert {'homework', 'pipeline.parse_queue', 'parse_status',
+                'pipeline.delivery_queue', 'send_message'} <= names, (
+            'Ожидание в очередях и отправка конвейера попадают в трассу.'
+        )
+        (root,) = [span for span in spans if span['name'] == 'homework']
+        assert {span['traceId'] for span in spans} == {root['traceId']}
+        assert int(root['endTimeUnixNano']) >= max(
+            int(span['endTimeUnixNano']) for span in spans), (
+            'Трасса завершается после отправки.'
+        )
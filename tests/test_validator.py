@@ -0,0 +1,45 @@
+import pytest
+
+
+INVALID_RESPONSES = [
+    [],
+    {'current_date': 1},
+    {'homeworks': []},
+    {'homeworks': {}, 'current_date': 1},
+    {'homeworks': [{'homework_name': 'hw'}], 'current_date': 1},
+    {'homeworks': [{'status': 'approved'}], 'current_date': 1},
+    {'homeworks': [{'homework_name': 'hw', 'status': 'lost'}],
+     'current_date': 1},
+    {'homeworks': [['status']], 'current_date': 1},
+    {'homeworks': [42], 'current_date': 1},
+]
+
+
+def two_step(homework_module, response):
+    homework_module.check_response(response)
+    return [homework_module.parse_status(homework)
+            for homework in response['homeworks']]
+
+
+class TestValidateResponse:
+
+    def test_records_match_parse_status(
+            self, homework_module, data_with_new_hw_status):
+        records = homework_module.validate_response(data_with_new_hw_status)
+        assert [record.message for record in records] == two_step(
+            homework_module, data_with_new_hw_status)
+        (record,) = records
+        assert record.id == 777777777
+        assert record.status is homework_module.STATUS_KEYS['approved']
+
+    @pytest.mark.parametrize('response', INVALID_RESPONSES)
+    def test_same_exception_contract(self, homework_module, response):
+        with pytest.raises(Exception) as expected:
+            two_step(homework_module, response)
+        with pytest.raises(Exception) as actual:
+            homework_module.validate_response(response)
+        assert type(actual.value) is type(expected.value), (
+            'validate_response должна выбрасывать те же исключения, что '
+            'check_response и parse_status.'
+        )
+        assert str(actual.value) == str(expected.value)
@@ -0,0 +1,88 @@
+from concurrent.futures import Future
+
+import pytest
+
+import tenants
+import tests.check_utils as check_utils
+from cassette import OfflineBot
+from verdict_templates import VerdictTemplates, compile_template
+
+HOMEWORK = {'homework_name': 'hw.zip', 'status': 'approved'}
+
+
+class RecordingDelivery:
+
+    def __init__(self):
+        self.sent = {}
+
+    def submit(self, chat_ids, text, send=None, key=None):
+        for chat_id in chat_ids:
+            self.sent[chat_id] = text
+        future = Future()
+        future.set_result({})
+        return future
+
+
+class TestVerdictTemplates:
+
+    def test_default_locale_matches_parse_status(self, homework_module):
+        templates = VerdictTemplates(homework_module.HOMEWORK_VERDICTS)
+        for status, verdict in homework_module.HOMEWORK_VERDICTS.items():
+            assert templates.render(status, 'hw.zip') == (
+                f'Изменился статус проверки работы "hw.zip". {verdict}')
+
+    def test_compile(self):
+        assert compile_template('{name} - {verdict} - {name}', 'ок') == (
+            '', ' - ок - ', '')
+        with pytest.raises(ValueError):
+            compile_template('{verdict}', 'ок')
+        with pytest.raises(ValueError):
+            compile_template('{name} {date}', 'ок')
+
+    def test_tenant_override_and_fallback(self, homework_module):
+        templates = VerdictTemplates(homework_module.HOMEWORK_VERDICTS)
+        templates.add_tenant('student', {
+            'en': {'change': '{name}: {verdict}',
+                   'verdicts': {'approved': 'OK'}}})
+        template_set = templates.resolve('en', 'student')
+        assert templates.render('approved', 'hw', template_set) == 'hw: OK'
+        assert templates.render('rejected', 'hw', template_set).startswith(
+            'hw: Homework reviewed'), 'Недостающее берётся из языка.'
+        assert templates.resolve('en', 'other') == 'en'
+        assert templates.resolve('xx') == 'ru'
+        templates.add_tenant('student', {})
+        assert templates.resolve('en', 'student') == 'en', (
+            'Прежние наборы тенанта забываются.'
+        )
+
+
+class TestTenantLocales:
+
+    def test_config_errors(self):
+        config = {'name': 'student', 'practicum_token': 't',
+                  'chat_ids': ['1'], 'templates': {'en': {'change': '{x}'}}}
+        with pytest.raises(ValueError):
+            tenants.tenant_from_config(config)
+
+    def test_chats_get_their_language(self, homework_module, monkeypatch):
+        monkeypatch.setattr(homework_module, 'TEMPLATES', VerdictTemplates(
+            homework_module.HOMEWORK_VERDICTS))
+        monkeypatch.setattr(
+            'requests.get',
+            lambda *args, **kwargs: check_utils.MockResponseGET(
+                random_timestamp=1, data={'homeworks': [HOMEWORK],
+                                          'current_date': 1}))
+        tenant = tenants.tenant_from_config({
+            'name': 'student', 'practicum_token': 't',
+            'chat_ids': ['1', '2', '3'], 'chat_locales': {'2': 'en'},
+            'templates': {'en': {'change': '[{name}] {verdict}'}}})
+        services = homework_module.Services(OfflineBot(), tenant_list=[])
+        services.delivery.shutdown()
+        services.delivery = RecordingDelivery()
+        homework_module.poll_tenant(services, tenant)
+        expected = homework_module.parse_status(HOMEWORK)
+        assert services.delivery.sent['1'] == expected
+        assert services.delivery.sent['3'] == expected
+        assert services.delivery.sent['2'] == (
+            '[hw.zip] Homework reviewed: the reviewer liked it. Hooray!'
+        )
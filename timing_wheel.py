@@ -0,0 +1,123 @@
+"""Иерархическое колесо таймеров для сроков опроса тенантов.
+
+Время делится на такты длиной tick секунд (точность срабатывания).
+Уровень 0 колеса хранит таймеры ближайших slots тактов по одной
+корзине на такт, каждый следующий уровень — в slots раз более
+далёкие сроки с корзинами в slots раз шире. Когда стрелка младшего
+уровня проходит полный круг, корзина старшего уровня раскладывается
+по младшим. Постановка и отмена таймера стоят O(1), продвижение
+на такт — O(1) плюс число сработавших и переложенных таймеров.
+
+Разброс jitter применяется к номеру корзины: срок сдвигается на
+случайное целое число тактов, так что таймеры одного срока
+распределяются по соседним корзинам без отдельной случайной
+величины на каждую секунду.
+"""
+
+import math
+import random
+
+
+class Timer:
+    """Таймер с нагрузкой item, срабатывающий на такте deadline."""
+
+    __slots__ = ('deadline', 'item', 'bucket')
+
+    def __init__(self, deadline, item) -> None:
+        """Таймер вне колеса."""
+        self.deadline = deadline
+        self.item = item
+        self.bucket = None
+
+
+class TimingWheel:
+    """Колесо таймеров с уровнями по slots корзин."""
+
+    def __init__(self, tick=1.0, slots=256, levels=4, jitter=0.0,
+                 now=0.0, seed=None) -> None:
+        """Колесо с точностью tick секунд и стрелкой на времени now."""
+        if tick <= 0 or slots < 2 or levels < 1:
+            raise ValueError('Неверные параметры колеса таймеров')
+        self.tick = tick
+        self.slots = slots
+        self.levels = levels
+        self.jitter_ticks = int(jitter / tick)
+        self.rng = random.Random(seed)
+        self.current = int(now // tick)
+        self.wheels = [[{} for _ in range(slots)] for _ in range(levels)]
+        self.spans = [slots ** (level + 1) for level in range(levels)]
+        self.count = 0
+
+    def __len__(self) -> int:
+        """Число активных таймеров."""
+        return self.count
+
+    def _place(self, timer) -> None:
+        """Корзина по оставшемуся до срока числу тактов."""
+        remaining = timer.deadline - self.current
+        level = 0
+        while level < self.levels - 1 and remaining >= self.spans[level]:
+            level += 1
+        unit = self.spans[level] // self.slots
+        bucket = self.wheels[level][(timer.deadline // unit) % self.slots]
+        bucket[timer] = None
+        timer.bucket = bucket
+
+    def schedule(self, delay, item) -> Timer:
+        """Таймер, срабатывающий через delay секунд (не раньше такта)."""
+        ticks = max(1, math.ceil(delay / self.tick))
+        if self.jitter_ticks:
+            ticks += self.rng.randint(0, self.jitter_ticks)
+        timer = Timer(self.current + ticks, item)
+        self._place(timer)
+        self.count += 1
+        return timer
+
+    def cancel(self, timer) -> bool:
+        """Отмена таймера; False, если он уже сработал или отменён."""
+        if timer.bucket is None:
+            return False
+        del timer.bucket[timer]
+        timer.bucket = None
+        self.count -= 1
+        return True
+
+    def _cascade(self, level) -> None:
+        """Раскладка текущей корзины уровня level по младшим уровням."""
+        unit = self.spans[level] // self.slots
+        index = (self.current // unit) % self.slots
+        bucket = self.wheels[level][index]
+        if not bucket:
+            return
+        self.wheels[level][index] = {}
+        for timer in bucket:
+            self._place(timer)
+
+    def _step(self) -> list:
+        """Продвижение стрелки на один такт; сработавшие нагрузки."""
+        self.current += 1
+        for level in range(self.levels - 1, 0, -1):
+            if self.current % (self.spans[level] // self.slots) == 0:
+                self._cascade(level)
+        index = self.current % self.slots
+        bucket = self.wheels[0][index]
+        if not bucket:
+            return []
+        self.wheels[0][index] = {}
+        due = []
+        for timer in bucket:
+            timer.bucket = None
+            due.append(timer.item)
+        self.count -= len(due)
+        return due
+
+    def advance(self, now) -> list:
+        """Нагрузки таймеров, срок которых наступил к моменту now."""
+        target = int(now // self.tick)
+        due: list = []
+        while self.current < target:
+            if not self.count:
+                self.current = target
+                break
+            due.extend(self._step())
+        return due
@@ -0,0 +1,142 @@
+"""Пул ботов Telegram для увеличения пропускной способности отправки.
+
+Каждый чат закрепляется за одним ботом пула, чтобы сообщения в чат
+шли по порядку и от одного отправителя. Новые чаты достаются наименее
+загруженному боту. Ответ 429 (Too Many Requests) переводит в ожидание
+только тот бот, которому он пришёл; его чаты на это время переходят
+к другим ботам, а после паузы возвращаются к своему первому боту.
+
+Все боты пула должны иметь доступ к чатам подписки: пользователь
+должен запустить каждого бота, а в группы должны быть добавлены все.
+"""
+
+import logging
+import threading
+import time
+
+from delivery import GLOBAL_RATE, RateLimiter
+
+logger = logging.getLogger(__name__)
+
+TOO_MANY_REQUESTS = 429
+# Пауза, если Telegram не сообщил retry_after.
+DEFAULT_BACKOFF = 1.0
+
+
+def get_retry_after(error):
+    """Пауза из ответа 429 или None для прочих ошибок."""
+    if getattr(error, 'error_code', None) != TOO_MANY_REQUESTS:
+        return None
+    result_json = getattr(error, 'result_json', None) or {}
+    parameters = result_json.get('parameters') or {}
+    return float(parameters.get('retry_after', DEFAULT_BACKOFF))
+
+
+class PooledBot:
+    """Бот пула со своим ограничителем частоты и паузой после 429."""
+
+    def __init__(self, bot, rate=GLOBAL_RATE) -> None:
+        """Обёртка над ботом с ограничением rate сообщений в секунду."""
+        self.bot = bot
+        self.limiter = RateLimiter(rate)
+        self.backoff_until = 0.0
+        self.in_flight = 0
+        self.chats = 0
+        self.sent = 0
+
+    def available(self, now) -> bool:
+        """Бот не находится в паузе после 429."""
+        return now >= self.backoff_until
+
+    def load(self) -> tuple:
+        """Ключ сравнения загрузки ботов."""
+        return (self.in_flight, self.chats)
+
+
+class BotPool:
+    """Набор ботов с интерфейсом одного бота TeleBot."""
+
+    def __init__(self, bots, rate=GLOBAL_RATE) -> None:
+        """Пул из ботов bots с ограничением rate на каждого."""
+        self.entries = [PooledBot(bot, rate) for bot in bots]
+        self.assignments: dict = {}
+        # Первый бот чата: к нему чат возвращается после паузы.
+        self.homes: dict = {}
+        self.lock = threading.Lock()
+
+    @property
+    def primary(self):
+        """Основной бот пула, например для приёма команд."""
+        return self.entries[0].bot
+
+    def __len__(self) -> int:
+        """Количество ботов в пуле."""
+        return len(self.entries)
+
+    def _assign(self, chat_id, entry) -> None:
+        """Закрепление чата за ботом."""
+        previous = self.assignments.get(chat_id)
+        if previous is entry:
+            return
+        if previous is not None:
+            previous.chats -= 1
+        entry.chats += 1
+        self.assignments[chat_id] = entry
+
+    def _choose(self, chat_id) -> tuple:
+        """Выбор бота для чата; возвращает бота и время ожидания."""
+        now = time.monotonic()
+        with self.lock:
+            entry = self.assignments.get(chat_id)
+            home = self.homes.get(chat_id)
+            if home is not None and home.available(now):
+                entry = home
+                self._assign(chat_id, entry)
+            elif entry is None or not entry.available(now):
+                available = [
+                    candidate for candidate in self.entries
+                    if candidate.available(now)
+                ]
+                if available:
+                    entry = min(available, key=PooledBot.load)
+                else:
+                    entry = min(self.entries,
+                                key=lambda item: item.backoff_until)
+                self._assign(chat_id, entry)
+                self.homes.setdefault(chat_id, entry)
+            entry.in_flight += 1
+            return entry, max(0.0, entry.backoff_until - now)
+
+    def _call(self, chat_id, method, **kwargs):
+        """Вызов метода API ботом, закреплённым за чатом."""
+        last_error = None
+        for _ in range(len(self.entries)):
+            entry, wait = self._choose(chat_id)
+            try:
+                if wait:
+                    time.sleep(wait)
+                entry.limiter.acquire()
+                result = getattr(entry.bot, method)(chat_id=chat_id, **kwargs)
+                entry.sent += 1
+                return result
+            except Exception as error:
+                retry_after = get_retry_after(error)
+                if retry_after is None:
+                    raise
+                with self.lock:
+                    entry.backoff_until = time.monotonic() + retry_after
+                logger.warning(
+                    f'Бот пула получил 429, пауза {retry_after} с')
+                last_error = error
+            finally:
+                with self.lock:
+                    entry.in_flight -= 1
+        raise last_error
+
+    def send_message(self, chat_id=None, text=None, **kwargs):
+        """Отправка сообщения, как TeleBot.send_message."""
+        return self._call(chat_id, 'send_message', text=text, **kwargs)
+
+    def edit_message_text(self, text=None, chat_id=None, **kwargs):
+        """Изменение сообщения ботом, закреплённым за чатом."""
+        return self._call(chat_id, 'edit_message_text', text=text, **kwargs)
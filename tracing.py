@@ -0,0 +1,385 @@
+"""Трассировка пути вердикта от опроса API до отправки в Telegram.
+
+Каждая работа с новым статусом становится трассой: корневой спан
+homework от начала опроса до конца отправки и дочерние спаны
+get_api_answer, check_response, parse_status и send_message. Опрос
+и проверка ответа общие для всех работ цикла, поэтому их замеры
+копируются в каждую трассу цикла.
+
+Спаны выгружаются пачками в фоновом потоке в формате OTLP/JSON:
+в файл (одна строка на пачку) или в коллектор OpenTelemetry
+по HTTP (адрес вида http://collector:4318/v1/traces). Решение
+о записи трассы (sample_rate) принимается один раз на работу;
+без трассировки и для невыбранных работ спаны не создаются.
+
+В режиме конвейера трасса, начатая start(), едет вместе с работой
+по очередям: потоки конвейера добавляют в неё спаны ожидания
+в очереди и отправки, а завершается она после release() последней
+отправки.
+"""
+
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+import requests  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+SERVICE_NAME = 'homework_bot'
+# Коды статуса спана OTLP.
+STATUS_OK = 1
+STATUS_ERROR = 2
+
+# Трассировщик, замеряющий этапы опроса; задаётся install().
+_active = None
+_cycle = threading.local()
+
+
+def otlp_value(value) -> dict:
+    """Значение атрибута в формате OTLP."""
+    if isinstance(value, bool):
+        return {'boolValue': value}
+    if isinstance(value, int):
+        return {'intValue': str(value)}
+    if isinstance(value, float):
+        return {'doubleValue': value}
+    return {'stringValue': str(value)}
+
+
+class Span:
+    """Завершённый или выполняющийся спан."""
+
+    __slots__ = ('trace_id', 'span_id', 'parent_id', 'name', 'start',
+                 'end', 'attributes', 'error')
+
+    def __init__(self, trace_id, span_id, parent_id, name, start,
+                 end=None, attributes=None, error=None) -> None:
+        """Спан name со временем в наносекундах Unix."""
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.parent_id = parent_id
+        self.name = name
+        self.start = start
+        self.end = end
+        self.attributes = attributes or {}
+        self.error = error
+
+    def to_otlp(self) -> dict:
+        """Спан в формате OTLP/JSON."""
+        span = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': 1,
+            'startTimeUnixNano': str(self.start),
+            'endTimeUnixNano': str(self.end),
+            'attributes': [{'key': key, 'value': otlp_value(value)}
+                           for key, value in self.attributes.items()],
+            'status': ({'code': STATUS_ERROR, 'message': self.error}
+                       if self.error else {'code': STATUS_OK}),
+        }
+        if self.parent_id:
+            span['parentSpanId'] = self.parent_id
+        return span
+
+
+def otlp_payload(spans) -> dict:
+    """Запрос экспорта OTLP/JSON с пачкой спанов."""
+    return {'resourceSpans': [{
+        'resource': {'attributes': [
+            {'key': 'service.name', 'value': otlp_value(SERVICE_NAME)}
+        ]},
+        'scopeSpans': [{
+            'scope': {'name': SERVICE_NAME},
+            'spans': [span.to_otlp() for span in spans],
+        }],
+    }]}
+
+
+class FileSpanSink:
+    """Пачки спанов строками JSON в файле."""
+
+    def __init__(self, path) -> None:
+        """Дозапись в файл path."""
+        self.path = path
+
+    def export(self, spans) -> None:
+        """Запись одной пачки."""
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.write(json.dumps(otlp_payload(spans),
+                                  ensure_ascii=False) + '\n')
+
+
+class CollectorSpanSink:
+    """Отправка пачек в коллектор по OTLP/HTTP с телом в JSON."""
+
+    def __init__(self, url, timeout=5) -> None:
+        """Коллектор по адресу url."""
+        self.url = url
+        self.timeout = timeout
+
+    def export(self, spans) -> None:
+        """Отправка одной пачки."""
+        response = requests.post(self.url, json=otlp_payload(spans),
+                                 timeout=self.timeout)
+        response.raise_for_status()
+
+
+class BatchExporter:
+    """Очередь спанов с выгрузкой пачками в фоновом потоке.
+
+    При переполнении очереди спаны отбрасываются, а не задерживают
+    опрос; число отброшенных хранится в dropped.
+    """
+
+    def __init__(self, sink, batch_size=256, interval=5.0,
+                 max_queue=4096) -> None:
+        """Выгрузка в sink не реже раза в interval секунд."""
+        self.sink = sink
+        self.batch_size = batch_size
+        self.interval = interval
+        self.queue: queue.Queue = queue.Queue(max_queue)
+        self.dropped = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True,
+                                       name='tracing')
+        self.thread.start()
+
+    def add(self, spans) -> None:
+        """Постановка спанов в очередь без ожидания."""
+        for span in spans:
+            try:
+                self.queue.put_nowait(span)
+            except queue.Full:
+                self.dropped += 1
+
+    def _export(self, batch) -> None:
+        """Выгрузка пачки; ошибка только логируется."""
+        try:
+            self.sink.export(batch)
+        except Exception as error:
+            logger.error(f'Не удалось выгрузить {len(batch)} спанов: '
+                         f'{error}')
+
+    def _drain(self) -> None:
+        """Выгрузка всего, что накопилось в очереди."""
+        batch: list = []
+        while True:
+            try:
+                batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= self.batch_size:
+                self._export(batch)
+                batch = []
+        if batch:
+            self._export(batch)
+
+    def _run(self) -> None:
+        """Цикл фоновой выгрузки."""
+        while not self.stopped.wait(self.interval):
+            self._drain()
+        self._drain()
+
+    def shutdown(self) -> None:
+        """Выгрузка остатка и остановка потока."""
+        self.stopped.set()
+        self.thread.join()
+
+
+def new_id(rng, bits) -> str:
+    """Случайный идентификатор в шестнадцатеричном виде."""
+    return f'{rng.getrandbits(bits):0{bits // 4}x}'
+
+
+class Trace:
+    """Трасса одной работы."""
+
+    def __init__(self, tracer, name, attributes, stages) -> None:
+        """Трасса с корнем name и замерами этапов цикла stages."""
+        self.tracer = tracer
+        rng = tracer.rng
+        self.trace_id = new_id(rng, 128)
+        start = stages[0][1] if stages else time.time_ns()
+        self.root = Span(self.trace_id, new_id(rng, 64), None, name,
+                         start, attributes=attributes)
+        self.spans = [
+            Span(self.trace_id, new_id(rng, 64), self.root.span_id,
+                 stage, started, ended, error=error)
+            for stage, started, ended, error in stages
+        ]
+        # Сколько ещё release() до завершения трассы и её ошибка.
+        self.holds = 1
+        self.error = None
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """Дочерний спан на время блока."""
+        span = Span(self.trace_id, new_id(self.tracer.rng, 64),
+                    self.root.span_id, name, time.time_ns(),
+                    attributes=attributes)
+        try:
+            yield span
+        except Exception as error:
+            span.error = repr(error)
+            raise
+        finally:
+            span.end = time.time_ns()
+            self.spans.append(span)
+
+    def record(self, name, start, end=None, error=None,
+               **attributes) -> None:
+        """Дочерний спан по уже замеренному времени (в наносекундах)."""
+        self.spans.append(Span(
+            self.trace_id, new_id(self.tracer.rng, 64), self.root.span_id,
+            name, start, end or time.time_ns(), attributes, error))
+
+    def hold(self, count=1) -> None:
+        """Ещё count участников, которые вызовут release()."""
+        with self.lock:
+            self.holds += count
+
+    def release(self, error=None) -> None:
+        """Участник закончил; последний завершает трассу."""
+        with self.lock:
+            self.holds -= 1
+            self.error = self.error or error
+            if self.holds:
+                return
+        self.finish(self.error)
+
+    def finish(self, error=None) -> None:
+        """Завершение трассы и передача спанов на выгрузку."""
+        self.root.end = time.time_ns()
+        self.root.error = error
+        self.tracer.exporter.add([self.root, *self.spans])
+
+
+class NoopTrace:
+    """Трасса, которая ничего не записывает."""
+
+    @contextmanager
+    def span(self, name, **attributes):
+        """Блок без замера."""
+        yield None
+
+    def record(self, name, start, end=None, error=None,
+               **attributes) -> None:
+        """Ничего не делает."""
+
+    def hold(self, count=1) -> None:
+        """Ничего не делает."""
+
+    def release(self, error=None) -> None:
+        """Ничего не делает."""
+
+    def finish(self, error=None) -> None:
+        """Ничего не делает."""
+
+
+NOOP_TRACE = NoopTrace()
+
+
+class Tracer:
+    """Создание трасс работ с выборкой sample_rate."""
+
+    def __init__(self, exporter, sample_rate=1.0, seed=None) -> None:
+        """Трассировщик, выгружающий спаны через exporter."""
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self.rng = random.Random(seed)
+
+    def start(self, name, **attributes):
+        """Новая трасса работы или NOOP_TRACE вне выборки.
+
+        Трассу завершает release() или finish().
+        """
+        if self.rng.random() >= self.sample_rate:
+            return NOOP_TRACE
+        return Trace(self, name, attributes,
+                     list(getattr(_cycle, 'stages', ())))
+
+    @contextmanager
+    def trace(self, name, **attributes):
+        """Трасса работы на время блока или NOOP_TRACE вне выборки."""
+        trace = self.start(name, **attributes)
+        try:
+            yield trace
+        except Exception as error:
+            trace.finish(repr(error))
+            raise
+        trace.finish()
+
+    def shutdown(self) -> None:
+        """Выгрузка оставшихся спанов."""
+        self.exporter.shutdown()
+
+
+class NoopTracer:
+    """Трассировщик при выключенной трассировке."""
+
+    def start(self, name, **attributes):
+        """Трасса, которая ничего не записывает."""
+        return NOOP_TRACE
+
+    @contextmanager
+    def trace(self, name, **attributes):
+        """Блок без трассы."""
+        yield NOOP_TRACE
+
+    def shutdown(self) -> None:
+        """Ничего не делает."""
+
+
+def install(tracer) -> None:
+    """Включение замеров этапов опроса для tracer."""
+    global _active
+    _active = tracer
+
+
+def stage(name, first=False):
+    """Декоратор замера этапа цикла опроса.
+
+    Этап с first=True начинает новый цикл: замеры прошлого цикла
+    забываются. Без установленного трассировщика функция вызывается
+    напрямую.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _active is None:
+                return func(*args, **kwargs)
+            if first or not hasattr(_cycle, 'stages'):
+                _cycle.stages = []
+            started = time.time_ns()
+            error = None
+            try:
+                return func(*args, **kwargs)
+            except Exception as caught:
+                error = repr(caught)
+                raise
+            finally:
+                _cycle.stages.append((name, started, time.time_ns(), error))
+        return wrapper
+    return decorator
+
+
+def load_tracer(target, sample_rate=1.0):
+    """Трассировщик с выгрузкой в target (файл или адрес коллектора)."""
+    if not target:
+        return NoopTracer()
+    if target.startswith(('http://', 'https://')):
+        sink = CollectorSpanSink(target)
+    else:
+        sink = FileSpanSink(os.path.expanduser(target))
+    tracer = Tracer(BatchExporter(sink), sample_rate)
+    install(tracer)
+    return tracer
@@ -0,0 +1,102 @@
+"""Шаблоны уведомлений о смене статуса по языкам и тенантам.
+
+Шаблон уведомления содержит поля {name} (имя работы) и {verdict}.
+При регистрации набора шаблонов вердикт подставляется сразу, а текст
+режется по месту имени на готовые части: уведомление собирается
+поиском частей по статусу и str.join с именем работы.
+
+Наборы называются по языку ('ru', 'en'); тенант может заменить
+шаблон или вердикты своим набором '<тенант>/<язык>', недостающее
+берётся из набора языка.
+"""
+
+from string import Formatter
+
+DEFAULT_LOCALE = 'ru'
+CHANGE_TEMPLATES = {
+    'ru': 'Изменился статус проверки работы "{name}". {verdict}',
+    'en': 'Homework review status changed: "{name}". {verdict}',
+}
+# Русские вердикты задаёт homework.HOMEWORK_VERDICTS.
+LOCALE_VERDICTS = {
+    'en': {
+        'approved': 'Homework reviewed: the reviewer liked it. Hooray!',
+        'reviewing': 'The reviewer has started reviewing the homework.',
+        'rejected': 'Homework reviewed: the reviewer left comments.',
+    },
+}
+FIELDS = frozenset({'name', 'verdict'})
+# Временная замена имени работы при разрезании шаблона.
+NAME_MARK = '\x00'
+
+
+def compile_template(template, verdict) -> tuple:
+    """Части шаблона между вхождениями имени работы."""
+    fields = {field for _, field, _, _ in Formatter().parse(template)
+              if field is not None}
+    if not fields <= FIELDS or 'name' not in fields:
+        raise ValueError(f'Шаблон должен содержать {{name}} и может '
+                         f'содержать {{verdict}}: {template!r}')
+    return tuple(template.format(name=NAME_MARK,
+                                 verdict=verdict).split(NAME_MARK))
+
+
+def tenant_set(tenant, locale) -> str:
+    """Имя набора шаблонов тенанта для языка locale."""
+    return f'{tenant}/{locale}'
+
+
+class VerdictTemplates:
+    """Скомпилированные наборы шаблонов."""
+
+    def __init__(self, verdicts, default_locale=DEFAULT_LOCALE) -> None:
+        """Наборы всех языков; verdicts — вердикты языка по умолчанию."""
+        self.default_locale = default_locale
+        self.sets: dict = {}
+        # Части шаблонов по наборам и статусам для render().
+        self.parts: dict = {}
+        for locale, change in CHANGE_TEMPLATES.items():
+            self.add(locale, change, (verdicts if locale == default_locale
+                                      else LOCALE_VERDICTS[locale]))
+
+    def add(self, name, change=None, verdicts=None, base=None) -> None:
+        """Регистрация набора name.
+
+        Шаблон change и вердикты verdicts, которых нет, берутся
+        из набора base. Ошибка в шаблоне — ValueError.
+        """
+        if base is not None:
+            base_set = self.sets[base]
+            change = change or base_set['change']
+            verdicts = {**base_set['verdicts'], **(verdicts or {})}
+        parts = {status: compile_template(change, verdict)
+                 for status, verdict in verdicts.items()}
+        self.sets[name] = {'change': change, 'verdicts': dict(verdicts)}
+        self.parts[name] = parts
+
+    def add_tenant(self, tenant, templates) -> None:
+        """Наборы тенанта: {язык: {"change": ..., "verdicts": {...}}}.
+
+        Прежние наборы тенанта забываются.
+        """
+        prefix = tenant_set(tenant, '')
+        for name in [name for name in self.sets if name.startswith(prefix)]:
+            del self.sets[name], self.parts[name]
+        for locale, config in templates.items():
+            self.add(tenant_set(tenant, locale), config.get('change'),
+                     config.get('verdicts'), base=self.resolve(locale))
+
+    def resolve(self, locale=None, tenant=None) -> str:
+        """Набор для языка locale с учётом замен тенанта tenant."""
+        locale = locale or self.default_locale
+        if tenant is not None and tenant_set(tenant, locale) in self.sets:
+            return tenant_set(tenant, locale)
+        return locale if locale in self.sets else self.default_locale
+
+    def render(self, status, name, template_set=None) -> str:
+        """Уведомление о смене статуса работы name.
+
+        Неизвестный статус — KeyError.
+        """
+        return str(name).join(
+            self.parts[template_set or self.default_locale][status])